@@ -0,0 +1,187 @@
+"""
+Benchmark suite for the on-call scheduler
+
+Generates synthetic constraints.json inputs (team size, horizon length,
+restriction density, holiday-heavy months), runs them through the
+scheduler and exporters, and records generation time, peak memory,
+unfilled slots and fairness spread as JSON.
+
+Usage:
+    python3 bench_scheduler.py                      # default grid, greedy solver
+    python3 bench_scheduler.py --quick              # small grid for a smoke run
+    python3 bench_scheduler.py --solver greedy --solver optimal --team-size 10 --team-size 200
+    python3 bench_scheduler.py --write-constraints bench_inputs/   # also keep the generated inputs
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from on_call_scheduler_with_sheets import (
+    MONTH_NAMES, SOLVERS, build_schedule, build_slot_table, horizon_days, load_data_from_json,
+    schedule_rows, score_schedule, write_schedule_csv, write_summary_csv,
+)
+
+DEFAULT_TEAM_SIZES = (10, 50, 200, 1000)
+DEFAULT_HORIZONS = (1, 3)
+DEFAULT_DENSITIES = (0.05, 0.2, 0.4)
+# February is a plain month; September/October carry most of the holidays.
+# Runs use the computed holiday calendar only, ignoring local overrides.
+DEFAULT_MONTHS = (2, 9, 10)
+BENCH_YEAR = 2026
+
+
+def generate_constraints(team_size, month, year=BENCH_YEAR, months=1, density=0.2, seed=0):
+    """
+    Build a synthetic constraints.json document
+
+    About half of each developer's unavailable shifts are scattered single
+    shifts and half come as a contiguous block (a vacation), so `density` is
+    the expected fraction of the horizon's shifts each developer blocks.
+
+    Returns:
+        Dict in the format load_data_from_json() reads
+    """
+    rng = random.Random(seed)
+    labels = list(build_slot_table(horizon_days(month, year, months), None)["index"])
+    developers = {}
+    for i in range(team_size):
+        blocked = {label for label in labels if rng.random() < density / 2}
+        block_length = int(len(labels) * density / 2)
+        if block_length:
+            start = rng.randrange(len(labels) - block_length + 1)
+            blocked.update(labels[start:start + block_length])
+        developers[f"dev{i:04d}"] = {
+            "email": "",
+            "restrictions": [label for label in labels if label in blocked],
+        }
+    return {
+        "month": month,
+        "year": year,
+        "last_updated": datetime(year, month, 1).isoformat(),
+        "developers": developers,
+    }
+
+
+def run_case(case, solver, repeat, input_dir, output_dir):
+    """Benchmark one (team size, horizon, density, month) case; returns a result dict"""
+    document = generate_constraints(case["team_size"], case["month"], months=case["months"],
+                                    density=case["density"], seed=case["seed"])
+    input_path = os.path.join(input_dir, "constraints_{team_size}_{months}m_{density}_{month:02d}.json".format(**case))
+    with open(input_path, "w") as f:
+        json.dump(document, f)
+
+    timings = {"load": [], "build": [], "export": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        month, year, developers = load_data_from_json(input_path)
+        timings["load"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        schedule = build_schedule(month, year, developers, seed=case["seed"], months=case["months"], solver=solver,
+                                  holidays_file=None)
+        timings["build"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        rows = schedule_rows(schedule)
+        write_schedule_csv(rows, MONTH_NAMES[month-1], os.path.join(output_dir, "shift_schedule.csv"))
+        write_summary_csv(schedule, os.path.join(output_dir, "shift_summary.csv"))
+        timings["export"].append(time.perf_counter() - start)
+
+    # Separate run for memory: tracemalloc slows everything down
+    tracemalloc.start()
+    build_schedule(month, year, developers, seed=case["seed"], months=case["months"], solver=solver,
+                   holidays_file=None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    score = score_schedule(schedule)
+    return {
+        **case,
+        "solver": solver,
+        "slots": len(schedule["assignments"]),
+        "restrictions": sum(len(r) for r in developers.values()),
+        "load_seconds": min(timings["load"]),
+        "build_seconds": min(timings["build"]),
+        "export_seconds": min(timings["export"]),
+        "peak_memory_kib": round(peak / 1024, 1),
+        "unfilled": score["unfilled"],
+        "fill_rate": round(score["fill_rate"], 4),
+        "spread": score["spread"],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the on-call scheduler on synthetic constraints")
+    parser.add_argument('--team-size', type=int, action='append', help=f'Team sizes (default: {DEFAULT_TEAM_SIZES})')
+    parser.add_argument('--months', type=int, action='append', help=f'Horizon lengths in months (default: {DEFAULT_HORIZONS})')
+    parser.add_argument('--density', type=float, action='append', help=f'Restriction densities (default: {DEFAULT_DENSITIES})')
+    parser.add_argument('--month', type=int, action='append', help=f'Start months (default: {DEFAULT_MONTHS})')
+    parser.add_argument('--solver', choices=SOLVERS, action='append', help='Solvers to run (default: greedy)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case, best is kept (default: 3)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for generated inputs and schedules')
+    parser.add_argument('--quick', action='store_true', help='Small grid for a smoke run')
+    parser.add_argument('--output', default='bench_results.json', help='Results file (default: bench_results.json)')
+    parser.add_argument('--write-constraints', default=None, metavar='DIR',
+                        help='Keep the generated constraints files in DIR')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.quick:
+        grid = {"team_size": [10, 100], "months": [1], "density": [0.2], "month": [2, 9]}
+    else:
+        grid = {
+            "team_size": args.team_size or list(DEFAULT_TEAM_SIZES),
+            "months": args.months or list(DEFAULT_HORIZONS),
+            "density": args.density or list(DEFAULT_DENSITIES),
+            "month": args.month or list(DEFAULT_MONTHS),
+        }
+    solvers = args.solver or ["greedy"]
+
+    cases = [
+        {"team_size": team_size, "months": months, "density": density, "month": month, "seed": args.seed}
+        for team_size in grid["team_size"]
+        for months in grid["months"]
+        for density in grid["density"]
+        for month in grid["month"]
+    ]
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        input_dir = args.write_constraints or scratch
+        os.makedirs(input_dir, exist_ok=True)
+        print(f"{'solver':<8} {'team':>5} {'months':>6} {'density':>7} {'month':>5} "
+              f"{'build ms':>9} {'export ms':>9} {'peak KiB':>9} {'unfilled':>8} {'spread':>6}")
+        for solver in solvers:
+            for case in cases:
+                result = run_case(case, solver, args.repeat, input_dir, scratch)
+                results.append(result)
+                print(f"{solver:<8} {case['team_size']:>5} {case['months']:>6} {case['density']:>7} "
+                      f"{MONTH_NAMES[case['month']-1]:>5} {result['build_seconds'] * 1000:>9.1f} "
+                      f"{result['export_seconds'] * 1000:>9.1f} {result['peak_memory_kib']:>9} "
+                      f"{result['unfilled']:>8} {result['spread']['total']:>6}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ {len(results)} results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
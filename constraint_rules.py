@@ -0,0 +1,205 @@
+"""
+Restriction rules for developers' unavailability, compiled to slot bitsets
+
+A restriction is one string, as stored by the constraints app:
+
+    "14/03 Night"          one shift
+    "14/03"                both shifts of a day
+    "10/03-20/03 Day"      a date range (may wrap over the new year)
+    "10-20"                days 10-20 of every month in the horizon
+    "every Tuesday Night"  a weekly recurring rule
+
+The shift is optional everywhere and matched case-insensitively against the
+shift template ("oncall" and "ONCALL" both mean "OnCall"). Each distinct string is
+parsed and validated once (memoized), and each distinct rule is expanded
+once per planning horizon into a bitset over slots with a few big-int
+operations, so neither memory nor time grows with how many days a rule
+covers or how many developers repeat it.
+"""
+
+import calendar
+import functools
+import re
+from datetime import date
+
+WEEKDAYS = tuple(name.lower() for name in calendar.day_name)
+
+# Days per month in a leap year, for validating year-less dates
+MAX_DAY = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+DATE = r"(\d{1,2})/(\d{1,2})"
+SHIFT = r"(?:\s+([A-Za-z]+))?"
+PATTERNS = (
+    ("dates", re.compile(rf"{DATE}(?:\s*-\s*{DATE})?{SHIFT}")),
+    ("days", re.compile(rf"(\d{{1,2}})\s*-\s*(\d{{1,2}}){SHIFT}")),
+    ("weekly", re.compile(rf"every\s+([A-Za-z]+){SHIFT}", re.IGNORECASE)),
+)
+
+
+def check_date(day, month, text):
+    if not 1 <= month <= 12 or not 1 <= day <= MAX_DAY[month - 1]:
+        raise ValueError(f"Invalid date {day:02d}/{month:02d} in restriction '{text}'")
+    return month, day
+
+
+@functools.lru_cache(maxsize=None)
+def parse_restriction(text):
+    """
+    Parse and validate one restriction string
+
+    Returns:
+        A hashable rule: ("dates", (month, day), (month, day), shift),
+        ("days", first, last, shift) or ("weekly", weekday, shift), where
+        weekday is 0 for Monday and shift is the lowercased shift name or
+        None for every shift
+
+    Raises:
+        ValueError: If the string is not a valid restriction
+    """
+    for kind, pattern in PATTERNS:
+        match = pattern.fullmatch(text.strip())
+        if not match:
+            continue
+        groups = match.groups()
+        shift = groups[-1].lower() if groups[-1] else None
+        if kind == "dates":
+            start = check_date(int(groups[0]), int(groups[1]), text)
+            end = check_date(int(groups[2]), int(groups[3]), text) if groups[2] else start
+            return ("dates", start, end, shift)
+        if kind == "days":
+            first, last = int(groups[0]), int(groups[1])
+            if not 1 <= first <= last <= 31:
+                raise ValueError(f"Invalid day range {first}-{last} in restriction '{text}'")
+            return ("days", first, last, shift)
+        weekday = groups[0].lower().rstrip("s")
+        if weekday not in WEEKDAYS:
+            raise ValueError(f"Unknown weekday '{groups[0]}' in restriction '{text}'")
+        return ("weekly", WEEKDAYS.index(weekday), shift)
+    raise ValueError(f"Unrecognized restriction '{text}' (expected e.g. '14/03 Night', "
+                     f"'10/03-20/03', '10-20 Day' or 'every Tuesday Night')")
+
+
+def invalid_restrictions(developers, shift_names):
+    """
+    Validate every developer's restrictions
+
+    Returns:
+        List of (developer, restriction, error message)
+    """
+    problems = []
+    known = {name.lower() for name in shift_names}
+    for dev, restrictions in developers.items():
+        for text in restrictions:
+            try:
+                shift = parse_restriction(text)[-1]
+            except ValueError as e:
+                problems.append((dev, text, str(e)))
+                continue
+            if shift is not None and shift not in known:
+                problems.append((dev, text, f"Unknown shift '{text.split()[-1]}' in restriction '{text}' "
+                                            f"(expected one of: {', '.join(shift_names)})"))
+    return problems
+
+
+class HorizonMasks:
+    """
+    Lazily built bitset helpers for one planning horizon
+
+    Slot numbers follow the slot table: slot = day_index * shifts_per_day + shift_index.
+    """
+
+    def __init__(self, days, shift_names):
+        self.days = days
+        self.shift_names = tuple(shift_names)
+        self.width = len(self.shift_names)
+        # Parsed rules carry lowercased shift names
+        self.shift_index = {name.lower(): index for index, name in enumerate(self.shift_names)}
+        self.first = days[0].toordinal() if days else 0
+        self.rules = {}
+        self.texts = {}
+        self.weekday_masks = None
+        self.shift_masks = {}
+
+    def day_span(self, lo, hi):
+        """Every slot of day indexes lo..hi-1 (clipped to the horizon)"""
+        lo, hi = max(lo, 0), min(hi, len(self.days))
+        if lo >= hi:
+            return 0
+        return (1 << hi * self.width) - (1 << lo * self.width)
+
+    def shift_mask(self, shift):
+        """Every slot of one shift (lowercased name) over the horizon (all slots for None)"""
+        if shift is None:
+            return self.day_span(0, len(self.days))
+        if shift not in self.shift_masks:
+            index = self.shift_index[shift]
+            mask = 0
+            for day_idx in range(len(self.days)):
+                mask |= 1 << day_idx * self.width + index
+            self.shift_masks[shift] = mask
+        return self.shift_masks[shift]
+
+    def weekday_mask(self, weekday):
+        """Every slot of the days falling on a weekday"""
+        if self.weekday_masks is None:
+            self.weekday_masks = [0] * 7
+            day_bits = (1 << self.width) - 1
+            for day_idx, day in enumerate(self.days):
+                self.weekday_masks[day.weekday()] |= day_bits << day_idx * self.width
+        return self.weekday_masks[weekday]
+
+    def date_range(self, start, end):
+        """Slots from month/day start through end, in every year of the horizon"""
+        mask = 0
+        if not self.days:
+            return mask
+        for year in range(self.days[0].year - 1, self.days[-1].year + 1):
+            first = self.ordinal(year, *start)
+            last = self.ordinal(year + (end < start), *end)
+            if first is not None and last is not None:
+                mask |= self.day_span(first - self.first, last - self.first + 1)
+        return mask
+
+    @staticmethod
+    def ordinal(year, month, day):
+        """date(year, month, day).toordinal(), or None for 29/02 outside leap years"""
+        if day > calendar.monthrange(year, month)[1]:
+            return None
+        return date(year, month, day).toordinal()
+
+    def month_days(self, first, last):
+        """Slots of days first..last of every month in the horizon"""
+        mask = 0
+        for day_idx, day in enumerate(self.days):
+            if day_idx == 0 or day.day == 1:
+                start = day_idx - (day.day - 1)     # index the 1st of this month has (or would have)
+                length = calendar.monthrange(day.year, day.month)[1]
+                mask |= self.day_span(start + first - 1, start + min(last, length))
+        return mask
+
+    def rule_mask(self, rule):
+        """Slot bitset of one parsed rule, computed once per horizon"""
+        mask = self.rules.get(rule)
+        if mask is None:
+            kind, *args, shift = rule
+            if kind == "dates":
+                mask = self.date_range(*args)
+            elif kind == "days":
+                mask = self.month_days(*args)
+            else:
+                mask = self.weekday_mask(*args)
+            if shift is not None:
+                mask &= self.shift_mask(shift) if shift in self.shift_index else 0
+            self.rules[rule] = mask
+        return mask
+
+    def restriction_mask(self, restrictions):
+        """Slot bitset of a developer's restriction strings"""
+        masks = self.texts
+        mask = 0
+        for text in restrictions:
+            text_mask = masks.get(text)
+            if text_mask is None:
+                text_mask = masks[text] = self.rule_mask(parse_restriction(text))
+            mask |= text_mask
+        return mask
@@ -6,6 +6,8 @@
  *
  *  - Last 5 days of month → starts the web server + sends daily Slack reminders to team
  *  - Last day of month     → runs schedule generation, stops web server, sends results
+ *  - Always                → keeps the Python scheduler service warm (scheduler_service.py),
+ *                            so generation skips interpreter startup, imports and OAuth
  *      • Script output (success or failure) → admin DM webhook
  *      • Success only → team channel: "check the drive"
  *
@@ -52,6 +54,7 @@ function startServer() {
     console.log('▶ Starting web server...');
     serverProcess = spawn('node', ['server.js'], {
         cwd: __dirname,
+        env: { ...process.env, SCHEDULER_SERVICE_URL: SERVICE_URL },
         stdio: 'inherit'
     });
     serverProcess.on('exit', (code) => {
@@ -134,13 +137,71 @@ function resetConstraintsForNextMonth() {
     }
 }
 
+// ============================================================================
+// Python scheduler service (long-running, keeps modules and Google auth warm)
+// ============================================================================
+const SERVICE_PORT = config?.scheduler_service_port || 8790;
+const SERVICE_URL = `http://127.0.0.1:${SERVICE_PORT}`;
+let serviceProcess = null;
+
+function startPythonService() {
+    if (serviceProcess) return;
+    console.log('▶ Starting Python scheduler service...');
+    serviceProcess = spawn('python3', ['scheduler_service.py', '--port', String(SERVICE_PORT)], {
+        cwd: path.join(__dirname, '..'),
+        stdio: 'inherit'
+    });
+    serviceProcess.on('exit', (code) => {
+        console.log(`Python scheduler service exited with code ${code}`);
+        serviceProcess = null;
+    });
+}
+
+function stopPythonService() {
+    if (!serviceProcess) return;
+    serviceProcess.kill('SIGTERM');
+    serviceProcess = null;
+}
+
+// Generate through the service; null if it isn't reachable
+async function runViaService(args = []) {
+    try {
+        const res = await fetch(`${SERVICE_URL}/generate`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ args })
+        });
+        if (!res.ok) {
+            console.error(`✗ Scheduler service error: ${res.status}`);
+            return null;
+        }
+        const { code, output, seconds } = await res.json();
+        process.stdout.write(output);
+        console.log(`Scheduler service run exited with code ${code} (${seconds}s)`);
+        return { code, output };
+    } catch (err) {
+        console.log(`ℹ Scheduler service not reachable (${err.message}) — running the script directly`);
+        return null;
+    }
+}
+
 // ============================================================================
 // Python schedule generation
 // ============================================================================
-function runPythonScript() {
+// Reruns on unchanged constraints reuse the cached schedule and skip the Sheets upload
+const GENERATE_ARGS = ['--cache', config?.schedule_cache_dir || 'data/schedule-cache'];
+
+async function runPythonScript() {
+    console.log('▶ Running schedule generation...');
+    const result = await runViaService(GENERATE_ARGS);
+    if (result) return result;
+    return runPythonProcess(GENERATE_ARGS);
+}
+
+function runPythonProcess(args = []) {
     return new Promise((resolve) => {
         console.log('▶ Running schedule generation script...');
-        const proc = spawn('python3', ['on_call_scheduler_with_sheets.py'], {
+        const proc = spawn('python3', ['on_call_scheduler_with_sheets.py', ...args], {
             cwd: path.join(__dirname, '..')
         });
         let output = '';
@@ -266,6 +327,8 @@ async function runDailyCheck() {
     console.log('🗓  On-Call Scheduler Daemon');
     console.log('='.repeat(60));
 
+    startPythonService();
+
     const daysLeft = getDaysLeft();
     const reminderDays = config?.reminder_days || 5;
 
@@ -300,10 +363,12 @@ async function runDailyCheck() {
 process.on('SIGINT', () => {
     console.log('\nShutting down...');
     stopServer();
+    stopPythonService();
     process.exit(0);
 });
 
 process.on('SIGTERM', () => {
     stopServer();
+    stopPythonService();
     process.exit(0);
 });
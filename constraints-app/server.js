@@ -12,6 +12,9 @@ const PORT = 3000;
 // or via environment variable: REVIEW_MODE=true node server.js
 const REVIEW_MODE = process.argv.includes('--review') || process.env.REVIEW_MODE === 'true';
 
+// Python scheduler service used for live feasibility checks (started by scheduler.js)
+const SCHEDULER_SERVICE_URL = process.env.SCHEDULER_SERVICE_URL || 'http://127.0.0.1:8790';
+
 // ============================================================================
 // USERS - Edit emails and passwords here
 // ============================================================================
@@ -352,6 +355,47 @@ app.post('/api/month', async (req, res) => {
     }
 });
 
+// Can every shift still be covered? Asks the Python scheduler service (scheduler_service.py)
+app.get('/api/feasibility', async (req, res) => {
+    try {
+        const data = await readData();
+        const user = req.session.user;
+        const r = await fetch(`${SCHEDULER_SERVICE_URL}/check`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+        const report = await r.json();
+        if (!r.ok) return res.status(r.status).json(report);
+
+        // Other developers' restrictions are only shown to admins
+        if (!user.isAdmin) {
+            report.invalid = report.invalid.filter(item => item.developer === user.developer);
+            report.problems.forEach(problem => { problem.restricted = {}; });
+        }
+        res.json(report);
+    } catch (error) {
+        res.status(503).json({ error: 'Scheduler service not available' });
+    }
+});
+
+// What-if scenarios against the current constraints (admin only), e.g.
+// { "scenarios": [{ "name": "Ivan leaves", "remove": ["Ivan"] }] } — see scenarios.py
+app.post('/api/scenarios', async (req, res) => {
+    try {
+        if (!req.session.user.isAdmin) return res.status(403).json({ error: 'Admin only' });
+        const data = await readData();
+        const r = await fetch(`${SCHEDULER_SERVICE_URL}/scenarios`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ ...req.body, base: data })
+        });
+        res.status(r.status).json(await r.json());
+    } catch (error) {
+        res.status(503).json({ error: 'Scheduler service not available' });
+    }
+});
+
 // Health check
 app.get('/health', (req, res) => {
     res.json({ status: 'ok' });
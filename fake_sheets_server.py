@@ -0,0 +1,359 @@
+"""
+In-memory fake of the Sheets v4 / Drive v3 endpoints used by sheets_api.py
+
+Lets the upload path be exercised end to end without Google credentials,
+including rate limiting: --fail-every N answers every Nth request with a
+429 (or --fail-status) so the retry/backoff logic is hit. With
+--lose-responses the failing requests are carried out first, like a 5xx
+whose response was lost after the write went through.
+
+    python3 fake_sheets_server.py --port 8765 --fail-every 3
+
+From Python (e.g. an ad-hoc check):
+
+    from fake_sheets_server import start_fake_server
+    server = start_fake_server()                 # random free port
+    config = {"spreadsheet_id": server.spreadsheet_id,
+              "sheets_api_url": server.sheets_url, "drive_api_url": server.drive_url}
+    upload_to_google_sheets(rows, config, 2026, "Feb", token_provider=lambda: "fake")
+    server.cells("On call schedule 2026")       # {(row, col): {"value", "format"}}, zero-based
+    server.shutdown()
+
+Only the subset of the API the scheduler uses is implemented: spreadsheet
+metadata (optionally with grid data for A1 ranges), values.get, Drive file
+search by name, and the addSheet / updateCells / repeatCell batchUpdate
+requests. Grid reads apply the CellData part of their field mask
+(data.rowData.values(...)), keeping empty placeholders so cells stay
+aligned; other field masks are not applied.
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_SPREADSHEET_ID = "fake-spreadsheet"
+FAKE_SPREADSHEET_NAME = "On Call Schedule"
+
+
+def column_index(letters):
+    """Zero-based column index of A1 column letters ("A" -> 0, "AA" -> 26)"""
+    index = 0
+    for letter in letters.upper():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def parse_a1(cell_range):
+    """Split "'Title'!A5:D40" / "Title!A:A" into (title, row0, row1, col0, col1), zero-based, end exclusive"""
+    title, _, cells = cell_range.rpartition("!")
+    title = title.strip("'")
+    start, _, end = cells.partition(":")
+    end = end or start
+    bounds = []
+    for ref in (start, end):
+        letters, digits = re.fullmatch(r"([A-Za-z]*)(\d*)", ref).groups()
+        bounds.append((column_index(letters) if letters else None, int(digits) - 1 if digits else None))
+    (col0, row0), (col1, row1) = bounds
+    return (title, row0 or 0, None if row1 is None else row1 + 1,
+            col0 or 0, None if col1 is None else col1 + 1)
+
+
+def cell_fields(fields):
+    """CellData paths of a data.rowData.values(...) field mask (None: no mask, everything)"""
+    if fields is None:
+        return None
+    match = re.search(r"rowData\.values\(([^)]*)\)", fields)
+    return [path.strip() for path in match.group(1).split(",")] if match else []
+
+
+def mask_cell(data, paths):
+    """Only the given dotted paths of a CellData dict"""
+    if paths is None:
+        return data
+    masked = {}
+    for path in paths:
+        *parents, leaf = path.split(".")
+        source, target = data, masked
+        for key in parents:
+            source = source.get(key, {})
+        if leaf in source:
+            for key in parents:
+                target = target.setdefault(key, {})
+            target[leaf] = source[leaf]
+    return masked
+
+
+class FakeSpreadsheet:
+    """Cell values and formats of one spreadsheet, keyed by sheetId"""
+
+    def __init__(self, spreadsheet_id=FAKE_SPREADSHEET_ID, name=FAKE_SPREADSHEET_NAME):
+        self.spreadsheet_id = spreadsheet_id
+        self.name = name
+        self.sheets = {0: {"title": "Sheet1", "cells": {}}}
+        self.lock = threading.Lock()
+
+    def sheet_id(self, title):
+        for sheet_id, sheet in self.sheets.items():
+            if sheet["title"] == title:
+                return sheet_id
+        raise KeyError(f"Unable to parse range: {title}")
+
+    def metadata(self):
+        return {
+            "spreadsheetId": self.spreadsheet_id,
+            "properties": {"title": self.name},
+            "sheets": [{"properties": {"sheetId": sheet_id, "title": sheet["title"]}}
+                       for sheet_id, sheet in self.sheets.items()],
+        }
+
+    def used_range(self, cell_range):
+        """Cells of a sheet and the (row0, row1, col0, col1) extent of its non-empty cells within an A1 range"""
+        title, row0, row1, col0, col1 = parse_a1(cell_range)
+        sheet_id = self.sheet_id(title)
+        cells = self.sheets[sheet_id]["cells"]
+        used = [(r, c) for r, c in cells if cells[(r, c)]
+                and r >= row0 and (row1 is None or r < row1) and c >= col0 and (col1 is None or c < col1)]
+        if not used:
+            return sheet_id, cells, (row0, row0, col0, col0)
+        return sheet_id, cells, (row0, max(r for r, _ in used) + 1, col0, max(c for _, c in used) + 1)
+
+    def grid_data(self, cell_range, fields=None):
+        """
+        Spreadsheet metadata for the sheet of an A1 range, with its rowData like includeGridData=true
+
+        Only the CellData fields named in the `fields` mask are returned; cells
+        and rows left empty by it become {} placeholders, trailing ones dropped.
+        """
+        paths = cell_fields(fields)
+        sheet_id, cells, (row0, row1, col0, col1) = self.used_range(cell_range)
+        row_data = []
+        for r in range(row0, row1):
+            values = []
+            for c in range(col0, col1):
+                cell = cells.get((r, c), {})
+                data = {}
+                if "value" in cell:
+                    kind = "numberValue" if isinstance(cell["value"], (int, float)) else "stringValue"
+                    data["userEnteredValue"] = {kind: cell["value"]}
+                if cell.get("format"):
+                    data["userEnteredFormat"] = dict(cell["format"])
+                values.append(mask_cell(data, paths))
+            while values and not values[-1]:
+                values.pop()
+            row_data.append({"values": values} if values else {})
+        while row_data and not row_data[-1]:
+            row_data.pop()
+        sheet = {"properties": {"sheetId": sheet_id, "title": self.sheets[sheet_id]["title"]},
+                 "data": [{"startRow": row0, "startColumn": col0, "rowData": row_data}]}
+        return {"spreadsheetId": self.spreadsheet_id, "properties": {"title": self.name}, "sheets": [sheet]}
+
+    def values(self, cell_range, major_dimension="ROWS"):
+        _, cells, (row0, row1, col0, col1) = self.used_range(cell_range)
+        if row1 == row0:
+            return {"range": cell_range, "majorDimension": major_dimension}
+        # FORMATTED_VALUE rendering: everything comes back as strings
+        grid = [[str(cells.get((r, c), {}).get("value", "")) for c in range(col0, col1)]
+                for r in range(row0, row1)]
+        if major_dimension == "COLUMNS":
+            grid = [list(column) for column in zip(*grid)]
+        # Like the real API, trailing empty cells are dropped from each row
+        for line in grid:
+            while line and line[-1] == "":
+                line.pop()
+        return {"range": cell_range, "majorDimension": major_dimension, "values": grid}
+
+    def batch_update(self, requests):
+        replies = []
+        for request in requests:
+            (kind, body), = request.items()
+            getattr(self, f"apply_{kind}")(body)
+            replies.append({})
+        return {"spreadsheetId": self.spreadsheet_id, "replies": replies}
+
+    def apply_addSheet(self, body):
+        properties = body["properties"]
+        sheet_id = properties.get("sheetId", max(self.sheets, default=-1) + 1)
+        if sheet_id in self.sheets:
+            raise ValueError(f"A sheet with the id {sheet_id} already exists")
+        if any(s["title"] == properties["title"] for s in self.sheets.values()):
+            raise ValueError(f"A sheet with the name \"{properties['title']}\" already exists")
+        self.sheets[sheet_id] = {"title": properties["title"], "cells": {}}
+
+    def apply_updateCells(self, body):
+        cells = self.sheets[body["start"]["sheetId"]]["cells"]
+        row0, col0 = body["start"].get("rowIndex", 0), body["start"].get("columnIndex", 0)
+        for r, row in enumerate(body["rows"]):
+            for c, cell in enumerate(row.get("values", [])):
+                target = cells.setdefault((row0 + r, col0 + c), {})
+                if "userEnteredValue" in body["fields"]:
+                    value = cell.get("userEnteredValue", {})
+                    if value:
+                        (_, target["value"]), = value.items()
+                    else:
+                        target.pop("value", None)
+                fmt = cell.get("userEnteredFormat", {})
+                if "userEnteredFormat.backgroundColor" in body["fields"]:
+                    # Named in the field mask but absent from the cell: cleared
+                    if "backgroundColor" in fmt:
+                        target.setdefault("format", {})["backgroundColor"] = fmt["backgroundColor"]
+                    else:
+                        target.get("format", {}).pop("backgroundColor", None)
+                elif "userEnteredFormat" in body["fields"] and fmt:
+                    target.setdefault("format", {}).update(fmt)
+
+    def apply_repeatCell(self, body):
+        grid = body["range"]
+        cells = self.sheets[grid["sheetId"]]["cells"]
+        fmt = body["cell"].get("userEnteredFormat", {})
+        for r in range(grid["startRowIndex"], grid["endRowIndex"]):
+            for c in range(grid["startColumnIndex"], grid["endColumnIndex"]):
+                cells.setdefault((r, c), {}).setdefault("format", {}).update(fmt)
+
+
+class FakeSheetsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, body, headers=()):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def injected_failure(self):
+        """Count the request; True if it is one of the every-Nth that fail"""
+        server = self.server
+        with server.spreadsheet.lock:
+            server.request_count += 1
+            count = server.request_count
+            if server.fail_every and count % server.fail_every == 0:
+                server.failures += 1
+                return True
+        return False
+
+    def send_failure(self):
+        status = self.server.fail_status
+        self.send_json(status, {"error": {"code": status, "message": "Injected failure"}}, [("Retry-After", "0")])
+
+    def handle_api(self, method):
+        fail = self.injected_failure()
+        if fail and not self.server.lose_responses:
+            self.send_failure()
+            return
+        url = urllib.parse.urlparse(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query))
+        path = urllib.parse.unquote(url.path)
+        sheet = self.server.spreadsheet
+        prefix = f"/v4/spreadsheets/{sheet.spreadsheet_id}"
+        try:
+            with sheet.lock:
+                if method == "GET" and path == "/drive/v3/files":
+                    match = sheet.name in params.get("q", "")
+                    body = {"files": [{"id": sheet.spreadsheet_id, "name": sheet.name}] if match else []}
+                elif method == "GET" and path == prefix and params.get("includeGridData") == "true":
+                    body = sheet.grid_data(params["ranges"], params.get("fields"))
+                elif method == "GET" and path == prefix:
+                    body = sheet.metadata()
+                elif method == "GET" and path.startswith(prefix + "/values/"):
+                    body = sheet.values(path[len(prefix + "/values/"):], params.get("majorDimension", "ROWS"))
+                elif method == "POST" and path == prefix + ":batchUpdate":
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = sheet.batch_update(json.loads(self.rfile.read(length))["requests"])
+                else:
+                    self.send_json(404, {"error": {"code": 404, "message": f"Not found: {path}"}})
+                    return
+        except (KeyError, ValueError) as e:
+            self.send_json(400, {"error": {"code": 400, "message": str(e)}})
+            return
+        if fail:
+            # Carried out, but the client only sees the failure
+            self.send_failure()
+            return
+        self.send_json(200, body)
+
+    def do_GET(self):
+        self.handle_api("GET")
+
+    def do_POST(self):
+        self.handle_api("POST")
+
+
+class FakeSheetsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_every=0, fail_status=429, verbose=False, lose_responses=False):
+        super().__init__(address, FakeSheetsHandler)
+        self.spreadsheet = FakeSpreadsheet()
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.lose_responses = lose_responses
+        self.verbose = verbose
+        self.request_count = 0
+        self.failures = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def sheets_url(self):
+        return f"{self.base_url}/v4"
+
+    @property
+    def drive_url(self):
+        return f"{self.base_url}/drive/v3"
+
+    @property
+    def spreadsheet_id(self):
+        return self.spreadsheet.spreadsheet_id
+
+    def cells(self, title):
+        """Copy of a worksheet's cells: {(row, col): {"value", "format"}}, zero-based"""
+        with self.spreadsheet.lock:
+            cells = self.spreadsheet.sheets[self.spreadsheet.sheet_id(title)]["cells"]
+            return {key: dict(cell) for key, cell in cells.items()}
+
+
+def start_fake_server(host="127.0.0.1", port=0, **options):
+    """Start a FakeSheetsServer on a background thread; call .shutdown() when done"""
+    server = FakeSheetsServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local fake of the Google Sheets API for upload testing")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-every', type=int, default=0, metavar='N',
+                        help='Fail every Nth request (default: never)')
+    parser.add_argument('--fail-status', type=int, default=429, help='Status for injected failures (default: 429)')
+    parser.add_argument('--lose-responses', action='store_true',
+                        help='Carry out the failing requests before answering with the failure')
+    args = parser.parse_args(argv)
+
+    server = FakeSheetsServer((args.host, args.port), args.fail_every, args.fail_status, verbose=True,
+                              lose_responses=args.lose_responses)
+    print(f"Fake Sheets API on {server.base_url}")
+    print(f"  sheets_api_url: {server.sheets_url}")
+    print(f"  drive_api_url:  {server.drive_url}")
+    print(f"  spreadsheet_id: {server.spreadsheet_id}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Israeli holiday calendar for any year
+
+Holidays are computed from the Hebrew calendar (molad and postponement
+rules, as in Reingold & Dershowitz, "Calendrical Calculations") instead of
+a hardcoded list, and cached per year as a bitset over that year's shifts:
+bit (day_of_year - 1) * 2 + shift, with shift 0 = Day and 1 = Night.
+
+Local changes come from a JSON overrides file (default data/holidays.json):
+
+    {
+      "add": ["2026-12-31", "2027-01-01 Day"],
+      "remove": ["2026-09-30"]
+    }
+
+An entry without a shift covers both shifts of the day. The file is
+re-read whenever it changes.
+"""
+
+import functools
+import json
+import os
+from datetime import date, timedelta
+
+DEFAULT_HOLIDAYS_FILE = "data/holidays.json"
+
+# Shifts of a day, in slot order (matches SHIFT_NAMES in the scheduler)
+SHIFTS = ("Day", "Night")
+
+# R.D. (date.toordinal()) of 1 Tishrei AM 1
+HEBREW_EPOCH = -1373427
+# 15 Nisan is always this many days before the next 1 Tishrei
+PASSOVER_TO_NEW_YEAR = 163
+
+
+def hebrew_elapsed_days(hebrew_year):
+    """Days from the Hebrew epoch to the molad of Tishrei, with the Molad Zaken/ADU postponements"""
+    months = (235 * hebrew_year - 234) // 19
+    parts = 12084 + 13753 * months
+    days = 29 * months + parts // 25920
+    return days + 1 if (3 * (days + 1)) % 7 < 3 else days
+
+
+def hebrew_year_length_correction(hebrew_year):
+    """Extra postponement (GaTaRaD/BeTUTaKPaT) keeping year lengths valid"""
+    before, current, after = (hebrew_elapsed_days(hebrew_year + k) for k in (-1, 0, 1))
+    if after - current == 356:
+        return 2
+    if current - before == 382:
+        return 1
+    return 0
+
+
+def hebrew_new_year(hebrew_year):
+    """Gregorian date of Rosh Hashanah (1 Tishrei) of a Hebrew year"""
+    return date.fromordinal(HEBREW_EPOCH + hebrew_elapsed_days(hebrew_year)
+                            + hebrew_year_length_correction(hebrew_year))
+
+
+def independence_day_offset(iyar_5):
+    """Days to move Independence Day from 5 Iyar (Friday/Saturday -> Thursday, Monday -> Tuesday)"""
+    return {4: -1, 5: -2, 0: 1}.get(iyar_5.weekday(), 0)
+
+
+@functools.lru_cache(maxsize=None)
+def israeli_holidays(year):
+    """
+    Holidays falling in a Gregorian year that get special shifts
+
+    Returns:
+        Dict of datetime.date -> holiday name, in date order
+    """
+    new_year = hebrew_new_year(year + 3761)          # Tishrei of this autumn
+    passover = new_year - timedelta(days=PASSOVER_TO_NEW_YEAR)
+    iyar_5 = passover + timedelta(days=20)
+    independence = iyar_5 + timedelta(days=independence_day_offset(iyar_5))
+
+    holidays = [
+        (passover - timedelta(days=1), "Passover Eve"),
+        (passover, "Passover"),
+        (passover + timedelta(days=6), "Passover (seventh day)"),
+        (independence - timedelta(days=1), "Memorial Day"),
+        (independence, "Independence Day"),
+        (passover + timedelta(days=50), "Shavuot"),
+        (new_year, "Rosh Hashanah"),
+        (new_year + timedelta(days=1), "Rosh Hashanah"),
+        (new_year + timedelta(days=9), "Yom Kippur"),
+    ]
+    # Sukkot through Shemini Atzeret (15-22 Tishrei)
+    holidays.extend((new_year + timedelta(days=14 + k), "Sukkot") for k in range(8))
+    return dict(sorted(holidays))
+
+
+def year_slot(day, shift_index):
+    """Bit position of a shift within its year's bitset"""
+    return (day.timetuple().tm_yday - 1) * 2 + shift_index
+
+
+def parse_override(entry):
+    """'YYYY-MM-DD' or 'YYYY-MM-DD Day|Night' -> (date, shift indexes)"""
+    day, _, shift = entry.strip().partition(" ")
+    if shift and shift not in SHIFTS:
+        raise ValueError(f"Unknown shift '{shift}' in holiday override '{entry}' (expected Day or Night)")
+    return date.fromisoformat(day), [SHIFTS.index(shift)] if shift else range(len(SHIFTS))
+
+
+@functools.lru_cache(maxsize=None)
+def load_overrides(path, mtime):
+    """
+    Parse the overrides file (cached per path and modification time)
+
+    Returns:
+        (add, remove): dicts of year -> bitset of shifts
+    """
+    if mtime is None:
+        return {}, {}
+    with open(path) as f:
+        document = json.load(f)
+    result = []
+    for key in ("add", "remove"):
+        bits = {}
+        for entry in document.get(key, []):
+            day, shifts = parse_override(entry)
+            for shift in shifts:
+                bits[day.year] = bits.get(day.year, 0) | 1 << year_slot(day, shift)
+        result.append(bits)
+    return tuple(result)
+
+
+@functools.lru_cache(maxsize=None)
+def computed_holiday_slots(year):
+    """Bitset of the shifts of a year falling on computed holidays"""
+    bits = 0
+    for day in israeli_holidays(year):
+        for shift in range(len(SHIFTS)):
+            bits |= 1 << year_slot(day, shift)
+    return bits
+
+
+def holiday_slots(year, overrides_file=DEFAULT_HOLIDAYS_FILE):
+    """
+    Bitset of a year's holiday shifts, after local overrides
+
+    Test a shift with (holiday_slots(day.year) >> year_slot(day, shift)) & 1.
+    """
+    try:
+        mtime = os.stat(overrides_file).st_mtime_ns if overrides_file else None
+    except FileNotFoundError:
+        mtime = None
+    add, remove = load_overrides(overrides_file, mtime)
+    return (computed_holiday_slots(year) | add.get(year, 0)) & ~remove.get(year, 0)
@@ -0,0 +1,305 @@
+"""
+Schedule several on-call rotations in one run
+
+Every team has its own constraints file, developer colors and target
+worksheet, listed in teams.json (see teams.json.template):
+
+    {
+      "config": "config.json",
+      "requests_per_minute": 60,
+      "teams": [
+        {"name": "Backend", "constraints": "data/backend/constraints.json",
+         "worksheet_name": "Backend on call {year}",
+         "colors": {"Omer": {"red": 0.6, "green": 0.7, "blue": 0.9}}},
+        {"name": "Data", "constraints": "data/data-team/constraints.json"}
+      ]
+    }
+
+Teams are generated in parallel in a process pool. As soon as a team is
+done its upload starts on a thread of this process, and all uploads share
+one sheets_api.TokenBucket so together they stay under the Sheets
+per-minute quota. A run takes about as long as its slowest team.
+
+    python3 multi_team.py [--teams teams.json] [--seed N] [--no-excel] [--no-upload]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, redirect_stdout
+
+import on_call_scheduler_with_sheets as scheduler
+
+DEFAULT_TEAMS_FILE = "teams.json"
+TEAM_OPTIONS = ("name", "constraints", "colors", "worksheet_name", "output_dir",
+                "spreadsheet_id", "spreadsheet_name", "solver", "rest_rules", "shifts", "tiers")
+
+
+def load_teams(path=DEFAULT_TEAMS_FILE):
+    """
+    Read and validate the teams file
+
+    Each team gets defaults for what it leaves out: DEVELOPER_COLORS,
+    worksheet "<name> on call {year}" and output directory output/<name>.
+
+    Returns:
+        The parsed document, with teams filled in
+
+    Raises:
+        ValueError: If requests_per_minute/burst are not a valid rate
+            limit, a team is missing name/constraints, has an unknown
+            option, invalid rest_rules, shifts or tiers, a worksheet_name
+            without "{year}" (month blocks are told apart by the year's
+            worksheet), or two teams share a name or a worksheet
+    """
+    from sheets_api import SHEETS_REQUESTS_PER_MINUTE, RATE_LIMIT_BURST
+
+    with open(path) as f:
+        document = json.load(f)
+    per_minute = document.get("requests_per_minute", SHEETS_REQUESTS_PER_MINUTE)
+    burst = document.get("burst", RATE_LIMIT_BURST)
+    for key, value in (("requests_per_minute", per_minute), ("burst", burst)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            raise ValueError(f"'{key}' in {path} must be a positive number, got {value!r}")
+    if burst >= per_minute:
+        raise ValueError(f"'burst' in {path} ({burst}) must be below 'requests_per_minute' ({per_minute})")
+    teams = document.get("teams", [])
+    if not teams:
+        raise ValueError(f"No teams in {path}")
+    names, worksheets = set(), set()
+    for team in teams:
+        for key in ("name", "constraints"):
+            if not team.get(key):
+                raise ValueError(f"Every team in {path} needs a '{key}'")
+        unknown = set(team) - set(TEAM_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown option(s) for team '{team['name']}': {', '.join(sorted(unknown))}")
+        try:
+            scheduler.RestRules(**team.get("rest_rules", {}))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid rest_rules for team '{team['name']}': {e}") from None
+        try:
+            scheduler.shift_template(team.get("shifts", scheduler.SHIFT_NAMES))
+        except ValueError as e:
+            raise ValueError(f"Invalid shifts for team '{team['name']}': {e}") from None
+        tiers = team.get("tiers", 1)
+        if not isinstance(tiers, int) or tiers < 1:
+            raise ValueError(f"Team '{team['name']}' needs a positive whole number of tiers")
+        if tiers > 1 and team.get("solver", "greedy") != "greedy":
+            raise ValueError(f"Team '{team['name']}' has backup tiers, which need the greedy solver")
+        team.setdefault("colors", scheduler.DEVELOPER_COLORS)
+        team.setdefault("worksheet_name", f"{team['name']} on call {{year}}")
+        if "{year}" not in team["worksheet_name"]:
+            raise ValueError(f"worksheet_name of team '{team['name']}' needs a '{{year}}' placeholder")
+        team.setdefault("output_dir", os.path.join("output", team["name"]))
+        worksheet = (team.get("spreadsheet_id") or team.get("spreadsheet_name"), team["worksheet_name"])
+        if team["name"] in names or worksheet in worksheets:
+            raise ValueError(f"Team '{team['name']}' shares its name or worksheet with another team")
+        names.add(team["name"])
+        worksheets.add(worksheet)
+    return document
+
+
+def schedule_team(team, seed=None, excel=True):
+    """
+    Generate and export one team's schedule (runs in a pool process)
+
+    Returns:
+        Dict with month, year, month_name, rows, unfilled, seconds and
+        log (everything printed along the way)
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    with redirect_stdout(log):
+        shifts = scheduler.shift_template(team.get("shifts", scheduler.SHIFT_NAMES))
+        month, year, developers = scheduler.load_constraints(team["constraints"], shifts)
+        month_name = scheduler.MONTH_NAMES[month-1]
+        print(f"✓ Planning schedule for: {month_name} {year}")
+        rest_rules = scheduler.RestRules(**team.get("rest_rules", {}))
+        scheduler.print_feasibility(scheduler.feasibility_report(month, year, developers, shifts=shifts,
+                                                                 rest_rules=rest_rules))
+        schedule = scheduler.build_schedule(month, year, developers, seed=seed, solver=team.get("solver", "greedy"),
+                                            rest_rules=rest_rules, shifts=shifts, tiers=team.get("tiers", 1))
+        rows = scheduler.schedule_rows(schedule)
+
+        output_dir = team["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        scheduler.write_schedule_csv(rows, month_name, os.path.join(output_dir, "shift_schedule.csv"))
+        scheduler.write_summary_csv(schedule, os.path.join(output_dir, "shift_summary.csv"))
+        print(f"✓ Shift schedule written to {output_dir}")
+        if excel:
+            scheduler.create_excel_with_colors(rows, month_name, os.path.join(output_dir, "shift_schedule.xlsx"),
+                                               team["colors"])
+    return {
+        "month": month,
+        "year": year,
+        "month_name": month_name,
+        "rows": rows,
+        "unfilled": schedule["assignments"].count(None),
+        "seconds": time.perf_counter() - start,
+        "log": log.getvalue(),
+    }
+
+
+class ThreadOutput:
+    """
+    sys.stdout stand-in that keeps each capturing thread's output apart
+
+    Concurrent uploads print their progress; inside capture() a thread's
+    writes go to its own buffer, everything else to the real stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    @contextmanager
+    def capture(self):
+        self.local.buffer = io.StringIO()
+        try:
+            yield self.local.buffer
+        finally:
+            self.local.buffer = None
+
+
+def upload_team(team, result, config, rate_limiter, output, token_provider=None):
+    """
+    Upload one team's schedule (runs on an upload thread)
+
+    Returns:
+        (uploaded, seconds, log)
+    """
+    start = time.perf_counter()
+    team_config = dict(config)
+    for key in ("spreadsheet_id", "spreadsheet_name"):
+        if key in team:
+            team_config[key] = team[key]
+    with output.capture() as log:
+        uploaded = scheduler.upload_to_google_sheets(
+            result["rows"], team_config, result["year"], result["month_name"], token_provider=token_provider,
+            colors=team["colors"], worksheet_name=team["worksheet_name"].format(year=result["year"]),
+            rate_limiter=rate_limiter)
+    return uploaded, time.perf_counter() - start, log.getvalue()
+
+
+def run_teams(teams, config=None, seed=None, excel=True, workers=None, rate_limiter=None, token_provider=None):
+    """
+    Generate every team in a process pool and upload each as soon as it is ready
+
+    Args:
+        teams: Team dicts from load_teams()
+        config: Google Sheets config dict, or None to skip uploads
+        seed: Optional random seed used for every team
+        excel: Also write each team's XLSX
+        workers: Processes (default: one per team, at most one per core)
+        rate_limiter: sheets_api.TokenBucket shared by all uploads
+        token_provider: Optional access token callable (see upload_to_google_sheets())
+
+    Returns:
+        Dict of team name -> {"generated", "uploaded", "unfilled", "seconds"}
+    """
+    results = {team["name"]: {"generated": False, "uploaded": False, "unfilled": None, "seconds": 0.0}
+               for team in teams}
+    output = ThreadOutput(sys.stdout)
+    workers = workers or min(len(teams), os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers) as pool, ThreadPoolExecutor(len(teams)) as uploader, \
+            redirect_stdout(output):
+        generating = {pool.submit(schedule_team, team, seed, excel): team for team in teams}
+        uploading = {}
+        for future in as_completed(generating):
+            team = generating[future]
+            summary = results[team["name"]]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"✗ [{team['name']}] Generation failed: {e}")
+                continue
+            summary.update(generated=True, unfilled=result["unfilled"], seconds=result["seconds"])
+            print(f"\n{'='*60}\n[{team['name']}] generated in {result['seconds']:.2f}s\n{'='*60}")
+            print(result["log"], end="")
+            if config is not None:
+                uploading[uploader.submit(upload_team, team, result, config, rate_limiter, output,
+                                          token_provider)] = team
+        for future in as_completed(uploading):
+            team = uploading[future]
+            uploaded, seconds, log = future.result()
+            results[team["name"]]["uploaded"] = uploaded
+            results[team["name"]]["seconds"] += seconds
+            print(f"\n[{team['name']}] upload {'done' if uploaded else 'FAILED'} in {seconds:.2f}s")
+            print(log, end="")
+    return results
+
+
+def load_upload_config(path):
+    """Google Sheets config dict, or None (with a note) if missing or disabled"""
+    try:
+        with open(path) as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠ {path} not found. Skipping Google Sheets uploads.")
+        return None
+    if not config.get('upload_to_sheets', True):
+        print(f"ℹ️  Google Sheets upload is DISABLED in {path}")
+        return None
+    return config
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the on-call schedules of several teams in parallel")
+    parser.add_argument('--teams', default=DEFAULT_TEAMS_FILE,
+                        help=f'Teams file (default: {DEFAULT_TEAMS_FILE})')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for reproducible schedules')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for generation (default: one per team, up to all cores)')
+    parser.add_argument('--no-excel', action='store_true',
+                        help='Skip the XLSX exports')
+    parser.add_argument('--no-upload', action='store_true',
+                        help='Skip the Google Sheets uploads')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from sheets_api import SHEETS_REQUESTS_PER_MINUTE, RATE_LIMIT_BURST, TokenBucket
+
+    args = parse_args(argv)
+    try:
+        document = load_teams(args.teams)
+    except (OSError, ValueError) as e:
+        print(f"✗ Could not load teams: {e}")
+        return 1
+    teams = document["teams"]
+    config = None if args.no_upload else load_upload_config(document.get("config", "config.json"))
+    rate_limiter = TokenBucket(document.get("requests_per_minute", SHEETS_REQUESTS_PER_MINUTE),
+                               document.get("burst", RATE_LIMIT_BURST))
+
+    start = time.perf_counter()
+    results = run_teams(teams, config, seed=args.seed, excel=not args.no_excel, workers=args.workers,
+                        rate_limiter=rate_limiter)
+
+    print("\n" + "="*60)
+    print(f"✓ {len(teams)} team(s) in {time.perf_counter() - start:.2f}s")
+    for name, result in results.items():
+        status = "✓" if result["generated"] and (config is None or result["uploaded"]) else "✗"
+        unfilled = result["unfilled"] if result["unfilled"] is not None else "-"
+        print(f"  {status} {name}: {unfilled} unfilled, "
+              f"{'uploaded' if result['uploaded'] else 'not uploaded'}, {result['seconds']:.2f}s")
+    print("="*60)
+    failed = any(not r["generated"] or (config is not None and not r["uploaded"]) for r in results.values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,39 @@
-import pandas as pd
-from collections import defaultdict
-import random
-import json
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime
+"""
+On-call schedule generator with CSV, Excel and Google Sheets exporters.
+
+Can be used as a library:
+
+    from on_call_scheduler_with_sheets import load_constraints, build_schedule
+    month, year, developers = load_constraints()
+    schedule = build_schedule(month, year, developers, seed=42)
+
+or run as a script (this is what constraints-app/scheduler.js does):
+
+    python3 on_call_scheduler_with_sheets.py [--seed N] [--no-excel] [--no-upload]
+
+Importing this module has no side effects. Heavy optional backends (openpyxl,
+oauth2client) are only imported by the exporters that need them.
+"""
+
+import argparse
 import calendar
+import csv
+import hashlib
+import heapq
+import itertools
+import json
+import math
 import os
-from openpyxl import Workbook
-from openpyxl.styles import PatternFill, Alignment, Font
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import date as date_cls, datetime
+from functools import lru_cache
+
+from constraint_rules import HorizonMasks, invalid_restrictions
+from holiday_calendar import DEFAULT_HOLIDAYS_FILE, SHIFTS as HOLIDAY_SHIFTS, holiday_slots, year_slot
+from run_metrics import NO_METRICS, RunMetrics
 
 # Developer color mapping (RGB values 0-1 for Google Sheets API)
 DEVELOPER_COLORS = {
@@ -24,6 +49,63 @@ DEVELOPER_COLORS = {
     "Alex": {"red": 0.9, "green": 0.9, "blue": 0.6},           # Light yellow
 }
 
+# Spreadsheet opened when config.json has no spreadsheet_id (or spreadsheet_name)
+SPREADSHEET_NAME = "On Call Schedule"
+
+# Month names for display
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Column headers used by the CSV export (matches the Google Sheets template)
+SCHEDULE_COLUMNS = ['Day of Month', 'First Assignment', 'Second Assignment', 'Day of Week']
+SUMMARY_COLUMNS = ['Developer', 'Special Shifts', 'Night Shifts', 'Day Shifts']
+
+# Special shifts
+SPECIAL_SHIFTS = {"Friday Day", "Friday Night", "Saturday Day", "Saturday Night"}
+# Israeli holidays are computed per year by holiday_calendar.py; local
+# additions/removals go in data/holidays.json (see holidays.json.template)
+
+# Fallback month and developer restrictions (used when data/constraints.json is missing)
+DEFAULT_MONTH = 2
+DEFAULT_YEAR = 2026
+DEFAULT_DEVELOPERS = {
+    "Gabriel": [
+        "12/02 Day", "13/02 Night", "13/02 Day", "22/02 Day", "23/02 Night", "23/02 Day", "24/02 Night"
+    ],
+    "Shlomi": [],
+    "Yariv": [],
+    "Omer": [],
+    "Amit": [
+        "06/02 Day", "25/02 Day"
+    ],
+    "Ohad": [
+        "01/02 Day", "01/02 Night", "02/02 Day", "02/02 Night", "03/02 Day", "03/02 Night",
+        "04/02 Day", "04/02 Night", "17/02 Day", "17/02 Night", "18/02 Day", "18/02 Night"
+    ],
+    "Alex": [
+        "01/02 Night", "01/02 Day", "02/02 Day", "02/02 Night", "03/02 Day", "10/02 Day",
+        "17/02 Day", "24/02 Day", "27/02 Day", "27/02 Night", "28/02 Day", "28/02 Night"
+    ],
+    "Or": [
+        "02/02 Day", "05/02 Day", "06/02 Day", "06/02 Night", "07/02 Day", "07/02 Night",
+        "09/02 Day", "13/02 Day", "23/02 Day"
+    ],
+    "Hagay": [],
+    "Ivan": []
+}
+
+
+# ============================================================================
+# CONSTRAINTS
+# ============================================================================
+
+def next_month_and_year(now=None):
+    """Return (month, year) of the month following `now` (defaults to today)"""
+    now = now or datetime.now()
+    if now.month == 12:
+        return 1, now.year + 1
+    return now.month + 1, now.year
+
+
 # Load month/year and developer constraints from JSON file
 def load_data_from_json(json_file="data/constraints.json"):
     """Load month, year, and developer constraints from JSON file"""
@@ -32,15 +114,9 @@ def load_data_from_json(json_file="data/constraints.json"):
             data = json.load(f)
 
             # Get month and year (defaults to next month if not specified)
-            now = datetime.now()
-            next_month = datetime(now.year, now.month, 1)
-            if now.month == 12:
-                next_month = datetime(now.year + 1, 1, 1)
-            else:
-                next_month = datetime(now.year, now.month + 1, 1)
-
-            month = data.get("month", next_month.month)
-            year = data.get("year", next_month.year)
+            default_month, default_year = next_month_and_year()
+            month = data.get("month", default_month)
+            year = data.get("year", default_year)
 
             # Get developers and their restrictions
             developers = {}
@@ -52,519 +128,2457 @@ def load_data_from_json(json_file="data/constraints.json"):
         print(f"Warning: {json_file} not found. Using hardcoded constraints.")
         return None, None, None
 
-# Try to load from JSON
-month, year, developers = load_data_from_json()
-
-# Get month name for display
-month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-
-if month is None or year is None or developers is None:
-    # Fallback to hardcoded values
-    print("⚠️  Using hardcoded month and constraints")
-    month = 2
-    year = 2026
-
-else:
-    print(f"✓ Planning schedule for: {month_names[month-1]} {year}")
-
-if developers is None or not developers:
-    # Fallback: Developers and their restrictions (hardcoded)
-    developers = {
-        "Gabriel": [
-            "12/02 Day", "13/02 Night", "13/02 Day", "22/02 Day", "23/02 Night", "23/02 Day", "24/02 Night"
-        ],
-        "Shlomi": [],
-        "Yariv": [],
-        "Omer": [],
-        "Amit": [
-            "06/02 Day", "25/02 Day"
-        ],
-        "Ohad": [
-            "01/02 Day", "01/02 Night", "02/02 Day", "02/02 Night", "03/02 Day", "03/02 Night",
-            "04/02 Day", "04/02 Night", "17/02 Day", "17/02 Night", "18/02 Day", "18/02 Night"
-        ],
-        "Alex": [
-            "01/02 Night", "01/02 Day", "02/02 Day", "02/02 Night", "03/02 Day", "10/02 Day",
-            "17/02 Day", "24/02 Day", "27/02 Day", "27/02 Night", "28/02 Day", "28/02 Night"
-        ],
-        "Or": [
-            "02/02 Day", "05/02 Day", "06/02 Day", "06/02 Night", "07/02 Day", "07/02 Night",
-            "09/02 Day", "13/02 Day", "23/02 Day"
-        ],
-        "Hagay": [],
-        "Ivan": []
-    }
 
-# Generate all days of the month based on loaded month/year
-last_day = calendar.monthrange(year, month)[1]
-start_date = f"{year}-{month:02d}-01"
-end_date = f"{year}-{month:02d}-{last_day}"
+def load_constraints(json_file="data/constraints.json", shifts=None):
+    """
+    Load month, year and developer restrictions, falling back to the
+    hardcoded defaults when the JSON file is missing or has no developers
 
-print(f"📅 Generating schedule from {start_date} to {end_date}")
+    Invalid restrictions are reported and dropped here, once, so the
+    scheduler only ever sees valid rules. `shifts` is the shift template the
+    "DD/MM Shift" labels are checked against (default: SHIFT_NAMES).
 
-all_days = pd.date_range(start=start_date, end=end_date, freq="D")
-shifts_data = [
-    {"date": day.strftime("%d/%m"), "day_of_week": day.strftime("%A")}
-    for day in all_days
-]
+    Returns:
+        (month, year, developers) where developers maps name -> list of "DD/MM Shift"
+    """
+    month, year, developers = load_data_from_json(json_file)
 
-# Create two shifts (Day and Night) for each day
-expanded_shifts_data = []
-for day in shifts_data:
-    expanded_shifts_data.append({**day, "shift": "Day"})
-    expanded_shifts_data.append({**day, "shift": "Night"})
+    if month is None or year is None:
+        print("⚠️  Using hardcoded month and constraints")
+        month, year = DEFAULT_MONTH, DEFAULT_YEAR
 
-# Special shifts
-special_shifts = {"Friday Day", "Friday Night", "Saturday Day", "Saturday Night"}
-# Israeli holidays - add dates here in format "DD/MM" (e.g., "14/04" for April 14)
-events = {
-    # 2026 Israeli Holidays
-    "14/04 Day", "14/04 Night",  # Passover
-    "15/04 Day", "15/04 Night",  # Passover
-    "04/05 Day", "04/05 Night",  # Independence Day
-    "05/05 Day", "05/05 Night",  # Independence Day
-    "25/05 Day", "25/05 Night",  # Shavuot
-    "13/09 Day", "13/09 Night",  # Rosh Hashanah
-    "14/09 Day", "14/09 Night",  # Rosh Hashanah
-    "22/09 Day", "22/09 Night",  # Yom Kippur
-    "27/09 Day", "27/09 Night",  # Sukkot
-    "28/09 Day", "28/09 Night",
-    "29/09 Day", "29/09 Night",
-    "30/09 Day", "30/09 Night",
-    "01/10 Day", "01/10 Night",
-    "02/10 Day", "02/10 Night",
-    "03/10 Day", "03/10 Night",
-    "04/10 Day", "04/10 Night",  # Sukkot
-}
+    if not developers:
+        developers = {dev: list(restrictions) for dev, restrictions in DEFAULT_DEVELOPERS.items()}
+
+    problems = invalid_restrictions(developers, shifts or SHIFT_NAMES)
+    for dev, restriction, error in problems:
+        print(f"⚠️  Ignoring restriction of {dev}: {error}")
+    if problems:
+        bad = {(dev, restriction) for dev, restriction, _ in problems}
+        developers = {dev: [r for r in restrictions if (dev, r) not in bad]
+                      for dev, restrictions in developers.items()}
+
+    return month, year, developers
 
-# Convert to DataFrame
-shifts_df = pd.DataFrame(expanded_shifts_data)
 
-# Initialize assignment tracking
-assignments = defaultdict(list)
-developer_shift_count = defaultdict(lambda: {"special": 0, "night": 0, "day": 0})
+# ============================================================================
+# SCHEDULE GENERATION
+# ============================================================================
 
+# Shift type codes used by the slot table and the per-type counters
+SHIFT_TYPES = ("special", "night", "day")
+SPECIAL, NIGHT, DAY = 0, 1, 2
 
-# Calculate totals
-total_night_shifts = sum(1 for shift in expanded_shifts_data if shift["shift"] == "Night")
-total_special_shifts = sum(1 for shift in expanded_shifts_data if f'{shift["day_of_week"]} {shift["shift"]}' in special_shifts or f'{shift["date"]} {shift["shift"]}' in events)
+# Shifts of a day, in assignment order (the default shift template; see shift_template())
+SHIFT_NAMES = ("Day", "Night")
 
-developers_list = list(developers.keys())
-# Shuffle the list to prevent order bias
-random.shuffle(developers_list)
-night_shifts_per_dev = total_night_shifts // len(developers_list) +1
-special_shifts_per_dev = total_special_shifts // len(developers_list) +1
 
-remaining_night = total_night_shifts % len(developers_list)
-remaining_special = total_special_shifts % len(developers_list)
+def shift_template(names):
+    """
+    Validate a shift template: the names of a day's shifts, in order (e.g. 3x8h
+    "Morning", "Evening", "Night"). A shift named "Night" counts as a night shift.
 
+    Returns:
+        The names as a tuple
+
+    Raises:
+        ValueError: If the template is empty, repeats a name, or a name is
+            not a single word (restrictions are "DD/MM Shift" labels)
+    """
+    names = tuple(names)
+    if not names:
+        raise ValueError("A shift template needs at least one shift")
+    for name in names:
+        if not isinstance(name, str) or not name or name.split() != [name]:
+            raise ValueError(f"Shift names must be single words, got {name!r}")
+    if len(set(names)) != len(names):
+        raise ValueError(f"Shift names must be unique: {', '.join(names)}")
+    return names
+
+
+def tier_label(tier):
+    """Name of an on-call tier: "Primary", "Backup", "Backup 2", ..."""
+    if tier == 0:
+        return "Primary"
+    return "Backup" if tier == 1 else f"Backup {tier}"
+
+
+def horizon_days(month, year, months=1):
+    """Return every date from the 1st of month/year through the end of the last month"""
+    days = []
+    for offset in range(months):
+        m = (month - 1 + offset) % 12 + 1
+        y = year + (month - 1 + offset) // 12
+        last_day = calendar.monthrange(y, m)[1]
+        days.extend(date_cls(y, m, d) for d in range(1, last_day + 1))
+    return days
+
+
+# Weekdays of the SPECIAL_SHIFTS (Friday and Saturday)
+SPECIAL_WEEKDAYS = frozenset(list(calendar.day_name).index(label.split()[0]) for label in SPECIAL_SHIFTS)
+
+
+@lru_cache(maxsize=None)
+def special_weekly(shifts):
+    """
+    A shift template's weekend shifts as (weekday, shift index) pairs, e.g. "Friday Night" -> (4, 1)
 
-# Function to get the least assigned developer (prioritizing shift type balance)
-def get_least_assigned(shift_type, eligible_developers):
-    # Sort by specific shift type first, then by total shifts as tiebreaker
-    sorted_devs = sorted(
-        eligible_developers,
-        key=lambda dev: (developer_shift_count[dev][shift_type], sum(developer_shift_count[dev].values()))
+    Day/Night shifts are special as listed in SPECIAL_SHIFTS; shifts of
+    other names are special on every SPECIAL_WEEKDAYS day.
+    """
+    return frozenset(
+        (weekday, shift_index)
+        for weekday, day_name in enumerate(calendar.day_name)
+        for shift_index, shift in enumerate(shifts)
+        if f"{day_name} {shift}" in SPECIAL_SHIFTS or (shift not in SHIFT_NAMES and weekday in SPECIAL_WEEKDAYS)
     )
 
-    # If multiple developers have the same shift type count, randomly select among them
-    min_shift_type = developer_shift_count[sorted_devs[0]][shift_type]
-    tied_devs = [dev for dev in sorted_devs if developer_shift_count[dev][shift_type] == min_shift_type]
 
-    if len(tied_devs) > 1:
-        return random.choice(tied_devs)
-    else:
-        return sorted_devs[0]
+def get_shift_type(day, shift_index, holidays, shifts=SHIFT_NAMES):
+    """
+    Classify a shift as SPECIAL (weekend/holiday), NIGHT or DAY
 
-# Function to check if a developer can take a shift
-def can_assign(developer, date, shift, last_assigned):
-    # Check restrictions
-    if f"{date} {shift}" in developers[developer]:
-        return False
-    # Avoid consecutive assignments
-    if last_assigned and last_assigned == developer:
-        return False
-    if (f"{date} {shift}" in events or f"{day_of_week} {shift}" in special_shifts) and developer_shift_count[developer]["special"] >= special_shifts_per_dev:
-        return False
-    if shift == "Night" and developer_shift_count[developer]["night"] >= night_shifts_per_dev:
-        return False
-    return True
-
-
-# Assign shifts
-last_assigned = None
-assigned_shifts = []
-for _, row in shifts_df.iterrows():
-    date, shift, day_of_week = row["date"], row["shift"], row["day_of_week"]
-    shift_type = "special" if (f"{day_of_week} {shift}" in special_shifts) or ( f"{date} {shift}" in events) else ("night" if shift == "Night" else "day")
-    eligible_developers = [
-        dev for dev in developers_list
-        if can_assign(dev, date, shift, last_assigned)
+    Holidays are kept per Day/Night shift (see holiday_calendar.py); a
+    template shift of another name is a holiday if either of them is.
+
+    Args:
+        day: datetime.date of the shift
+        shift_index: Index into shifts
+        holidays: holiday_slots(day.year) bitset
+        shifts: Shift template (see shift_template())
+    """
+    if (day.weekday(), shift_index) in special_weekly(shifts):
+        return SPECIAL
+    name = shifts[shift_index]
+    holiday_shifts = [HOLIDAY_SHIFTS.index(name)] if name in HOLIDAY_SHIFTS else range(len(HOLIDAY_SHIFTS))
+    if any((holidays >> year_slot(day, holiday_shift)) & 1 for holiday_shift in holiday_shifts):
+        return SPECIAL
+    return NIGHT if name == "Night" else DAY
+
+
+def build_slot_table(days, holidays_file=DEFAULT_HOLIDAYS_FILE, shifts=SHIFT_NAMES):
+    """
+    Precompute one slot per shift (every shift of the template, every day)
+
+    The table is column oriented: every per-slot field is a list indexed by
+    slot number, so the assignment loop never rebuilds strings or dicts.
+
+    Args:
+        days: List of datetime.date to cover (see horizon_days())
+        holidays_file: Holiday overrides file (see holiday_calendar.py)
+        shifts: Shift template (see shift_template()), Day/Night by default
+
+    Returns:
+        Dict with days and shifts (the template), and per-slot day (index
+        into days), date ("DD/MM"), day_of_week, shift (name) and type
+        (SPECIAL/NIGHT/DAY), plus index mapping "DD/MM Shift" labels to slot
+        numbers
+    """
+    shifts = tuple(shifts)
+    slots = {"days": days, "shifts": shifts, "day": [], "date": [], "day_of_week": [], "shift": [],
+             "type": bytearray(), "index": {}}
+    holidays = {}
+    for day_idx, day in enumerate(days):
+        date = day.strftime("%d/%m")
+        day_of_week = day.strftime("%A")
+        if day.year not in holidays:
+            holidays[day.year] = holiday_slots(day.year, holidays_file)
+        for shift_index, shift in enumerate(shifts):
+            # Labels have no year, so horizons longer than a year map to the first match
+            slots["index"].setdefault(f"{date} {shift}", len(slots["shift"]))
+            slots["day"].append(day_idx)
+            slots["date"].append(date)
+            slots["day_of_week"].append(day_of_week)
+            slots["shift"].append(shift)
+            slots["type"].append(get_shift_type(day, shift_index, holidays[day.year], shifts))
+    return slots
+
+
+def restriction_bitsets(slots, developers_list, developers):
+    """
+    Compile each developer's restrictions into a bitset over slot numbers
+
+    Restrictions are "DD/MM Shift" labels, dates, date ranges, day-of-month
+    ranges or weekly rules (see constraint_rules.py). Each distinct rule is
+    expanded once for the horizon and shared by every developer using it.
+    Days outside the slot table (e.g. left over from another month) are ignored.
+
+    Raises:
+        ValueError: If a restriction is not valid (see load_constraints())
+    """
+    horizon = HorizonMasks(slots["days"], slots["shifts"])
+    return [horizon.restriction_mask(developers[dev]) for dev in developers_list]
+
+
+def blocked_by_slot(restriction_masks, slot_count):
+    """Transpose per-developer restriction bitsets into per-slot bitsets over developer indices"""
+    blocked = [0] * slot_count
+    for dev_idx, mask in enumerate(restriction_masks):
+        dev_bit = 1 << dev_idx
+        while mask:
+            low = mask & -mask
+            blocked[low.bit_length() - 1] |= dev_bit
+            mask ^= low
+    return blocked
+
+
+def pick_developer(candidates, developer_count, rng):
+    """
+    Pick one developer index from a non-empty bitset, uniformly at random
+
+    Draws k below the number of candidates and returns the k-th set bit,
+    found by halving the bitset (O(log developer_count) popcounts) without
+    materializing the candidate list.
+    """
+    k = rng.randrange(candidates.bit_count())
+    offset = 0
+    while candidates.bit_length() > 64:
+        half = candidates.bit_length() // 2
+        low = candidates & ((1 << half) - 1)
+        below = low.bit_count()
+        if k < below:
+            candidates = low
+        else:
+            k -= below
+            candidates >>= half
+            offset += half
+    for _ in range(k):
+        candidates &= candidates - 1
+    return offset + (candidates & -candidates).bit_length() - 1
+
+
+def shift_caps(slots, developer_count):
+    """
+    Per-type caps on how many shifts one developer may take: (special, night, day)
+
+    Each cap is an even share plus one; day shifts are uncapped (None).
+    """
+    total_night_shifts = sum(1 for shift in slots["shift"] if shift == "Night")
+    total_special_shifts = slots["type"].count(SPECIAL)
+    night_shifts_per_dev = total_night_shifts // developer_count + 1
+    special_shifts_per_dev = total_special_shifts // developer_count + 1
+    return special_shifts_per_dev, night_shifts_per_dev, None
+
+
+def count_shifts(slots, assignments, developers):
+    """Count special/night/day shifts per developer from per-slot assignments"""
+    developer_shift_count = {dev: {name: 0 for name in SHIFT_TYPES} for dev in developers}
+    for slot, developer in enumerate(assignments):
+        if developer:
+            developer_shift_count[developer][SHIFT_TYPES[slots["type"][slot]]] += 1
+    return developer_shift_count
+
+
+def assign_greedy(slots, blocked, developer_count, caps, rng, initial=None, stats=None, rest_rules=None,
+                  tiers=1):
+    """
+    Assign shifts in order, each to an eligible developer with the fewest
+    shifts of its type (special/night/day)
+
+    Eligible means not restricted, allowed by the rest rules (by default: not
+    assigned to the previous shift; see RestWindow), and under the
+    special/night caps. `initial` optionally gives carried-over
+    [special, night, day] counts per developer index; they count towards
+    "fewest" but not towards this horizon's caps. If given, `stats` counts
+    slots_evaluated and eligibility_checks (every developer is checked for
+    every slot, as one bitset operation).
+
+    With tiers > 1 (a primary plus backups) every tier of a slot is filled
+    in the same pass: tiers have their own counts and caps, nobody holds two
+    tiers of one slot, and the rest rules count shifts of every tier. The
+    work is O(slots x tiers). Carried-over counts apply to the primary tier.
+
+    Returns:
+        One list per tier (primary first) with the assigned developer index
+        (or None) per slot
+    """
+    slot_types = slots["type"]
+    slot_shifts = slots["shift"]
+    special_shifts_per_dev, night_shifts_per_dev, _ = caps
+    all_devs = (1 << developer_count) - 1
+
+    # Per-tier, per-type buckets: buckets[k][t][c] is the bitset of developers
+    # holding exactly c shifts of type t in tier k
+    zero = [[0] * len(SHIFT_TYPES) for _ in range(developer_count)]
+    buckets = []
+    for tier in range(tiers):
+        counts = (initial or zero) if tier == 0 else zero
+        tier_buckets = []
+        for shift_type in range(len(SHIFT_TYPES)):
+            type_buckets = [0] * (max((row[shift_type] for row in counts), default=0) + 1)
+            for dev_idx, row in enumerate(counts):
+                type_buckets[row[shift_type]] |= 1 << dev_idx
+            tier_buckets.append(type_buckets)
+        buckets.append(tier_buckets)
+    horizon_counts = [[[0] * developer_count for _ in SHIFT_TYPES] for _ in range(tiers)]
+    night_capped = [0] * tiers
+    special_capped = [0] * tiers
+
+    window = RestWindow(rest_rules or DEFAULT_REST_RULES, slots, developer_count)
+    assigned = [[None] * len(slot_types) for _ in range(tiers)]
+    for slot in range(len(slot_types)):
+        shift_type = slot_types[slot]
+        free = all_devs & ~blocked[slot] & ~window.advance(slot)
+        night = slot_shifts[slot] == "Night"
+        for tier in range(tiers):
+            eligible = free
+            if shift_type == SPECIAL:
+                eligible &= ~special_capped[tier]
+            if night:
+                eligible &= ~night_capped[tier]
+            if not eligible:
+                continue
+
+            # Lowest bucket with an eligible developer holds the least assigned ones
+            type_buckets = buckets[tier][shift_type]
+            for count, members in enumerate(type_buckets):
+                candidates = members & eligible
+                if candidates:
+                    break
+            dev_idx = pick_developer(candidates, developer_count, rng)
+            dev_bit = 1 << dev_idx
+
+            type_buckets[count] ^= dev_bit
+            if count + 1 == len(type_buckets):
+                type_buckets.append(0)
+            type_buckets[count + 1] |= dev_bit
+            horizon_counts[tier][shift_type][dev_idx] += 1
+            count = horizon_counts[tier][shift_type][dev_idx]
+            if shift_type == SPECIAL and count >= special_shifts_per_dev:
+                special_capped[tier] |= dev_bit
+            elif shift_type == NIGHT and count >= night_shifts_per_dev:
+                night_capped[tier] |= dev_bit
+
+            assigned[tier][slot] = dev_idx
+            window.assign(slot, dev_idx)
+            free &= ~dev_bit
+
+    if stats is not None:
+        stats["slots_evaluated"] = stats.get("slots_evaluated", 0) + len(slot_types)
+        stats["eligibility_checks"] = stats.get("eligibility_checks", 0) + len(slot_types) * developer_count * tiers
+    return assigned
+
+
+# ============================================================================
+# REST RULES
+# ============================================================================
+
+# Length of the rolling window of RestRules.max_per_week
+REST_WEEK_DAYS = 7
+
+
+class RestRules(namedtuple("RestRules", "min_gap max_per_week weekend_every")):
+    """
+    Spacing rules between one developer's shifts
+
+    min_gap: Free slots required between two shifts of one developer (1, the
+        default, forbids back-to-back shifts; 2 also forbids Night-Day-Night)
+    max_per_week: At most this many shifts in any rolling REST_WEEK_DAYS days
+    weekend_every: At most one weekend (SPECIAL_SHIFTS) per this many weeks
+
+    Rules apply within the planned horizon; shifts of earlier months are not
+    looked at.
+
+    Raises:
+        ValueError: If a rule is not a whole number in range
+    """
+    __slots__ = ()
+
+    def __new__(cls, min_gap=1, max_per_week=None, weekend_every=None):
+        if not isinstance(min_gap, int) or min_gap < 0:
+            raise ValueError(f"min_gap must be a whole number >= 0, got {min_gap!r}")
+        for name, value in (("max_per_week", max_per_week), ("weekend_every", weekend_every)):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"{name} must be a whole number >= 1, got {value!r}")
+        return super().__new__(cls, min_gap, max_per_week, weekend_every)
+
+
+DEFAULT_REST_RULES = RestRules()
+
+
+def weekend_weeks(slots):
+    """Week number (Monday-based) of every weekend slot, -1 for other slots"""
+    shifts = slots["shifts"]
+    weekend_shifts = special_weekly(shifts)
+    weeks = []
+    for slot, day_idx in enumerate(slots["day"]):
+        day = slots["days"][day_idx]
+        weekend = (day.weekday(), slot % len(shifts)) in weekend_shifts
+        weeks.append((day.toordinal() - 1) // 7 if weekend else -1)
+    return weeks
+
+
+class RestWindow:
+    """
+    Sliding-window counters of the rest rules, for assigning slots in order
+
+    For every slot, advance(slot) returns the bitset of developers the rules
+    exclude from it, then assign(slot, dev_idx) records who took it (once
+    per tier filled). Both are O(1) per slot and tier: a shift leaving a
+    window is removed from its bitset or counter as the next slot is
+    reached, instead of rescanning the window, so the cost does not grow
+    with the horizon or the team.
+    """
+
+    def __init__(self, rules, slots, developer_count):
+        self.gap = rules.min_gap
+        self.recent = 0  # developers holding one of the last `gap` slots
+        self.max_per_week = rules.max_per_week
+        self.week_slots = REST_WEEK_DAYS * len(slots["shifts"])
+        self.week_counts = [0] * developer_count
+        self.week_full = 0  # developers with max_per_week shifts in the window
+        self.weekend_every = rules.weekend_every
+        self.weeks = weekend_weeks(slots) if rules.weekend_every else None
+        self.weekend_workers = {}  # week -> developers who worked that weekend
+        self.weekend_week = None
+        self.weekend_blocked = 0  # developers who worked one of the last weekend_every - 1 weekends
+        self.held = [0] * len(slots["type"])  # developers holding each slot (any tier)
+
+    def advance(self, slot):
+        """Slide the windows to `slot` and return the developers excluded from it"""
+        held = self.held
+        if self.gap:
+            leaving = slot - self.gap - 1
+            if leaving >= 0:
+                # Nobody holds two slots within the gap, so this removes exactly that slot's holders
+                self.recent ^= held[leaving]
+        excluded = self.recent
+
+        if self.max_per_week:
+            leaving = slot - self.week_slots
+            holders = held[leaving] if leaving >= 0 else 0
+            while holders:
+                low = holders & -holders
+                holders ^= low
+                dev_idx = low.bit_length() - 1
+                self.week_counts[dev_idx] -= 1
+                if self.week_counts[dev_idx] == self.max_per_week - 1:
+                    self.week_full ^= low
+            excluded |= self.week_full
+
+        if self.weekend_every:
+            week = self.weeks[slot]
+            if week >= 0:
+                if week != self.weekend_week:
+                    # Once per weekend: combine the weekends still inside the rule's range
+                    self.weekend_week = week
+                    self.weekend_blocked = 0
+                    for earlier in range(week - self.weekend_every + 1, week):
+                        self.weekend_blocked |= self.weekend_workers.get(earlier, 0)
+                excluded |= self.weekend_blocked
+        return excluded
+
+    def assign(self, slot, dev_idx):
+        """Record that dev_idx took `slot` (call after advance(slot))"""
+        dev_bit = 1 << dev_idx
+        self.held[slot] |= dev_bit
+        if self.gap:
+            self.recent |= dev_bit
+        if self.max_per_week:
+            self.week_counts[dev_idx] += 1
+            if self.week_counts[dev_idx] == self.max_per_week:
+                self.week_full |= dev_bit
+        if self.weekend_every:
+            week = self.weeks[slot]
+            if week >= 0:
+                self.weekend_workers[week] = self.weekend_workers.get(week, 0) | dev_bit
+
+
+class RestChecker:
+    """
+    Check single placements against the rest rules, in any order
+
+    Used where slots change one at a time (the optimal solver's ban loop,
+    local search and repair). allows() only scans the slots within reach of
+    the rules: O(min_gap + REST_WEEK_DAYS) per check, independent of the
+    horizon length.
+    """
+
+    def __init__(self, rules, slots):
+        self.gap = rules.min_gap
+        self.max_per_week = rules.max_per_week
+        self.week_slots = REST_WEEK_DAYS * len(slots["shifts"])
+        self.weekend_every = rules.weekend_every
+        self.weeks = weekend_weeks(slots) if rules.weekend_every else None
+        self.weekend_slots = {}
+        for slot, week in enumerate(self.weeks or ()):
+            if week >= 0:
+                self.weekend_slots.setdefault(week, []).append(slot)
+
+    def allows(self, assigned, slot, dev):
+        """
+        Whether dev may hold `slot` given the other slots of `assigned`
+
+        `assigned` holds one entry per slot (developer name or index, anything
+        comparable to dev); the entry of `slot` itself is ignored.
+        """
+        slot_count = len(assigned)
+        for other in range(max(0, slot - self.gap), min(slot_count, slot + self.gap + 1)):
+            if other != slot and assigned[other] == dev:
+                return False
+
+        if self.max_per_week:
+            # Every window of week_slots slots containing `slot`, slid one slot at a time
+            size = self.week_slots
+            low, high = max(0, slot - size + 1), min(slot_count, slot + size)
+            held = [assigned[other] == dev for other in range(low, high)]
+            held[slot - low] = False
+            count = sum(held[:size])
+            for start in range(low, slot + 1):
+                if start > low:
+                    count -= held[start - 1 - low]
+                    if start + size - 1 < high:
+                        count += held[start + size - 1 - low]
+                if count >= self.max_per_week:
+                    return False
+
+        if self.weekend_every:
+            week = self.weeks[slot]
+            if week >= 0:
+                for other_week in range(week - self.weekend_every + 1, week + self.weekend_every):
+                    if other_week != week:
+                        for other in self.weekend_slots.get(other_week, ()):
+                            if assigned[other] == dev:
+                                return False
+        return True
+
+
+# ============================================================================
+# OPTIMAL SOLVER (MIN-COST FLOW)
+# ============================================================================
+
+# Objective weights: every developer costs weight * count**2 per shift type
+# plus TOTAL_WEIGHT * total**2, so the cheapest schedule is the most balanced
+TYPE_WEIGHTS = (3, 2, 1)  # special, night, day
+TOTAL_WEIGHT = 2
+
+
+def min_cost_assignment(slot_types, blocked, developer_count, caps, initial=None, stats=None, slot_groups=None):
+    """
+    Exact min-cost max-flow assignment of slots to developers
+
+    Network: source -> slot -> (developer, shift type) -> developer -> sink.
+    Slot edges exist only for developers not blocked on that slot; the
+    (developer, type) -> developer edge is capped by the per-type cap and
+    costs weight * (2f + 1) for the next unit (the marginal cost of f**2),
+    and so does developer -> sink for the total. Solved by successive
+    shortest paths with Johnson potentials, augmenting every zero
+    reduced-cost path found after each Dijkstra pass. Carried-over counts in
+    `initial` shift the convex costs but not the caps. If given, `stats`
+    counts slot expansions (slots_evaluated) and slot -> developer edges
+    scanned (eligibility_checks).
+
+    With slot_groups (group per slot, see rest_groups()), each developer
+    can hold one slot per group: a capacity-1 (developer, group) gate that
+    closes the slot edges of the group's other slots while it is held. The
+    gates and the type caps do not nest, so no single network carries both
+    exactly; the gates only prune paths, and the solution is then optimal
+    for the edges left open rather than globally.
+
+    Returns:
+        List with the assigned developer index (or None) per slot
+    """
+    slot_count = len(slot_types)
+    all_devs = (1 << developer_count) - 1
+    eligible = []
+    for slot in range(slot_count):
+        mask = all_devs & ~blocked[slot]
+        eligible.append([d for d in range(developer_count) if mask >> d & 1])
+
+    # Node numbering: slots, then (developer, type) pairs, then developers, then source/sink
+    pair_base = slot_count
+    dev_base = pair_base + 3 * developer_count
+    source = dev_base + developer_count
+    sink = source + 1
+    node_count = sink + 1
+
+    assigned = [None] * slot_count
+    held = [set() for _ in range(3 * developer_count)]   # slots held per (developer, type)
+    pair_flow = [0] * (3 * developer_count)
+    dev_flow = [0] * developer_count
+    initial = initial or [[0] * 3 for _ in range(developer_count)]
+    pair_base_count = [count for row in initial for count in row]
+    dev_base_count = [sum(row) for row in initial]
+    caps = [cap if cap is not None else slot_count for cap in caps]
+    potential = [0] * node_count
+    gates = {}      # (developer, group) -> slot holding it
+    if stats is None:
+        stats = {}
+    stats.setdefault("slots_evaluated", 0)
+    stats.setdefault("eligibility_checks", 0)
+
+    def residual_edges(node):
+        """Yield (next node, cost) for every residual edge out of node"""
+        if node < pair_base:
+            # Any zero reduced-cost edge is optimal, so offer developers already on
+            # a neighboring slot last: this keeps back-to-back conflicts rare
+            shift_type = slot_types[node]
+            current = assigned[node]
+            neighbors = (assigned[node - 1] if node else None,
+                         assigned[node + 1] if node + 1 < slot_count else None)
+            candidates = eligible[node]
+            stats["slots_evaluated"] += 1
+            stats["eligibility_checks"] += len(candidates)
+            offset = node % len(candidates) if candidates else 0
+            group = slot_groups[node] if slot_groups else None
+            for dev in candidates[offset:] + candidates[:offset]:
+                if dev != current and dev not in neighbors and gates.get((dev, group), node) == node:
+                    yield pair_base + 3 * dev + shift_type, 0
+            for dev in dict.fromkeys(neighbors):
+                if (dev is not None and dev != current and not blocked[node] >> dev & 1
+                        and gates.get((dev, group), node) == node):
+                    yield pair_base + 3 * dev + shift_type, 0
+        elif node < dev_base:
+            pair = node - pair_base
+            for slot in list(held[pair]):
+                yield slot, 0
+            dev, shift_type = divmod(pair, 3)
+            flow = pair_flow[pair]
+            if flow < caps[shift_type]:
+                yield dev_base + dev, TYPE_WEIGHTS[shift_type] * (2 * (pair_base_count[pair] + flow) + 1)
+        elif node < source:
+            dev = node - dev_base
+            for shift_type in range(3):
+                pair = 3 * dev + shift_type
+                flow = pair_flow[pair]
+                if flow:
+                    yield pair_base + pair, -TYPE_WEIGHTS[shift_type] * (2 * (pair_base_count[pair] + flow) - 1)
+            yield sink, TOTAL_WEIGHT * (2 * (dev_base_count[dev] + dev_flow[dev]) + 1)
+        elif node == source:
+            for slot in range(slot_count):
+                if assigned[slot] is None:
+                    yield slot, 0
+
+    def shortest_paths():
+        """Dijkstra on reduced costs; update potentials, return False if the sink is unreachable"""
+        dist = [None] * node_count
+        dist[source] = 0
+        heap = [(0, source)]
+        done = [False] * node_count
+        while heap:
+            d, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == sink:
+                break
+            base = potential[node]
+            for nxt, cost in residual_edges(node):
+                nd = d + cost + base - potential[nxt]
+                if dist[nxt] is None or nd < dist[nxt]:
+                    dist[nxt] = nd
+                    heapq.heappush(heap, (nd, nxt))
+        if not done[sink]:
+            return False
+        limit = dist[sink]
+        for node in range(node_count):
+            potential[node] += limit if dist[node] is None or dist[node] > limit else dist[node]
+        return True
+
+    def apply(path):
+        """Push one unit along a source -> sink path"""
+        for node, nxt in zip(path, path[1:]):
+            if node < pair_base:
+                assigned[node] = (nxt - pair_base) // 3
+                held[nxt - pair_base].add(node)
+                if slot_groups:
+                    gates.setdefault((assigned[node], slot_groups[node]), node)
+            elif node < dev_base:
+                if nxt < pair_base:
+                    held[node - pair_base].discard(nxt)
+                    if slot_groups and gates.get((assigned[nxt], slot_groups[nxt])) == nxt:
+                        del gates[assigned[nxt], slot_groups[nxt]]
+                    assigned[nxt] = None
+                else:
+                    pair_flow[node - pair_base] += 1
+            elif node < source:
+                if nxt == sink:
+                    dev_flow[node - dev_base] += 1
+                else:
+                    pair_flow[nxt - pair_base] -= 1
+
+    def augment_admissible():
+        """
+        Augment along zero reduced-cost paths until none is left (iterative DFS)
+
+        Returns:
+            Number of paths augmented
+        """
+        dead = [False] * node_count
+        augmented = 0
+        while True:
+            on_path = [False] * node_count
+            path = [source]
+            iterators = [residual_edges(source)]
+            on_path[source] = True
+            while path and path[-1] != sink:
+                node = path[-1]
+                for nxt, cost in iterators[-1]:
+                    if not dead[nxt] and not on_path[nxt] and cost + potential[node] == potential[nxt]:
+                        path.append(nxt)
+                        iterators.append(residual_edges(nxt))
+                        on_path[nxt] = True
+                        break
+                else:
+                    dead[node] = True
+                    path.pop()
+                    iterators.pop()
+            if not path:
+                return augmented
+            apply(path)
+            augmented += 1
+
+    # Gates reopening edges can leave the potentials without a tight path: stop there
+    while shortest_paths() and augment_admissible():
+        pass
+    return assigned
+
+
+def assign_optimal(slots, blocked, developer_count, caps, initial=None, stats=None, rest_rules=None):
+    """
+    Assign shifts with min_cost_assignment(), then enforce the rest rules
+
+    The minimum gap goes into the flow as capacity-1 gates over runs of
+    min_gap + 1 consecutive shifts (rest_groups()), which leaves only pairs
+    straddling two runs to fix. The other rules cannot be expressed as flow
+    capacities, so whenever the flow gives a developer a slot the rules
+    forbid, that developer is banned from it and the flow is solved again.
+    For two shifts too close together the ban goes to the slot with more
+    alternatives. Bans only accumulate, so this terminates; in practice it
+    takes a couple of rounds. Since bans are per slot they can over-constrain,
+    so slots they left empty are finally refilled one at a time with the
+    allowed developer whose marginal cost (including carried-over counts)
+    is lowest.
+
+    Returns:
+        List with the assigned developer index (or None) per slot
+    """
+    slot_count = len(slots["type"])
+    all_devs = (1 << developer_count) - 1
+    checker = RestChecker(rest_rules or DEFAULT_REST_RULES, slots)
+    slot_groups = rest_groups(slots, checker.gap)[0] if checker.gap else None
+    banned = list(blocked)
+
+    def choices(slot):
+        return (all_devs & ~banned[slot]).bit_count()
+
+    while True:
+        assigned = min_cost_assignment(slots["type"], banned, developer_count, caps, initial, stats, slot_groups)
+        conflicts = False
+        for slot in range(slot_count):
+            dev = assigned[slot]
+            if dev is None or checker.allows(assigned, slot, dev):
+                continue
+            conflicts = True
+            target = slot
+            for other in range(slot + 1, min(slot_count, slot + checker.gap + 1)):
+                if assigned[other] == dev:
+                    if choices(other) > choices(slot):
+                        target = other
+                    break
+            banned[target] |= 1 << dev
+            # The banned shift no longer counts against this developer's other shifts
+            assigned[target] = None
+        if not conflicts:
+            break
+
+    slot_types = slots["type"]
+    counts = [list(row) for row in initial] if initial else [[0] * 3 for _ in range(developer_count)]
+    added = [[0] * 3 for _ in range(developer_count)]
+    for slot, dev in enumerate(assigned):
+        if dev is not None:
+            counts[dev][slot_types[slot]] += 1
+            added[dev][slot_types[slot]] += 1
+
+    def marginal_cost(dev, shift_type):
+        return (TYPE_WEIGHTS[shift_type] * (2 * counts[dev][shift_type] + 1)
+                + TOTAL_WEIGHT * (2 * sum(counts[dev]) + 1))
+
+    for slot in range(slot_count):
+        if assigned[slot] is not None:
+            continue
+        shift_type = slot_types[slot]
+        cap = caps[shift_type]
+        free = all_devs & ~blocked[slot]
+        candidates = [dev for dev in range(developer_count)
+                      if free >> dev & 1 and (cap is None or added[dev][shift_type] < cap)
+                      and checker.allows(assigned, slot, dev)]
+        if candidates:
+            dev = min(candidates, key=lambda d: marginal_cost(d, shift_type))
+            assigned[slot] = dev
+            counts[dev][shift_type] += 1
+            added[dev][shift_type] += 1
+    return assigned
+
+
+# ============================================================================
+# FEASIBILITY CHECK
+# ============================================================================
+
+class CoverageMatching:
+    """
+    Bipartite b-matching of slots to developers under one per-developer limit
+
+    Every slot belongs to a resource group and a developer may take at most
+    capacity[group] slots of each group: with the slot's day as the group and
+    capacity 1 this is the back-to-back rule for Day/Night of one date, with
+    the shift type as the group it is the special/night caps. Slots only ever
+    trade places with slots of their own group, so augmenting paths are short
+    and every step is a bitset operation over developers. A slot the maximum
+    matching leaves uncovered cannot be covered by any schedule.
+    """
+
+    def __init__(self, slot_groups, eligible, developer_count, capacity):
+        self.slot_groups = slot_groups
+        self.eligible = eligible
+        self.capacity = capacity
+        all_devs = (1 << developer_count) - 1
+        self.free = [all_devs if cap > 0 else 0 for cap in capacity]
+        self.holder = [None] * len(eligible)
+        self.held = {}      # (developer, group) -> slots
+        self.covered = [bool(mask) and self.augment(slot) for slot, mask in enumerate(eligible)]
+
+    def search(self, start):
+        """
+        Breadth-first search for a developer with spare capacity
+
+        Returns:
+            (parent, end) where parent maps each reached slot to (slot,
+            developer) it would take over from, and end is (slot, free
+            developer) or None when the search is exhausted
+        """
+        group = self.slot_groups[start]
+        parent = {start: None}
+        seen = 0
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for slot in frontier:
+                candidates = self.eligible[slot] & ~seen
+                if not candidates:
+                    continue
+                seen |= candidates
+                free = candidates & self.free[group]
+                if free:
+                    return parent, (slot, (free & -free).bit_length() - 1)
+                while candidates:
+                    low = candidates & -candidates
+                    candidates ^= low
+                    dev = low.bit_length() - 1
+                    for other in self.held[dev, group]:
+                        if other not in parent:
+                            parent[other] = (slot, dev)
+                            next_frontier.append(other)
+            frontier = next_frontier
+        return parent, None
+
+    def augment(self, slot):
+        """Cover one more slot, moving covered slots of its group along the way"""
+        parent, end = self.search(slot)
+        if end is None:
+            return False
+        group = self.slot_groups[slot]
+        slot, dev = end
+        held = self.held.setdefault((dev, group), [])
+        if len(held) + 1 >= self.capacity[group]:
+            self.free[group] &= ~(1 << dev)
+        while True:
+            if self.holder[slot] is not None:
+                self.held[self.holder[slot], group].remove(slot)
+            self.holder[slot] = dev
+            self.held.setdefault((dev, group), []).append(slot)
+            if parent[slot] is None:
+                return True
+            slot, dev = parent[slot]
+
+    def deficient_groups(self):
+        """
+        Group the uncovered slots into Hall violators
+
+        The slots an uncovered slot can reach by alternating paths all compete
+        for the same developers, and every one of those developers is at
+        capacity: together these slots need more shifts than they can give.
+
+        Returns:
+            List of dicts with slots (the whole set), uncovered (the ones
+            left empty) and developers (indices that could take any of them)
+        """
+        groups = []
+        for slot, covered in enumerate(self.covered):
+            if covered or not self.eligible[slot]:
+                continue
+            reached = set(self.search(slot)[0])
+            for group in groups:
+                if group["slots"] & reached:
+                    group["slots"] |= reached
+                    group["uncovered"].append(slot)
+                    break
+            else:
+                groups.append({"slots": reached, "uncovered": [slot]})
+        for group in groups:
+            developers = 0
+            for slot in group["slots"]:
+                developers |= self.eligible[slot]
+            group["slots"] = sorted(group["slots"])
+            group["developers"] = [dev for dev in range(developers.bit_length()) if developers >> dev & 1]
+        return groups
+
+
+def rest_groups(slots, min_gap):
+    """
+    Partition the slots into runs of min_gap + 1 consecutive shifts, which
+    need as many different developers
+
+    Runs start at each day's first shift while they fit in a day (Day/Night
+    with the default gap: one run per date); longer runs span days.
+
+    Returns:
+        (group per slot, group count)
+    """
+    size = min_gap + 1
+    width = len(slots["shifts"])
+    slot_count = len(slots["type"])
+    if size > width:
+        return [slot // size for slot in range(slot_count)], -(-slot_count // size)
+    per_day = -(-width // size)
+    return ([slots["day"][slot] * per_day + (slot % width) // size for slot in range(slot_count)],
+            len(slots["days"]) * per_day)
+
+
+def check_feasibility(slots, blocked, developer_count, caps, rest_rules=None):
+    """
+    Find the shifts no schedule can cover, and why
+
+    A Hall-condition check per rule: slots nobody is free for (restrictions),
+    then a CoverageMatching per run of consecutive slots within the rest gap
+    (back-to-back, see rest_groups(); skipped with a gap of 0) and per shift
+    type (caps). Each rule is checked exactly on its own, so everything
+    reported is truly uncoverable; rules can still interact to leave a few
+    more holes (weekly and weekend limits are not checked here), which the
+    solvers then report as unfilled.
+
+    Args:
+        rest_rules: RestRules the schedule must keep (default: DEFAULT_REST_RULES)
+
+    Returns:
+        List of deficient groups (see CoverageMatching.deficient_groups()),
+        each with its cause: "restrictions", "back-to-back" or "caps";
+        empty when the check finds nothing
+    """
+    all_devs = (1 << developer_count) - 1
+    eligible = [all_devs & ~mask for mask in blocked]
+    groups = [{"cause": "restrictions", "slots": [slot], "uncovered": [slot], "developers": []}
+              for slot, mask in enumerate(eligible) if not mask]
+    slot_count = len(eligible)
+    checks = [("caps", slots["type"], [cap if cap is not None else slot_count for cap in caps])]
+    min_gap = (rest_rules or DEFAULT_REST_RULES).min_gap
+    if min_gap:
+        slot_groups, group_count = rest_groups(slots, min_gap)
+        checks.insert(0, ("back-to-back", slot_groups, [1] * group_count))
+    for cause, slot_groups, capacity in checks:
+        for group in CoverageMatching(slot_groups, eligible, developer_count, capacity).deficient_groups():
+            group["cause"] = cause
+            groups.append(group)
+    return groups
+
+
+def uncoverable_count(uncovered):
+    """
+    Lower bound on the shifts no schedule can cover
+
+    Args:
+        uncovered: Dict of cause -> uncovered slot count from check_feasibility() groups
+    """
+    # The per-day and per-type checks can flag the same shifts
+    return uncovered.get("restrictions", 0) + max(uncovered.get("back-to-back", 0), uncovered.get("caps", 0))
+
+
+def feasibility_report(month, year, developers, months=1, holidays_file=DEFAULT_HOLIDAYS_FILE, shifts=SHIFT_NAMES,
+                       rest_rules=None):
+    """
+    Check whether every shift of the horizon can be covered, before assigning
+
+    Cheap enough (milliseconds for a team) to run on every edit in the
+    constraints app. Invalid restrictions are reported and left out. With
+    several tiers this checks the primary one.
+
+    Args:
+        month, year, months, holidays_file, shifts: The horizon, as for build_schedule()
+        developers: Dict of developer name -> list of restrictions
+        rest_rules: RestRules of the schedule (default: DEFAULT_REST_RULES)
+
+    Returns:
+        Dict with feasible, slots (shift count), uncovered (how many shifts
+        cannot be covered, at least), invalid ([{developer, restriction,
+        error}]) and problems: one per group of shifts competing for too few
+        developers, with cause, uncovered and shifts ("DD/MM Shift" labels),
+        available (developers who could take any of them), busy (why each of
+        those is used up) and restricted ({developer: [restrictions]} when
+        nobody is free)
+    """
+    invalid = invalid_restrictions(developers, shifts)
+    bad = {(dev, restriction) for dev, restriction, _ in invalid}
+    developers_list = list(developers)
+    valid = {dev: [r for r in developers[dev] if (dev, r) not in bad] for dev in developers_list}
+    slots = build_slot_table(horizon_days(month, year, months), holidays_file, shifts)
+    slot_count = len(slots["type"])
+    horizon = HorizonMasks(slots["days"], shifts)
+    blocked = blocked_by_slot([horizon.restriction_mask(valid[dev]) for dev in developers_list], slot_count)
+    caps = shift_caps(slots, len(developers_list)) if developers_list else (0, 0, None)
+
+    def label(slot):
+        return f"{slots['date'][slot]} {slots['shift'][slot]}"
+
+    problems = []
+    uncovered = {"restrictions": 0, "back-to-back": 0, "caps": 0}
+    for group in check_feasibility(slots, blocked, len(developers_list), caps, rest_rules):
+        cause = group["cause"]
+        uncovered[cause] += len(group["uncovered"])
+        names = [developers_list[dev] for dev in group["developers"]]
+        if cause == "back-to-back":
+            pair = group["slots"]
+            if slots["day"][pair[0]] == slots["day"][pair[-1]]:
+                where = slots["date"][pair[0]]
+            else:
+                where = " / ".join(label(slot) for slot in pair)
+            busy = [f"{name}: other shift of {where}" for name in names]
+        elif cause == "caps":
+            shift_type = slots["type"][group["slots"][0]]
+            busy = [f"{name}: {SHIFT_TYPES[shift_type]} cap {caps[shift_type]}" for name in names]
+        else:
+            busy = []
+        slot = group["slots"][0]
+        problems.append({
+            "cause": cause,
+            "uncovered": [label(slot) for slot in group["uncovered"]],
+            "shifts": [label(slot) for slot in group["slots"]],
+            "available": names,
+            "busy": busy,
+            "restricted": {dev: [r for r in valid[dev] if horizon.texts[r] >> slot & 1]
+                           for dev in developers_list} if cause == "restrictions" else {},
+        })
+    total = uncoverable_count(uncovered)
+    return {
+        "feasible": not total,
+        "slots": slot_count,
+        "uncovered": total,
+        "invalid": [{"developer": dev, "restriction": restriction, "error": error}
+                    for dev, restriction, error in invalid],
+        "problems": problems,
+    }
+
+
+def print_feasibility(report):
+    """Print feasibility_report() diagnostics"""
+    if report["feasible"]:
+        print(f"✓ Feasibility check: all {report['slots']} shifts can be covered")
+        return
+    print(f"⚠️  Feasibility check: at least {report['uncovered']} of {report['slots']} shifts cannot be covered")
+    for problem in report["problems"]:
+        print(f"   ✗ {', '.join(problem['uncovered'])} ({problem['cause']})")
+        if len(problem["shifts"]) > len(problem["uncovered"]):
+            print(f"     competing with: {', '.join(s for s in problem['shifts'] if s not in problem['uncovered'])}")
+        if problem["busy"]:
+            print(f"     available but used up: {'; '.join(problem['busy'])}")
+        if problem["restricted"]:
+            culprits = "; ".join(f"{dev} ({', '.join(texts)})" for dev, texts in problem["restricted"].items())
+            print(f"     restricted: {culprits}")
+
+
+# ============================================================================
+# SCHEDULE
+# ============================================================================
+
+def carried_counts(developers_list, carry_over):
+    """[special, night, day] carried-over counts per developer index (0 for unknown developers)"""
+    return [[carry_over.get(dev, {}).get(name, 0) for name in SHIFT_TYPES] for dev in developers_list]
+
+
+SOLVERS = ("greedy", "optimal")
+
+
+def build_schedule(month, year, developers, seed=None, months=1, solver="greedy", carry_over=None,
+                   metrics=NO_METRICS, holidays_file=DEFAULT_HOLIDAYS_FILE, slots=None, restriction_masks=None,
+                   rest_rules=DEFAULT_REST_RULES, shifts=SHIFT_NAMES, tiers=1):
+    """
+    Assign developers to every shift of the planning horizon
+
+    Args:
+        month: First month number (1-12)
+        year: Year of the first month (e.g., 2026)
+        developers: Dict of developer name -> list of "DD/MM Shift" restrictions
+        seed: Optional random seed for a reproducible schedule
+        months: Number of consecutive months to plan (default: 1)
+        solver: "greedy" (assign_greedy) or "optimal" (assign_optimal)
+        carry_over: Optional dict of developer -> {"special", "night", "day"}
+            counts from earlier months (see shift_history.carry_over_counts())
+        metrics: Optional RunMetrics for the slot_expansion/assignment phases
+        holidays_file: Holiday overrides file (see holiday_calendar.py)
+        slots: Optional build_slot_table() of this horizon, shared between
+            runs (months, holidays_file and shifts are then unused)
+        restriction_masks: Optional dict of developer -> restriction bitset
+            over those slots, compiled once (see scenarios.py)
+        rest_rules: RestRules spacing the shifts of one developer
+        shifts: Shift template (see shift_template()), Day/Night by default
+        tiers: People on call per shift: a primary plus tiers - 1 backups,
+            assigned jointly by the greedy solver
+
+    Returns:
+        Dict with month, year, seed, solver, carry_over, rest_rules, slots
+        (see build_slot_table()), assignments (primary developer name or
+        None per slot), developer_shift_count (this horizon only) and stats
+        (solver counters; see polish_optimal() for the optimal solver's). With tiers > 1 also tier_assignments (one such
+        list per tier, primary first) and tier_shift_count.
+
+    Raises:
+        ValueError: On an unknown solver, or tiers > 1 with the optimal solver
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}' (expected one of: {', '.join(SOLVERS)})")
+    if tiers > 1 and solver != "greedy":
+        raise ValueError("Backup tiers are only assigned by the greedy solver")
+
+    rng = random.Random(seed)
+    with metrics.phase("slot_expansion"):
+        if slots is None:
+            slots = build_slot_table(horizon_days(month, year, months), holidays_file, shifts)
+
+        developers_list = list(developers.keys())
+        # Shuffle the list to prevent order bias
+        rng.shuffle(developers_list)
+        developer_count = len(developers_list)
+        if restriction_masks is None:
+            masks = restriction_bitsets(slots, developers_list, developers)
+        else:
+            masks = [restriction_masks[dev] for dev in developers_list]
+        blocked = blocked_by_slot(masks, len(slots["type"]))
+        caps = shift_caps(slots, developer_count)
+        initial = carried_counts(developers_list, carry_over) if carry_over else None
+
+    stats = {}
+    with metrics.phase("assignment"):
+        if solver == "optimal":
+            assigned = [assign_optimal(slots, blocked, developer_count, caps, initial, stats, rest_rules)]
+            floor = assign_greedy(slots, blocked, developer_count, caps, rng, initial, None, rest_rules)[0]
+        else:
+            assigned = assign_greedy(slots, blocked, developer_count, caps, rng, initial, stats, rest_rules, tiers)
+
+    tier_assignments = [[developers_list[dev_idx] if dev_idx is not None else None for dev_idx in tier]
+                        for tier in assigned]
+    schedule = {
+        "month": month,
+        "year": year,
+        "seed": seed,
+        "solver": solver,
+        "carry_over": carry_over,
+        "rest_rules": rest_rules,
+        "slots": slots,
+        "assignments": tier_assignments[0],
+        "developer_shift_count": count_shifts(slots, tier_assignments[0], developers),
+        "stats": stats,
+    }
+    if tiers > 1:
+        schedule["tier_assignments"] = tier_assignments
+        schedule["tier_shift_count"] = [count_shifts(slots, tier, developers) for tier in tier_assignments]
+    if solver == "optimal":
+        with metrics.phase("polish"):
+            schedule = polish_optimal(schedule, developers,
+                                      [developers_list[dev] if dev is not None else None for dev in floor])
+    return schedule
+
+
+# Local search iterations after the optimal solver, for rest rules the flow cannot express
+OPTIMAL_POLISH_ITERATIONS = 20000
+
+
+def polish_optimal(schedule, developers, greedy_assignments):
+    """
+    Finish an optimal-solver schedule: local search, then a floor at greedy's score
+
+    The flow only carries the minimum gap; max_per_week and weekend_every
+    are enforced by bans, which can leave shifts empty. Those schedules get
+    OPTIMAL_POLISH_ITERATIONS of improve_schedule() (seeded, so still
+    reproducible). If a greedy pass over the same inputs still scores better
+    (score_key()), its assignments are used instead.
+
+    Returns:
+        The schedule, with stats polish (improve_schedule()'s counters) and
+        greedy_fallback added as they apply
+    """
+    rules = schedule["rest_rules"] or DEFAULT_REST_RULES
+    if rules.max_per_week or rules.weekend_every:
+        polished = improve_schedule(schedule, developers, iterations=OPTIMAL_POLISH_ITERATIONS)
+        improvement = polished.pop("improvement")
+        schedule = {**polished, "stats": {**schedule["stats"], "polish": improvement}}
+    greedy = {**schedule, "assignments": greedy_assignments,
+              "developer_shift_count": count_shifts(schedule["slots"], greedy_assignments, developers)}
+    if score_key(score_schedule(greedy)) < score_key(score_schedule(schedule)):
+        schedule = {**greedy, "stats": {**schedule["stats"], "greedy_fallback": True}}
+    return schedule
+
+
+def schedule_tiers(schedule):
+    """Per-tier assignment lists of a schedule, primary first (just assignments without backups)"""
+    return schedule.get("tier_assignments") or [schedule["assignments"]]
+
+
+def schedule_columns(shifts, tiers=1):
+    """
+    The developer columns of the exports: (shift index, tier, label) in order
+
+    Day/Night schedules keep the template's Night, Day column order; labels
+    are "<Shift> Shift", with the tier added when there are backups
+    (e.g. "Night Shift (Backup)").
+    """
+    order = (1, 0) if tuple(shifts) == SHIFT_NAMES else range(len(shifts))
+    return [(shift_index, tier, f"{shifts[shift_index]} Shift" + (f" ({tier_label(tier)})" if tiers > 1 else ""))
+            for shift_index in order for tier in range(tiers)]
+
+
+def iter_schedule_rows(schedule):
+    """
+    Stream one row per day straight from the slot table, in a single pass
+
+    Slots are in day order (one per template shift), so each row is read
+    off its day's slots; nothing else is built or copied on the way to the
+    exporters.
+
+    Yields:
+        Dicts with day_of_month, shifts (column label -> developer or None,
+        see schedule_columns()) and day_of_week
+    """
+    slots = schedule["slots"]
+    tiers = schedule_tiers(schedule)
+    width = len(slots["shifts"])
+    columns = [(tiers[tier], shift_index, label)
+               for shift_index, tier, label in schedule_columns(slots["shifts"], len(tiers))]
+    day_of_week = slots["day_of_week"]
+    for day_idx, day in enumerate(slots["days"]):
+        base = day_idx * width
+        yield {
+            "day_of_month": day.day,
+            "shifts": {label: assignments[base + shift_index] for assignments, shift_index, label in columns},
+            "day_of_week": day_of_week[base],
+        }
+
+
+def schedule_rows(schedule):
+    """
+    Combine assigned shifts into a single row per day
+
+    Returns:
+        List of dicts with day_of_month, shifts and day_of_week (see
+        iter_schedule_rows() to stream them instead)
+    """
+    return list(iter_schedule_rows(schedule))
+
+
+def month_rows(schedule):
+    """
+    Split the rows of a (possibly multi-month) schedule by calendar month
+
+    Only one month of rows is held at a time.
+
+    Yields:
+        (month_name, rows) per month, in order
+    """
+    days = schedule["slots"]["days"]
+    months = itertools.groupby(zip(days, iter_schedule_rows(schedule)),
+                               key=lambda pair: (pair[0].year, pair[0].month))
+    for (_, month), pairs in months:
+        yield MONTH_NAMES[month-1], [row for _, row in pairs]
+
+
+# ============================================================================
+# MULTI-START SEARCH
+# ============================================================================
+
+def score_schedule(schedule):
+    """
+    Score a schedule by fill rate and fairness spread
+
+    Returns:
+        Dict with unfilled (slot count), fill_rate (0-1) and spread: the
+        max - min shift count across developers per shift type and in total
+        (including carried-over counts)
+    """
+    assignments = schedule["assignments"]
+    unfilled = sum(1 for developer in assignments if developer is None)
+    carry_over = schedule.get("carry_over") or {}
+    counts = [
+        {name: count + carry_over.get(dev, {}).get(name, 0) for name, count in dev_counts.items()}
+        for dev, dev_counts in schedule["developer_shift_count"].items()
     ]
+    spread = {}
+    for name in SHIFT_TYPES + ("total",):
+        values = [sum(c.values()) if name == "total" else c[name] for c in counts] or [0]
+        spread[name] = max(values) - min(values)
+    return {
+        "unfilled": unfilled,
+        "fill_rate": 1 - unfilled / len(assignments) if assignments else 1.0,
+        "spread": spread,
+    }
+
 
-    if eligible_developers:
-        assigned_dev = get_least_assigned(shift_type, eligible_developers)
+def score_key(score):
+    """Sort key for scores: fewest unfilled slots, then the fairest spread (specials first)"""
+    spread = score["spread"]
+    return (score["unfilled"], spread["special"], spread["total"], spread["night"] + spread["day"])
+
+
+def run_attempt(attempt):
+    """Build and score one seeded attempt (process pool worker)"""
+    month, year, developers, seed, options = attempt
+    schedule = build_schedule(month, year, developers, seed=seed, **options)
+    return score_key(score_schedule(schedule)), seed
+
+
+def search_schedule(month, year, developers, attempts, seed=None, workers=None, **options):
+    """
+    Run seeded build_schedule() attempts across a process pool and keep the best
+
+    Attempt i uses seed + i, so the winning schedule can be reproduced with
+    build_schedule(..., seed=schedule["seed"]). Workers only return the score
+    and seed; the winner is rebuilt in this process. Ties go to the lowest seed.
+
+    Args:
+        month, year, developers: As for build_schedule()
+        attempts: Number of seeded attempts
+        seed: First seed (random if None)
+        workers: Process count (defaults to all cores; 1 runs in-process)
+        **options: Passed to build_schedule() (months, solver, carry_over, rest_rules)
+
+    Returns:
+        The best schedule, with its score and the number of attempts added
+    """
+    if seed is None:
+        seed = random.randrange(2**31)
+    jobs = [(month, year, developers, seed + i, options) for i in range(attempts)]
+    workers = min(workers or os.cpu_count() or 1, attempts)
+
+    if workers <= 1:
+        results = [run_attempt(job) for job in jobs]
     else:
-        assigned_dev = None
-
-    if assigned_dev:
-        developer_shift_count[assigned_dev][shift_type] += 1
-        last_assigned = assigned_dev
-
-    assigned_shifts.append({
-        "day_of_month": int(date.split("/")[0]),
-        "night_shift": assigned_dev if shift == "Night" else None,
-        "day_shift": assigned_dev if shift == "Day" else None,
-        "day_of_week": day_of_week
-    })
-
-# Combine assigned shifts into a single row per day
-final_assignments = []
-temp_row = {}
-for shift in assigned_shifts:
-    day_of_month = shift["day_of_month"]
-    if temp_row.get("day_of_month") != day_of_month:
-        if temp_row:
-            final_assignments.append(temp_row)
-        temp_row = {
-            "day_of_month": day_of_month,
-            "night_shift": None,
-            "day_shift": None,
-            "day_of_week": shift["day_of_week"]
-        }
-    if shift["night_shift"]:
-        temp_row["night_shift"] = shift["night_shift"]
-    if shift["day_shift"]:
-        temp_row["day_shift"] = shift["day_shift"]
-
-# Append the last row
-if temp_row:
-    final_assignments.append(temp_row)
-
-# Write to CSV
-final_df = pd.DataFrame(final_assignments)
-# Rename columns to match template format
-final_df = final_df.rename(columns={
-    'day_of_month': 'Day of Month',
-    'night_shift': 'First Assignment',
-    'day_shift': 'Second Assignment',
-    'day_of_week': 'Day of Week'
-})
-
-# Create output directory if it doesn't exist
-output_dir = "output"
-os.makedirs(output_dir, exist_ok=True)
-
-# Add month header row to match template format
-month_header = pd.DataFrame([[month_names[month-1], '', '', '']], columns=final_df.columns)
-final_df_with_header = pd.concat([month_header, final_df], ignore_index=True)
-
-# Define output file paths
-schedule_file = os.path.join(output_dir, "shift_schedule.csv")
-summary_file = os.path.join(output_dir, "shift_summary.csv")
-
-# Write schedule to CSV
-final_df_with_header.to_csv(schedule_file, index=False)
-
-# Print summary of shifts
-print("\nShift Summary:")
-summary_df = pd.DataFrame(developer_shift_count).T.reset_index()
-summary_df.columns = ["Developer", "Special Shifts", "Night Shifts", "Day Shifts"]
-print(summary_df)
-
-# Write summary to CSV
-summary_df.to_csv(summary_file, index=False)
-
-print(f"\n✓ Shift schedule written to {schedule_file}")
-print(f"✓ Shift summary written to {summary_file}")
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_attempt, jobs, chunksize=max(1, attempts // (workers * 4))))
+
+    _, best_seed = min(results)
+    schedule = build_schedule(month, year, developers, seed=best_seed, **options)
+    schedule["score"] = score_schedule(schedule)
+    schedule["attempts"] = attempts
+    return schedule
+
+
+# ============================================================================
+# LOCAL SEARCH
+# ============================================================================
+
+# Cost of leaving a slot empty, relative to the TYPE_WEIGHTS/TOTAL_WEIGHT fairness cost
+UNFILLED_PENALTY = 1000
+
+# Simulated annealing temperature range (in cost units)
+ANNEAL_START = 4.0
+ANNEAL_END = 0.05
+
+
+def improve_schedule(schedule, developers, iterations=200000, seconds=None, seed=None):
+    """
+    Improve a schedule with simulated annealing over moves and swaps
+
+    A move gives one slot to another developer (or fills an empty slot); a
+    swap exchanges the developers of two slots. Every candidate is checked
+    against the same rules as the solvers (restrictions, the schedule's rest
+    rules, per-type caps, with the night cap also on special "Night" shifts
+    as in assign_greedy()) and scored incrementally from the counters of the
+    two developers involved, so a move costs O(1) regardless of schedule
+    size (rest rules only look at the slots within their reach).
+    The cost is the optimal solver's objective (including carried-over
+    counts) plus UNFILLED_PENALTY per empty slot, and the best schedule seen
+    is returned.
+
+    Args:
+        schedule: Schedule from build_schedule()
+        developers: The developers dict the schedule was built from
+        iterations: Number of candidate moves to evaluate
+        seconds: Run for this long instead of a fixed number of iterations
+        seed: Random seed (defaults to the schedule's seed)
+
+    Returns:
+        New schedule dict with improved assignments and an "improvement"
+        entry (moves evaluated/accepted, cost before/after)
+
+    Raises:
+        ValueError: If the schedule has backup tiers
+    """
+    if "tier_assignments" in schedule:
+        raise ValueError("Local search only improves single-tier schedules")
+    rng = random.Random(schedule["seed"] if seed is None else seed)
+    slots = schedule["slots"]
+    slot_types = slots["type"]
+    slot_count = len(slot_types)
+    developers_list = list(developers)
+    dev_index = {dev: i for i, dev in enumerate(developers_list)}
+    developer_count = len(developers_list)
+
+    # Flat (developer, slot) restriction table for O(1) checks
+    restricted = bytearray(developer_count * slot_count)
+    for dev_idx, mask in enumerate(restriction_bitsets(slots, developers_list, developers)):
+        while mask:
+            low = mask & -mask
+            restricted[dev_idx * slot_count + low.bit_length() - 1] = 1
+            mask ^= low
+
+    caps = [cap if cap is not None else slot_count for cap in shift_caps(slots, developer_count)]
+    assigned = [dev_index[dev] if dev else -1 for dev in schedule["assignments"]]
+    checker = RestChecker(schedule.get("rest_rules") or DEFAULT_REST_RULES, slots)
+
+    # counts/totals include carried-over shifts; caps apply to this horizon only,
+    # so cap checks subtract the carried part (base)
+    base = [count for row in carried_counts(developers_list, schedule.get("carry_over") or {}) for count in row]
+    counts = base[:]
+    totals = [sum(base[3 * i:3 * i + 3]) for i in range(developer_count)]
+    caps = [[cap + base[3 * i + t] for t, cap in enumerate(caps)] for i in range(developer_count)]
+    # As in assign_greedy(), the night cap also keeps developers off special "Night" shifts
+    special_night = [t == SPECIAL and shift == "Night" for t, shift in zip(slot_types, slots["shift"])]
+    for slot, dev_idx in enumerate(assigned):
+        if dev_idx >= 0:
+            counts[3 * dev_idx + slot_types[slot]] += 1
+            totals[dev_idx] += 1
+
+    weights = TYPE_WEIGHTS
+    cost = UNFILLED_PENALTY * assigned.count(-1) + TOTAL_WEIGHT * sum(t * t for t in totals)
+    cost += sum(weights[i % 3] * c * c for i, c in enumerate(counts))
+    start_cost = best_cost = cost
+    best = assigned[:]
+
+    deadline = time.monotonic() + seconds if seconds else None
+    temperature = ANNEAL_START
+    evaluated = accepted = 0
+    while deadline or evaluated < iterations:
+        if evaluated & 4095 == 0:
+            if deadline:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                progress = 1 - remaining / seconds
+            else:
+                progress = evaluated / iterations
+            temperature = ANNEAL_START * (ANNEAL_END / ANNEAL_START) ** progress
+        evaluated += 1
+
+        slot = rng.randrange(slot_count)
+        a = assigned[slot]
+        t = slot_types[slot]
+        if a < 0 or rng.random() < 0.5:
+            # Move: give slot to developer b
+            b = rng.randrange(developer_count)
+            if b == a or restricted[b * slot_count + slot] or not checker.allows(assigned, slot, b):
+                continue
+            cb = counts[3 * b + t]
+            if cb >= caps[b][t] or (special_night[slot] and counts[3 * b + NIGHT] >= caps[b][NIGHT]):
+                continue
+            delta = weights[t] * (2 * cb + 1) + TOTAL_WEIGHT * (2 * totals[b] + 1)
+            if a >= 0:
+                delta -= weights[t] * (2 * counts[3 * a + t] - 1) + TOTAL_WEIGHT * (2 * totals[a] - 1)
+            else:
+                delta -= UNFILLED_PENALTY
+            if delta > 0 and rng.random() >= math.exp(-delta / temperature):
+                continue
+            assigned[slot] = b
+            counts[3 * b + t] += 1
+            totals[b] += 1
+            if a >= 0:
+                counts[3 * a + t] -= 1
+                totals[a] -= 1
+        else:
+            # Swap: a takes other slot, its developer b takes this one
+            other = rng.randrange(slot_count)
+            b = assigned[other]
+            if b < 0 or b == a:
+                continue
+            if restricted[a * slot_count + other] or restricted[b * slot_count + slot]:
+                continue
+            t2 = slot_types[other]
+            # Night counts once the two have traded their other slot
+            if special_night[slot] and not special_night[other] and \
+                    counts[3 * b + NIGHT] - (t2 == NIGHT) >= caps[b][NIGHT]:
+                continue
+            if special_night[other] and not special_night[slot] and \
+                    counts[3 * a + NIGHT] - (t == NIGHT) >= caps[a][NIGHT]:
+                continue
+            # Rest rules are checked against the swapped schedule, then it is restored
+            assigned[slot], assigned[other] = b, a
+            allowed = checker.allows(assigned, slot, b) and checker.allows(assigned, other, a)
+            assigned[slot], assigned[other] = a, b
+            if not allowed:
+                continue
+            delta = 0
+            if t2 != t:
+                ca, cb = counts[3 * a + t2], counts[3 * b + t]
+                if ca >= caps[a][t2] or cb >= caps[b][t]:
+                    continue
+                delta = (weights[t2] * (2 * ca + 1) - weights[t] * (2 * counts[3 * a + t] - 1) +
+                         weights[t] * (2 * cb + 1) - weights[t2] * (2 * counts[3 * b + t2] - 1))
+                if delta > 0 and rng.random() >= math.exp(-delta / temperature):
+                    continue
+                counts[3 * a + t] -= 1
+                counts[3 * a + t2] += 1
+                counts[3 * b + t2] -= 1
+                counts[3 * b + t] += 1
+            assigned[slot], assigned[other] = b, a
+
+        accepted += 1
+        cost += delta
+        if cost < best_cost:
+            best_cost = cost
+            best = assigned[:]
+
+    assignments = [developers_list[dev_idx] if dev_idx >= 0 else None for dev_idx in best]
+    return {
+        **schedule,
+        "assignments": assignments,
+        "developer_shift_count": count_shifts(slots, assignments, developers),
+        "improvement": {
+            "moves_evaluated": evaluated,
+            "moves_accepted": accepted,
+            "cost_before": start_cost,
+            "cost_after": best_cost,
+        },
+    }
+
+
+# ============================================================================
+# INCREMENTAL REPAIR
+# ============================================================================
+
+def repair_schedule(schedule, developers, window=7, changed=None):
+    """
+    Fix an existing schedule after constraints changed, touching as few slots as possible
+
+    Only slots that now break a restriction or a rest rule, belong to a
+    developer who is no longer on the team, or were left empty are
+    reassigned. Each one goes to the least loaded developer who can take it
+    (restrictions, the schedule's rest rules, caps); if nobody can, a
+    developer within `window` days is moved over and their slot refilled
+    instead.
+
+    Given `changed`, the work is proportional to the slots involved: shift
+    counts come from the schedule's developer_shift_count, only the changed
+    developers', departed developers' and empty slots are located (list
+    scans in C, no per-slot Python), only the changed developers'
+    restrictions are checked, and rest rules are only rechecked on their
+    slots and around the cleared ones. Other developers' restrictions are
+    compiled only when they are candidates for a slot. Each reassigned slot
+    pops developers from a per-shift-type heap, least loaded first, until
+    one can take it.
+
+    Args:
+        schedule: Schedule from build_schedule() or read_schedule_csv()
+        developers: Current developers dict (name -> restrictions)
+        window: How many days away a swap partner may be
+        changed: Developers whose restrictions changed since the schedule
+            was made, or None to recheck every developer and slot (e.g. a
+            schedule read back from CSV, or new rest rules)
+
+    Returns:
+        (repaired schedule, diff) where diff lists {"slot", "date", "shift",
+        "before", "after"} for every slot whose developer changed
+
+    Raises:
+        ValueError: If the schedule has backup tiers
+    """
+    if "tier_assignments" in schedule:
+        raise ValueError("Repair only works on single-tier schedules")
+    slots = schedule["slots"]
+    slot_types = slots["type"]
+    slot_count = len(slot_types)
+    width = len(slots["shifts"])
+    assignments = list(schedule["assignments"])
+    special_cap, night_cap, _ = shift_caps(slots, len(developers))
+    caps = (special_cap, night_cap, slot_count)
+    checker = RestChecker(schedule.get("rest_rules") or DEFAULT_REST_RULES, slots)
+    horizon = HorizonMasks(slots["days"], slots["shifts"])
+    recheck = set(developers) if changed is None else {dev for dev in changed if dev in developers}
+
+    restricted = {}
+
+    def restriction(dev):
+        if dev not in restricted:
+            restricted[dev] = horizon.restriction_mask(developers[dev])
+        return restricted[dev]
+
+    def slots_of(dev):
+        slot = -1
+        while True:
+            try:
+                slot = assignments.index(dev, slot + 1)
+            except ValueError:
+                return
+            yield slot
+
+    recorded = schedule.get("developer_shift_count") if changed is not None else None
+    if recorded is not None:
+        zero = dict.fromkeys(SHIFT_TYPES, 0)
+        counts = {dev: [c["special"], c["night"], c["day"]] for dev, c in
+                  ((dev, recorded.get(dev, zero)) for dev in developers)}
+        departed = {dev for dev in recorded if dev not in developers}
+    else:
+        counts = {dev: [0, 0, 0] for dev in developers}
+        for slot, dev in enumerate(assignments):
+            if dev in counts:
+                counts[dev][slot_types[slot]] += 1
+        departed = set(assignments) - set(developers) - {None}
+    conflicts = set()
+    rest_slots = set()
+    for dev in departed | {None}:
+        conflicts.update(slots_of(dev))
+    for dev in recheck:
+        for slot in slots_of(dev):
+            rest_slots.add(slot)
+            if restriction(dev) >> slot & 1:
+                conflicts.add(slot)
+
+    def can_take(dev, slot):
+        if restriction(dev) >> slot & 1 or not checker.allows(assignments, slot, dev):
+            return False
+        return counts[dev][slot_types[slot]] < caps[slot_types[slot]]
+
+    # Per shift type, a heap of (type count, total, team order, developer),
+    # built the first time a slot of that type is reassigned. Entries go
+    # stale when a count changes and are dropped when popped.
+    order = {dev: i for i, dev in enumerate(developers)}
+    heaps = [None, None, None]
+
+    def place(dev, slot):
+        previous = assignments[slot]
+        assignments[slot] = dev
+        for changed_dev, step in ((previous, -1), (dev, 1)):
+            if changed_dev in counts:
+                dev_counts = counts[changed_dev]
+                dev_counts[slot_types[slot]] += step
+                for t, heap in enumerate(heaps):
+                    if heap is not None:
+                        heapq.heappush(heap, (dev_counts[t], sum(dev_counts), order[changed_dev], changed_dev))
+
+    def least_loaded(slot):
+        # Least loaded first, so usually only a few developers are checked
+        heap = heaps[slot_types[slot]]
+        if heap is None:
+            t = slot_types[slot]
+            heap = heaps[t] = [(c[t], sum(c), order[dev], dev) for dev, c in counts.items()]
+            heapq.heapify(heap)
+        checked = []
+        found = None
+        while heap:
+            entry = heapq.heappop(heap)
+            type_count, total, _, dev = entry
+            if (type_count, total) != (counts[dev][slot_types[slot]], sum(counts[dev])) or dev in checked:
+                continue
+            checked.append(dev)
+            if can_take(dev, slot):
+                found = dev
+                break
+        for dev in checked:
+            heapq.heappush(heap, (counts[dev][slot_types[slot]], sum(counts[dev]), order[dev], dev))
+        return found
+
+    # Clear the conflicts first, then the shifts the rest rules reject against
+    # what remains (one shift of each pair that is too close). Given `changed`,
+    # the rest of the schedule is taken to keep its rules already, so only the
+    # changed developers' slots and the neighbourhoods of cleared slots are looked at.
+    for slot in conflicts:
+        place(None, slot)
+    if changed is None:
+        rest_slots = range(slot_count)
+    else:
+        reach = max(checker.gap, checker.week_slots if checker.max_per_week else 0)
+        for slot in conflicts:
+            rest_slots.update(range(max(0, slot - reach), min(slot_count, slot + reach + 1)))
+        rest_slots = sorted(rest_slots)
+    for slot in rest_slots:
+        dev = assignments[slot]
+        if dev is not None and not checker.allows(assignments, slot, dev):
+            place(None, slot)
+            conflicts.add(slot)
+
+    touched = set()
+    for slot in sorted(conflicts):
+        place(None, slot)
+        touched.add(slot)
+        dev = least_loaded(slot)
+        if dev is not None:
+            place(dev, slot)
+            continue
+
+        # Nobody is free: move a nearby developer over and refill their slot
+        nearby = sorted(range(max(0, slot - window * width), min(slot_count, slot + window * width + 1)),
+                        key=lambda other: abs(other - slot))
+        for other in nearby:
+            partner = assignments[other]
+            if other == slot or partner is None or partner not in counts:
+                continue
+            place(None, other)
+            if can_take(partner, slot):
+                place(partner, slot)
+                replacement = least_loaded(other)
+                if replacement is not None:
+                    place(replacement, other)
+                    touched.add(other)
+                    break
+                place(None, slot)
+            place(partner, other)
+
+    original = schedule["assignments"]
+    diff = [
+        {"slot": slot, "date": slots["date"][slot], "shift": slots["shift"][slot],
+         "before": original[slot], "after": assignments[slot]}
+        for slot in sorted(touched) if assignments[slot] != original[slot]
+    ]
+    repaired = {
+        **schedule,
+        "assignments": assignments,
+        "developer_shift_count": {dev: dict(zip(SHIFT_TYPES, counts[dev])) for dev in developers},
+    }
+    return repaired, diff
+
+
+def read_schedule_csv(path, month, year, holidays_file=DEFAULT_HOLIDAYS_FILE, shifts=SHIFT_NAMES):
+    """
+    Load a single-tier schedule written by write_schedule_csv() back into a schedule dict
+
+    Raises:
+        ValueError: If the CSV's month header is not month, or its columns
+            are not the shifts of the template
+    """
+    slots = build_slot_table(horizon_days(month, year), holidays_file, shifts)
+    assignments = [None] * len(slots["type"])
+    expected = schedule_columns(slots["shifts"])
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        if header[1:-1] != csv_column_labels([label for _, _, label in expected]):
+            raise ValueError(f"{path} has columns {', '.join(header[1:-1])}, "
+                             f"expected one per shift of {', '.join(slots['shifts'])}")
+        month_row = next(reader)
+        if month_row[0] != MONTH_NAMES[month-1]:
+            raise ValueError(f"{path} is for '{month_row[0]}', constraints are for {MONTH_NAMES[month-1]} {year}")
+        for row in reader:
+            if not row or not row[0]:
+                continue
+            date = f"{int(row[0]):02d}/{month:02d}"
+            for column, (shift_index, _, _) in enumerate(expected, start=1):
+                assignments[slots["index"][f"{date} {slots['shifts'][shift_index]}"]] = row[column] or None
+
+    developer_shift_count = {}
+    for slot, developer in enumerate(assignments):
+        if developer:
+            dev_counts = developer_shift_count.setdefault(developer, {name: 0 for name in SHIFT_TYPES})
+            dev_counts[SHIFT_TYPES[slots["type"][slot]]] += 1
+    return {
+        "month": month,
+        "year": year,
+        "seed": None,
+        "solver": None,
+        "carry_over": None,
+        "slots": slots,
+        "assignments": assignments,
+        "developer_shift_count": developer_shift_count,
+    }
+
+
+# Written next to shift_schedule.csv: the constraints the schedule was made from
+CONSTRAINTS_SNAPSHOT = "shift_constraints.json"
+
+
+def file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_constraints_snapshot(path, schedule_file, month, year, developers, shifts, rest_rules):
+    """
+    Record the constraints a schedule CSV was made from, so --repair can recheck only what changed
+
+    The CSV's hash is kept too: a schedule edited by hand no longer matches
+    its snapshot and is then rechecked in full.
+    """
+    with open(path, 'w') as f:
+        json.dump({"schedule_sha256": file_digest(schedule_file), "month": month, "year": year,
+                   "shifts": list(shifts), "rest_rules": list(rest_rules), "developers": developers}, f, indent=2)
+
+
+def changed_developers(path, schedule_file, month, year, developers, shifts, rest_rules):
+    """
+    Developers whose restrictions differ from a write_constraints_snapshot() file
+
+    Returns:
+        List of names (developers new to the team included; restriction
+        order does not matter), or None when there is no snapshot or it is
+        for another schedule file, month, shift template or rest rules, and
+        everything has to be rechecked
+    """
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    made_for = (snapshot.get("schedule_sha256"), snapshot.get("month"), snapshot.get("year"),
+                snapshot.get("shifts"), snapshot.get("rest_rules"))
+    if made_for != (file_digest(schedule_file), month, year, list(shifts), list(rest_rules)):
+        return None
+    before = snapshot.get("developers", {})
+    return [dev for dev, restrictions in developers.items()
+            if dev not in before or sorted(set(before[dev])) != sorted(set(restrictions))]
+
+
+def write_repair_diff_csv(diff, output_path):
+    """Write the slots changed by repair_schedule() to CSV"""
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Date', 'Shift', 'Before', 'After'])
+        for change in diff:
+            writer.writerow([change['date'], change['shift'], change['before'] or '', change['after'] or ''])
+
+
+# ============================================================================
+# CSV EXPORT
+# ============================================================================
+
+def csv_column_labels(labels):
+    """CSV headers of the developer columns: the template's for Day/Night, else the labels"""
+    default = [label for _, _, label in schedule_columns(SHIFT_NAMES)]
+    return SCHEDULE_COLUMNS[1:-1] if list(labels) == default else list(labels)
+
+
+def write_schedule_csv(rows, month_name, output_path):
+    """
+    Write the schedule CSV with a month header row (template format)
+
+    Args:
+        rows: Rows from schedule_rows(), or any iterable of them (e.g.
+            iter_schedule_rows(), streamed straight to the file)
+        month_name: Month name (e.g., "Mar")
+        output_path: Path to save the CSV file
+    """
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        header_written = False
+        for row in rows:
+            if not header_written:
+                labels = csv_column_labels(row['shifts'])
+                writer.writerow([SCHEDULE_COLUMNS[0]] + labels + [SCHEDULE_COLUMNS[-1]])
+                writer.writerow([month_name] + [''] * (len(labels) + 1))
+                header_written = True
+            writer.writerow([row['day_of_month']] + [name or '' for name in row['shifts'].values()]
+                            + [row['day_of_week']])
+        if not header_written:
+            writer.writerow(SCHEDULE_COLUMNS)
+            writer.writerow([month_name, '', '', ''])
+
+
+def summary_columns(schedule):
+    """SUMMARY_COLUMNS, plus a total per backup tier (primary counts are the per-type columns)"""
+    backups = schedule.get("tier_shift_count", [])[1:]
+    return SUMMARY_COLUMNS + [f"{tier_label(tier)} Shifts" for tier in range(1, len(backups) + 1)]
+
+
+def summary_rows(schedule):
+    """Return [developer, special, night, day, backup totals...] rows for the shift summary"""
+    backups = schedule.get("tier_shift_count", [])[1:]
+    return [
+        [dev, counts["special"], counts["night"], counts["day"]]
+        + [sum(tier_counts[dev].values()) for tier_counts in backups]
+        for dev, counts in schedule["developer_shift_count"].items()
+    ]
+
+
+def write_summary_csv(schedule, output_path):
+    """Write per-developer shift totals to CSV"""
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(summary_columns(schedule))
+        writer.writerows(summary_rows(schedule))
+
+
+def print_summary(schedule):
+    """Print per-developer shift totals as a table"""
+    print("\nShift Summary:")
+    columns = summary_columns(schedule)
+    width = max([len(columns[0])] + [len(dev) for dev in schedule["developer_shift_count"]])
+    print(f"{columns[0]:<{width}}  " + "  ".join(columns[1:]))
+    for dev, *counts in summary_rows(schedule):
+        print(f"{dev:<{width}}  " + "  ".join(f"{count:>{len(column)}}" for count, column in zip(counts, columns[1:])))
+
 
 # ============================================================================
 # EXCEL (XLSX) EXPORT WITH COLORS
 # ============================================================================
 
-def create_excel_with_colors(df, month_name, output_path):
+EXCEL_LAYOUTS = ("sheets", "stacked")
+EXCEL_HEADERS = ['Day of Month', 'Night Shift', 'Day Shift', 'Day of Week']
+
+
+def excel_styles(colors):
+    """
+    openpyxl style objects shared by a whole export, built once
+
+    Returns:
+        Dict with month_font, header_font, center and fills (developer -> PatternFill)
+    """
+    from openpyxl.styles import PatternFill, Alignment, Font
+
+    fills = {}
+    for developer, color in colors.items():
+        # Convert RGB 0-1 to hex color (0-255)
+        hex_color = "{:02X}{:02X}{:02X}".format(*(int(color[c] * 255) for c in ('red', 'green', 'blue')))
+        fills[developer] = PatternFill(start_color=hex_color, end_color=hex_color, fill_type='solid')
+    return {
+        "month_font": Font(bold=True, size=12),
+        "header_font": Font(bold=True),
+        "center": Alignment(horizontal='center'),
+        "fills": fills,
+    }
+
+
+def excel_sheet_writer(ws, styles):
+    """
+    Return write_block(month_name, rows) appending one month block to a write-only worksheet
+
+    Developer and header cells are built once per worksheet and appended
+    again for every row (write-only cells are serialized as they are
+    appended), so a block costs no style lookups per cell.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    headers = []
+
+    def header_cells(labels):
+        # Column widths must be set before the first row is appended
+        if not headers:
+            names = [EXCEL_HEADERS[0]] + list(labels) + [EXCEL_HEADERS[-1]]
+            for column, header in enumerate(names, start=1):
+                ws.column_dimensions[get_column_letter(column)].width = max(15, len(header) + 2)
+                cell = WriteOnlyCell(ws, value=header)
+                cell.font = styles["header_font"]
+                cell.alignment = styles["center"]
+                headers.append(cell)
+        return headers
+
+    developer_cells = {None: None}
+
+    def developer_cell(name):
+        cell = developer_cells.get(name)
+        if cell is None and name is not None:
+            cell = developer_cells[name] = WriteOnlyCell(ws, value=name)
+            cell.alignment = styles["center"]
+            if name in styles["fills"]:
+                cell.fill = styles["fills"][name]
+        return cell
+
+    def write_block(month_name, rows):
+        rows = iter(rows)
+        first = next(rows, None)
+        labels = first['shifts'] if first is not None else EXCEL_HEADERS[1:-1]
+        header_row = header_cells(labels)
+        month_cell = WriteOnlyCell(ws, value=month_name)
+        month_cell.font = styles["month_font"]
+        ws.append([month_cell])
+        ws.append(header_row)
+        if first is None:
+            return
+        for row in itertools.chain([first], rows):
+            ws.append([int(row['day_of_month'])]
+                      + [developer_cell(name) for name in row['shifts'].values()]
+                      + [row['day_of_week']])
+
+    return write_block
+
+
+def write_excel_workbook(months, output_path, layout="sheets", colors=DEVELOPER_COLORS, title="Schedule"):
+    """
+    Stream one or more month blocks into a write-only workbook
+
+    Args:
+        months: Iterable of (month_name, rows), e.g. month_rows(schedule); a
+            generator is consumed one month at a time
+        output_path: Path to save the Excel file
+        layout: "sheets" (one worksheet per month, named after it) or
+            "stacked" (all months in one worksheet, two blank rows apart)
+        colors: Dict of developer name -> {"red", "green", "blue"} (0-1)
+        title: Worksheet name for the stacked layout
+
+    Returns:
+        Number of months written
+    """
+    from openpyxl import Workbook
+
+    if layout not in EXCEL_LAYOUTS:
+        raise ValueError(f"Unknown Excel layout '{layout}' (expected one of {', '.join(EXCEL_LAYOUTS)})")
+
+    wb = Workbook(write_only=True)
+    styles = excel_styles(colors)
+    stacked = None
+    written = 0
+    for month_name, rows in months:
+        if layout == "stacked":
+            if stacked is None:
+                ws = wb.create_sheet(title)
+                stacked = excel_sheet_writer(ws, styles)
+            elif written:
+                ws.append([])
+                ws.append([])
+            stacked(month_name, rows)
+        else:
+            excel_sheet_writer(wb.create_sheet(month_name), styles)(month_name, rows)
+        written += 1
+    if not written:
+        wb.create_sheet(title)
+    wb.save(output_path)
+    return written
+
+
+def create_excel_with_colors(rows, month_name, output_path, colors=DEVELOPER_COLORS):
     """
     Create an Excel file with the same color formatting as Google Sheets
 
     Args:
-        df: DataFrame with schedule data (without header row)
+        rows: Rows from schedule_rows()
         month_name: Month name (e.g., "Mar")
         output_path: Path to save the Excel file
+        colors: Dict of developer name -> {"red", "green", "blue"} (0-1)
     """
     print("\n" + "="*60)
     print("Creating Excel file with colors...")
     print("="*60)
 
-    # Create workbook and worksheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Schedule"
-
-    # Write month name in A1 with bold formatting
-    ws['A1'] = month_name
-    ws['A1'].font = Font(bold=True, size=12)
-
-    # Write headers in row 2
-    headers = ['Day of Month', 'Night Shift', 'Day Shift', 'Day of Week']
-    for col_idx, header in enumerate(headers, start=1):
-        cell = ws.cell(row=2, column=col_idx)
-        cell.value = header
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-
-    # Write data starting from row 3
-    for idx, row_data in df.iterrows():
-        row_num = idx + 3  # Start from row 3 (1=month, 2=headers)
-
-        # Column A: Day of Month
-        ws.cell(row=row_num, column=1, value=int(row_data['Day of Month']))
-
-        # Column B: Night Shift (with color)
-        night_dev = row_data['First Assignment']
-        night_cell = ws.cell(row=row_num, column=2, value=night_dev)
-        night_cell.alignment = Alignment(horizontal='center')
-
-        if night_dev and night_dev in DEVELOPER_COLORS:
-            color = DEVELOPER_COLORS[night_dev]
-            # Convert RGB 0-1 to hex color (0-255)
-            r = int(color['red'] * 255)
-            g = int(color['green'] * 255)
-            b = int(color['blue'] * 255)
-            hex_color = f"{r:02X}{g:02X}{b:02X}"
-            night_cell.fill = PatternFill(start_color=hex_color, end_color=hex_color, fill_type='solid')
-
-        # Column C: Day Shift (with color)
-        day_dev = row_data['Second Assignment']
-        day_cell = ws.cell(row=row_num, column=3, value=day_dev)
-        day_cell.alignment = Alignment(horizontal='center')
-
-        if day_dev and day_dev in DEVELOPER_COLORS:
-            color = DEVELOPER_COLORS[day_dev]
-            # Convert RGB 0-1 to hex color (0-255)
-            r = int(color['red'] * 255)
-            g = int(color['green'] * 255)
-            b = int(color['blue'] * 255)
-            hex_color = f"{r:02X}{g:02X}{b:02X}"
-            day_cell.fill = PatternFill(start_color=hex_color, end_color=hex_color, fill_type='solid')
-
-        # Column D: Day of Week
-        ws.cell(row=row_num, column=4, value=row_data['Day of Week'])
-
-    # Adjust column widths
-    ws.column_dimensions['A'].width = 15
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 15
-
-    # Save the workbook
-    wb.save(output_path)
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        print("⚠ openpyxl is not installed. Skipping Excel export.")
+        print("  Install it with: pip3 install openpyxl")
+        print("="*60)
+        return
+
+    # Month name in A1, headers in row 2, data from row 3
+    write_excel_workbook([(month_name, rows)], output_path, layout="stacked", colors=colors)
     print(f"✓ Excel file with colors written to {output_path}")
     print("="*60)
 
-# Create Excel file with colors
-excel_file = os.path.join(output_dir, "shift_schedule.xlsx")
-create_excel_with_colors(final_df, month_names[month-1], excel_file)
-
 
 # ============================================================================
 # GOOGLE SHEETS INTEGRATION
 # ============================================================================
 
-def upload_to_google_sheets(df, config, year, month_name):
+def upload_to_google_sheets(rows, config, year, month_name, metrics=NO_METRICS, token_provider=None,
+                            colors=DEVELOPER_COLORS, worksheet_name=None, rate_limiter=None):
     """
-    Append schedule to Google Sheets with developer color coding
+    Write schedule to Google Sheets with developer color coding
+
+    The month's block in the worksheet is updated in place if it exists
+    (only changed cells are sent), otherwise appended below the last block.
+    Either way the write is a single batchUpdate.
 
     Args:
-        df: DataFrame with schedule data (without header row)
-        config: Configuration dict with spreadsheet_id, worksheet_name, credentials_file
+        rows: Rows from schedule_rows()
+        config: Configuration dict with credentials_file and optionally
+            spreadsheet_id (or spreadsheet_name), sheets_api_url and drive_api_url
         year: Year for the schedule
         month_name: Month name (e.g., "Feb")
+        metrics: Optional RunMetrics; every Google API call is recorded
+        token_provider: Optional callable returning an access token
+            (default: the service account in config['credentials_file'])
+        colors: Dict of developer name -> {"red", "green", "blue"} (0-1)
+        worksheet_name: Target worksheet, with the year in its name
+            (default: "On call schedule YYYY")
+        rate_limiter: Optional sheets_api.TokenBucket shared with other uploads
+
+    Returns:
+        True if the schedule was uploaded
     """
     try:
         print("\n" + "="*60)
         print("Uploading to Google Sheets...")
         print("="*60)
 
-        # Setup credentials
-        scope = [
-            'https://spreadsheets.google.com/feeds',
-            'https://www.googleapis.com/auth/drive'
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            config['credentials_file'], scope
+        from sheets_api import (
+            DRIVE_API_URL, SHEETS_API_URL, SheetsClient, find_spreadsheet_id, service_account_token_provider,
+            upsert_schedule,
         )
-        client = gspread.authorize(creds)
 
-        # Open spreadsheet by name "On Call Schedule"
-        spreadsheet = client.open("On Call Schedule")
-        print(f"✓ Connected to spreadsheet: {spreadsheet.title}")
-
-        # Get or create worksheet with name "On call schedule YYYY"
-        worksheet_name = f"On call schedule {year}"
-        try:
-            worksheet = spreadsheet.worksheet(worksheet_name)
-            print(f"✓ Found worksheet: {worksheet_name}")
-        except:
-            worksheet = spreadsheet.add_worksheet(
-                title=worksheet_name,
-                rows=500,
-                cols=10
-            )
+        if token_provider is None:
+            token_provider = service_account_token_provider(config['credentials_file'])
+        with metrics.api_call("auth"):
+            token_provider()
+
+        # Open the spreadsheet by id if configured, otherwise by name ("On Call Schedule")
+        spreadsheet_id = config.get('spreadsheet_id', '')
+        if not spreadsheet_id or spreadsheet_id.startswith('YOUR_'):
+            spreadsheet_id = find_spreadsheet_id(config.get('spreadsheet_name', SPREADSHEET_NAME), token_provider,
+                                                 config.get('drive_api_url', DRIVE_API_URL), metrics, rate_limiter)
+        client = SheetsClient(spreadsheet_id, token_provider, config.get('sheets_api_url', SHEETS_API_URL), metrics,
+                              rate_limiter=rate_limiter)
+
+        # The worksheet is created in the same batch if missing
+        worksheet_name = worksheet_name or f"On call schedule {year}"
+        result = upsert_schedule(client, worksheet_name, rows, year, month_name, colors, MONTH_NAMES)
+        print(f"✓ Connected to spreadsheet: {client.title}")
+        if result["action"] == "created":
             print(f"✓ Created new worksheet: {worksheet_name}")
-
-        # Find the next empty row (append mode)
-        all_values = worksheet.get_all_values()
-        next_row = len(all_values) + 1
-
-        # If sheet is empty, start from row 1
-        if next_row == 1:
-            next_row = 1
         else:
-            # Add 2 empty rows
-            next_row += 2
-
-        print(f"✓ Appending data starting at row {next_row}")
-
-        # Write month name in column A
-        month_row = next_row
-        worksheet.update_cell(month_row, 1, month_name)  # Column A
-        print(f"✓ Wrote month name '{month_name}' at row {month_row}")
-
-        # Prepare schedule data (A=day, B=night, C=day, D=day_of_week)
-        schedule_start_row = month_row + 1
-        data_rows = []
-
-        for _, row in df.iterrows():
-            data_rows.append([
-                row['Day of Month'],      # Column A: Day number
-                row['First Assignment'],  # Column B: Night shift
-                row['Second Assignment'], # Column C: Day shift
-                row['Day of Week']        # Column D: Day of week
-            ])
-
-        # Upload schedule data
-        if data_rows:
-            cell_range = f'A{schedule_start_row}:D{schedule_start_row + len(data_rows) - 1}'
-            worksheet.update(cell_range, data_rows)
-            print(f"✓ Uploaded {len(data_rows)} days of schedule")
-
-        # Apply formatting
-        print("\nApplying formatting...")
-
-        # Format requests for batch update
-        requests = []
-
-        # Bold and larger font for month name
-        requests.append({
-            "repeatCell": {
-                "range": {
-                    "sheetId": worksheet.id,
-                    "startRowIndex": month_row - 1,
-                    "endRowIndex": month_row,
-                    "startColumnIndex": 0,
-                    "endColumnIndex": 1
-                },
-                "cell": {
-                    "userEnteredFormat": {
-                        "textFormat": {"bold": True, "fontSize": 12}
-                    }
-                },
-                "fields": "userEnteredFormat.textFormat"
-            }
-        })
-
-        # Apply colors and center alignment to developer cells (columns B and C)
-        for idx, row in enumerate(df.iterrows()):
-            _, row_data = row
-            row_idx = schedule_start_row - 1 + idx  # Zero-indexed for API
-
-            # Night shift (column B, index 1)
-            night_dev = row_data['First Assignment']
-            if night_dev and night_dev in DEVELOPER_COLORS:
-                color = DEVELOPER_COLORS[night_dev]
-                requests.append({
-                    "repeatCell": {
-                        "range": {
-                            "sheetId": worksheet.id,
-                            "startRowIndex": row_idx,
-                            "endRowIndex": row_idx + 1,
-                            "startColumnIndex": 1,  # Column B
-                            "endColumnIndex": 2
-                        },
-                        "cell": {
-                            "userEnteredFormat": {
-                                "backgroundColor": color,
-                                "horizontalAlignment": "CENTER"
-                            }
-                        },
-                        "fields": "userEnteredFormat(backgroundColor,horizontalAlignment)"
-                    }
-                })
-
-            # Day shift (column C, index 2)
-            day_dev = row_data['Second Assignment']
-            if day_dev and day_dev in DEVELOPER_COLORS:
-                color = DEVELOPER_COLORS[day_dev]
-                requests.append({
-                    "repeatCell": {
-                        "range": {
-                            "sheetId": worksheet.id,
-                            "startRowIndex": row_idx,
-                            "endRowIndex": row_idx + 1,
-                            "startColumnIndex": 2,  # Column C
-                            "endColumnIndex": 3
-                        },
-                        "cell": {
-                            "userEnteredFormat": {
-                                "backgroundColor": color,
-                                "horizontalAlignment": "CENTER"
-                            }
-                        },
-                        "fields": "userEnteredFormat(backgroundColor,horizontalAlignment)"
-                    }
-                })
-
-        # Execute batch update
-        if requests:
-            spreadsheet.batch_update({"requests": requests})
-            print(f"✓ Applied colors to {len(requests)} cells")
+            print(f"✓ Found worksheet: {worksheet_name}")
+        if result["action"] == "unchanged":
+            print(f"✓ '{month_name}' at row {result['month_row']} is already up to date, nothing sent")
+        elif result["action"] == "updated":
+            print(f"✓ Updated {result['cells_changed']} changed cell(s) of '{month_name}' at row "
+                  f"{result['month_row']} ({result['requests']} requests in one batch update)")
+        else:
+            print(f"✓ Appended '{month_name}' and {len(rows)} days of schedule at row {result['month_row']}")
+            print(f"✓ Sent values and formatting as {result['requests']} requests in one batch update")
 
         print("\n" + "="*60)
         print(f"✓ SUCCESS! Schedule uploaded to Google Sheets")
-        print(f"  Spreadsheet: {spreadsheet.title}")
+        print(f"  Spreadsheet: {client.title}")
         print(f"  Worksheet: {worksheet_name}")
-        print(f"  URL: {spreadsheet.url}")
+        print(f"  URL: {client.url}")
         print("="*60 + "\n")
+        return True
 
     except Exception as e:
+        # Re-authorize and look the spreadsheet up again next time
+        from sheets_api import clear_caches
+        clear_caches()
         print(f"\n⚠ Warning: Could not upload to Google Sheets")
         print(f"  Error: {e}")
         print(f"  CSV files saved locally in output/ folder\n")
+        return False
 
 
-# Upload to Google Sheets if configuration exists and enabled
-try:
-    with open('config.json', 'r') as f:
-        config = json.load(f)
+def upload_if_enabled(rows, year, month_name, config_file='config.json', metrics=NO_METRICS):
+    """
+    Upload to Google Sheets if configuration exists and enabled
 
-    # Check if upload is enabled (default to True if not specified)
-    upload_enabled = config.get('upload_to_sheets', True)
+    Returns:
+        True/False for an upload that succeeded/failed, None if none was attempted
+    """
+    try:
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+
+        # Check if upload is enabled (default to True if not specified)
+        upload_enabled = config.get('upload_to_sheets', True)
+
+        if upload_enabled:
+            return upload_to_google_sheets(rows, config, year, month_name, metrics)
+        else:
+            print("\n" + "="*60)
+            print("ℹ️  Google Sheets upload is DISABLED in config.json")
+            print("   Schedule saved locally in output/ folder")
+            print("   To enable: Set 'upload_to_sheets': true in config.json")
+            print("="*60 + "\n")
+
+    except FileNotFoundError:
+        print("\n⚠ config.json not found. Skipping Google Sheets upload.")
+        print("  To enable Google Sheets integration:")
+        print("  1. Create config.json with your spreadsheet details")
+        print("  2. Set up Google Sheets API credentials")
+        print("  See docs/SETUP.md for instructions.\n")
+    except Exception as e:
+        print(f"\n⚠ Error loading config: {e}\n")
+
+
+# ============================================================================
+# COMMAND LINE
+# ============================================================================
 
-    if upload_enabled:
-        # Pass dataframe without header, year, and month name
-        upload_to_google_sheets(final_df, config, year, month_names[month-1])
+def parse_args(argv=None):
+    # prog is fixed so errors read the same when run inside scheduler_service.py
+    parser = argparse.ArgumentParser(prog="on_call_scheduler_with_sheets.py",
+                                     description="Generate the monthly on-call schedule")
+    parser.add_argument('--constraints', default='data/constraints.json',
+                        help='Path to constraints JSON (default: data/constraints.json)')
+    parser.add_argument('--output-dir', default='output',
+                        help='Directory for CSV/XLSX output (default: output)')
+    parser.add_argument('--config', default='config.json',
+                        help='Google Sheets config file (default: config.json)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed for a reproducible schedule')
+    parser.add_argument('--solver', choices=SOLVERS, default='greedy',
+                        help='greedy (fast, shift by shift) or optimal (min-cost flow, most balanced)')
+    parser.add_argument('--shifts', default=','.join(SHIFT_NAMES), metavar='NAMES',
+                        help='Shift template: comma-separated shifts of a day in order, e.g. '
+                             'Morning,Evening,Night (default: Day,Night)')
+    parser.add_argument('--tiers', type=int, default=1, metavar='N',
+                        help='On-call tiers per shift: 2 adds a backup developer to every shift '
+                             '(greedy solver only; default: 1)')
+    parser.add_argument('--min-gap', type=int, default=1, metavar='SLOTS',
+                        help='Free shifts required between two shifts of one developer '
+                             '(default: 1, no back-to-back; 2 also rules out Night-Day-Night)')
+    parser.add_argument('--max-per-week', type=int, default=None, metavar='N',
+                        help=f'At most N shifts per developer in any {REST_WEEK_DAYS} days in a row')
+    parser.add_argument('--weekend-every', type=int, default=None, metavar='WEEKS',
+                        help='At most one weekend per developer every WEEKS weeks')
+    parser.add_argument('--attempts', type=int, default=1,
+                        help='Run N seeded attempts in parallel and keep the fairest (default: 1)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for --attempts (default: all cores)')
+    parser.add_argument('--improve', type=float, default=None, metavar='SECONDS',
+                        help='Spend SECONDS improving the schedule with local search')
+    parser.add_argument('--improve-iterations', type=int, default=None, metavar='N',
+                        help='Improve with exactly N local search moves (reproducible)')
+    parser.add_argument('--history-db', default=None, metavar='PATH',
+                        help='SQLite shift history: carry past counts into this month and record the result')
+    parser.add_argument('--holidays', default=DEFAULT_HOLIDAYS_FILE,
+                        help=f'Holiday overrides JSON, used if present (default: {DEFAULT_HOLIDAYS_FILE})')
+    parser.add_argument('--history-months', type=int, default=12,
+                        help='Rolling window of past months to carry over (default: 12)')
+    parser.add_argument('--repair', default=None, metavar='CSV',
+                        help='Repair an existing schedule CSV against the current constraints '
+                             'instead of generating a new one')
+    parser.add_argument('--check', action='store_true',
+                        help='Only check that every shift can be covered and explain why not; '
+                             'exits 1 if some cannot')
+    parser.add_argument('--cache', default=None, metavar='DIR',
+                        help='Schedule cache: on unchanged inputs reuse the stored schedule and files '
+                             'and skip the upload if it was already done (e.g. data/schedule-cache)')
+    parser.add_argument('--cache-max-mb', type=float, default=64,
+                        help='Evict least recently used cache entries beyond this size (default: 64)')
+    parser.add_argument('--metrics', default=None, metavar='PATH',
+                        help='Write per-phase timings, counters and Google API call stats as JSON')
+    parser.add_argument('--profile', default=None, metavar='PATH',
+                        help='Write a cProfile dump of the run (view with python -m pstats PATH)')
+    parser.add_argument('--no-excel', action='store_true',
+                        help='Skip the XLSX export')
+    parser.add_argument('--excel-year', action='store_true',
+                        help='Also write the whole year from --history-db as shift_schedule_YYYY.xlsx')
+    parser.add_argument('--excel-layout', choices=EXCEL_LAYOUTS, default='sheets',
+                        help='Yearly workbook layout: a sheet per month or stacked blocks (default: sheets)')
+    parser.add_argument('--no-upload', action='store_true',
+                        help='Skip the Google Sheets upload')
+    args = parser.parse_args(argv)
+    if args.excel_year and not args.history_db:
+        parser.error("--excel-year needs --history-db")
+    try:
+        args.rest_rules = RestRules(args.min_gap, args.max_per_week, args.weekend_every)
+        args.shifts = shift_template(name.strip() for name in args.shifts.split(','))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.tiers < 1:
+        parser.error("--tiers must be at least 1")
+    if args.tiers > 1:
+        if args.solver != "greedy":
+            parser.error("--tiers needs the greedy solver")
+        if args.improve is not None or args.improve_iterations is not None or args.repair:
+            parser.error("--improve and --repair work on single-tier schedules")
+    return args
+
+
+def run_repair(args, month, year, developers, metrics=NO_METRICS):
+    """
+    --repair: fix the given schedule CSV and write the repaired files plus a diff
+
+    Only developers whose restrictions changed since the CSV was written
+    (per the CONSTRAINTS_SNAPSHOT beside it) are rechecked; without a
+    matching snapshot, everything is.
+    """
+    month_name = MONTH_NAMES[month-1]
+    snapshot = os.path.join(os.path.dirname(args.repair), CONSTRAINTS_SNAPSHOT)
+    with metrics.phase("repair"):
+        schedule = read_schedule_csv(args.repair, month, year, args.holidays, args.shifts)
+        schedule["rest_rules"] = args.rest_rules
+        changed = changed_developers(snapshot, args.repair, month, year, developers, args.shifts, args.rest_rules)
+        schedule, diff = repair_schedule(schedule, developers, changed=changed)
+    metrics.count("slots_changed", len(diff))
+    if changed is None:
+        print(f"ℹ️  No matching {snapshot}: rechecking every developer")
     else:
-        print("\n" + "="*60)
-        print("ℹ️  Google Sheets upload is DISABLED in config.json")
-        print("   Schedule saved locally in output/ folder")
-        print("   To enable: Set 'upload_to_sheets': true in config.json")
-        print("="*60 + "\n")
+        print(f"✓ Rechecking {len(changed)} developer(s) whose restrictions changed since {snapshot}")
+    rows = schedule_rows(schedule)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    schedule_file = os.path.join(args.output_dir, "shift_schedule.csv")
+    summary_file = os.path.join(args.output_dir, "shift_summary.csv")
+    diff_file = os.path.join(args.output_dir, "shift_repair_diff.csv")
+    write_schedule_csv(rows, month_name, schedule_file)
+    write_summary_csv(schedule, summary_file)
+    write_repair_diff_csv(diff, diff_file)
+    write_constraints_snapshot(os.path.join(args.output_dir, CONSTRAINTS_SNAPSHOT), schedule_file, month, year,
+                               developers, args.shifts, args.rest_rules)
+
+    print(f"\n🔧 Repaired {args.repair}: {len(diff)} shift(s) changed")
+    for change in diff:
+        print(f"  {change['date']} {change['shift']}: {change['before'] or '(empty)'} → {change['after'] or '(empty)'}")
+    unfilled = schedule["assignments"].count(None)
+    if unfilled:
+        print(f"⚠ {unfilled} shift(s) could not be filled")
+    print(f"\n✓ Shift schedule written to {schedule_file}")
+    print(f"✓ Repair diff written to {diff_file}")
+
+    if not args.no_excel:
+        create_excel_with_colors(rows, month_name, os.path.join(args.output_dir, "shift_schedule.xlsx"))
+    if not args.no_upload:
+        # The month's existing block is updated in place, so only the changed shifts are sent
+        with metrics.phase("sheets_upload"):
+            upload_if_enabled(rows, year, month_name, args.config, metrics)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    metrics = RunMetrics() if args.metrics else NO_METRICS
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        return run(args, metrics)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"✓ Profile written to {args.profile}")
+        if args.metrics:
+            metrics.write(args.metrics)
+            print(f"✓ Run metrics written to {args.metrics}")
+
+
+def run(args, metrics=NO_METRICS):
+    """Generate (or repair), export and upload one schedule as configured by parse_args()"""
+    with metrics.phase("json_load"):
+        month, year, developers = load_constraints(args.constraints, args.shifts)
+    month_name = MONTH_NAMES[month-1]
+    print(f"✓ Planning schedule for: {month_name} {year}")
+
+    with metrics.phase("feasibility_check"):
+        report = feasibility_report(month, year, developers, holidays_file=args.holidays, shifts=args.shifts,
+                                    rest_rules=args.rest_rules)
+    print_feasibility(report)
+    if args.check:
+        return 0 if report["feasible"] else 1
+
+    if args.repair:
+        return run_repair(args, month, year, developers, metrics)
+
+    last_day = calendar.monthrange(year, month)[1]
+    print(f"📅 Generating schedule from {year}-{month:02d}-01 to {year}-{month:02d}-{last_day}")
+
+    carry_over = None
+    history = None
+    if args.history_db:
+        import shift_history
+        with metrics.phase("history_load"):
+            history = shift_history.open_history(args.history_db)
+            carry_over = shift_history.carry_over_counts(history, developers, month, year, args.history_months)
+        print(f"✓ Loaded {args.history_months}-month shift history from {args.history_db}")
+
+    seed = args.seed
+    cache = cached = None
+    if args.cache and args.improve:
+        # How far a time-limited search gets depends on the machine, so its result is not reproducible
+        print("ℹ️  --improve SECONDS runs are not cached (use --improve-iterations N to cache)")
+    elif args.cache:
+        import schedule_cache
+        cache = schedule_cache.ScheduleCache(args.cache, int(args.cache_max_mb * 1024 * 1024))
+        settings = {"solver": args.solver, "seed": args.seed, "attempts": args.attempts,
+                    "improve_iterations": args.improve_iterations, "rest_rules": list(args.rest_rules),
+                    "shifts": list(args.shifts), "tiers": args.tiers}
+        cache_key = schedule_cache.schedule_key(month, year, developers, args.holidays, settings, carry_over)
+        if seed is None:
+            # Unseeded runs get a seed derived from their inputs, so unchanged inputs stay cacheable
+            seed = schedule_cache.seed_from_key(cache_key)
+        cached = cache.get(cache_key)
+        metrics.count("schedule_cache_hits", int(cached is not None))
+
+    if cached is not None:
+        schedule = schedule_cache.cached_schedule(cached, developers, args.holidays, carry_over)
+        print(f"✓ Inputs unchanged: reusing schedule {cache_key[:12]} from {cached['created']} (seed {cached['seed']})")
+    elif args.attempts > 1:
+        with metrics.phase("assignment"):
+            schedule = search_schedule(month, year, developers, args.attempts, seed=seed,
+                                       workers=args.workers, solver=args.solver, carry_over=carry_over,
+                                       holidays_file=args.holidays, rest_rules=args.rest_rules,
+                                       shifts=args.shifts, tiers=args.tiers)
+        score = schedule["score"]
+        print(f"✓ Best of {args.attempts} attempts: seed {schedule['seed']} "
+              f"({score['unfilled']} unfilled, special spread {score['spread']['special']}, "
+              f"total spread {score['spread']['total']})")
+    else:
+        schedule = build_schedule(month, year, developers, seed=seed, solver=args.solver,
+                                  carry_over=carry_over, metrics=metrics, holidays_file=args.holidays,
+                                  rest_rules=args.rest_rules, shifts=args.shifts, tiers=args.tiers)
+    for name, value in schedule.get("stats", {}).items():
+        metrics.count(name, value)
+
+    if cached is None and (args.improve or args.improve_iterations):
+        with metrics.phase("local_search"):
+            schedule = improve_schedule(schedule, developers, iterations=args.improve_iterations or 0,
+                                        seconds=args.improve)
+        stats = schedule["improvement"]
+        metrics.count("moves_evaluated", stats["moves_evaluated"])
+        print(f"✓ Local search: {stats['moves_evaluated']:,} moves evaluated, "
+              f"cost {stats['cost_before']} → {stats['cost_after']}")
+    rows = schedule_rows(schedule)
+
+    # Create output directory if it doesn't exist
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # Define output file paths
+    schedule_file = os.path.join(args.output_dir, "shift_schedule.csv")
+    summary_file = os.path.join(args.output_dir, "shift_summary.csv")
+    excel_file = os.path.join(args.output_dir, "shift_schedule.xlsx")
+    snapshot_file = os.path.join(args.output_dir, CONSTRAINTS_SNAPSHOT)
+
+    # Files restored from the cache are not written again; new ones are added to it
+    restored = cache.restore(cached, args.output_dir) if cached is not None else set()
+    written = []
+    if not {"shift_schedule.csv", "shift_summary.csv", CONSTRAINTS_SNAPSHOT} <= restored:
+        with metrics.phase("csv_write"):
+            write_schedule_csv(rows, month_name, schedule_file)
+            write_summary_csv(schedule, summary_file)
+            write_constraints_snapshot(snapshot_file, schedule_file, month, year, developers, args.shifts,
+                                       args.rest_rules)
+        written += [schedule_file, summary_file, snapshot_file]
+    print_summary(schedule)
+
+    print(f"\n✓ Shift schedule written to {schedule_file}")
+    print(f"✓ Shift summary written to {summary_file}")
+
+    if history is not None:
+        recorded = shift_history.record_schedule(history, schedule)
+        history.close()
+        print(f"✓ Recorded {recorded} shifts in {args.history_db}")
+
+    if not args.no_excel:
+        with metrics.phase("excel_write"):
+            if "shift_schedule.xlsx" not in restored:
+                create_excel_with_colors(rows, month_name, excel_file)
+                written.append(excel_file)
+            if args.excel_year:
+                year_file = os.path.join(args.output_dir, f"shift_schedule_{year}.xlsx")
+                history = shift_history.open_history(args.history_db)
+                months_written = write_excel_workbook(shift_history.year_rows(history, year, args.shifts), year_file,
+                                                      layout=args.excel_layout, title=f"Schedule {year}")
+                history.close()
+                print(f"✓ {months_written} month(s) of {year} written to {year_file}")
+
+    if cache is not None and (cached is None or written):
+        cache.put(cache_key, schedule, written)
+
+    if not args.no_upload:
+        target = schedule_cache.upload_target(args.config) if cache is not None else None
+        if cached is not None and target in cached["uploaded"]:
+            print("✓ This schedule was already uploaded with the same config; skipping Google Sheets")
+        else:
+            with metrics.phase("sheets_upload"):
+                uploaded = upload_if_enabled(rows, year, month_name, args.config, metrics)
+            if cache is not None and uploaded and target is not None:
+                cache.mark_uploaded(cache_key, target)
+
+    return 0
+
 
-except FileNotFoundError:
-    print("\n⚠ config.json not found. Skipping Google Sheets upload.")
-    print("  To enable Google Sheets integration:")
-    print("  1. Create config.json with your spreadsheet details")
-    print("  2. Set up Google Sheets API credentials")
-    print("  See docs/SETUP.md for instructions.\n")
-except Exception as e:
-    print(f"\n⚠ Error loading config: {e}\n")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Run instrumentation for the on-call scheduler
+
+Records wall time and memory per phase, named counters, and the count and
+latency of every Google API call, then writes them as one JSON report.
+
+    metrics = RunMetrics()
+    with metrics.phase("assignment"):
+        ...
+    with metrics.api_call("batch_update"):
+        client.batch_update(requests)
+    metrics.write("output/run_metrics.json")
+
+A disabled recorder (RunMetrics(enabled=False), or NO_METRICS) accepts the
+same calls and does nothing, so instrumented code needs no conditionals.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_kib():
+    """Peak resident set size of this process so far, in KiB (None where unavailable, e.g. Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+class RunMetrics:
+    """Collects phase timings, counters and API call latencies for one run"""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.phases = []
+        self.counters = {}
+        self.api_calls = {}
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase and record the peak Python memory allocated during it"""
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        current_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            self.phases.append({
+                "name": name,
+                "seconds": round(seconds, 6),
+                "peak_memory_kib": round(max(0, peak - current_before) / 1024, 1),
+                "rss_kib": rss_kib(),
+            })
+
+    @contextmanager
+    def api_call(self, name):
+        """Count and time one remote API call; failures are counted as errors and re-raised"""
+        if not self.enabled:
+            yield
+            return
+        stats = self.api_calls.setdefault(name, {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            stats["count"] += 1
+            stats["total_seconds"] = round(stats["total_seconds"] + seconds, 6)
+            stats["max_seconds"] = round(max(stats["max_seconds"], seconds), 6)
+
+    def count(self, name, amount=1):
+        """Add to a named counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self):
+        """Return everything recorded so far as a JSON-serializable dict"""
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": round(time.perf_counter() - self.start, 6),
+            "peak_rss_kib": rss_kib(),
+            "phases": self.phases,
+            "counters": self.counters,
+            "api_calls": self.api_calls,
+        }
+
+    def write(self, path):
+        """Write report() to path as JSON"""
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+NO_METRICS = RunMetrics(enabled=False)
@@ -0,0 +1,246 @@
+"""
+What-if scenarios over a month of constraints
+
+Evaluates many variants of the collected constraints at once, e.g. before
+closing collection:
+
+    [
+      {"name": "Alex off the last week", "restrict": {"Alex": ["22/02-28/02"]}},
+      {"name": "Hagay joins", "add": {"Hagay": []}},
+      {"name": "Ivan leaves", "remove": ["Ivan"]},
+      {"name": "Omer back on Fridays", "unrestrict": {"Omer": ["every Friday"]}}
+    ]
+
+The slot table (with its holiday flags) and every developer's compiled
+restriction bitset are built once for the base constraints and shared by
+all scenarios; a scenario only compiles the restrictions it adds. Scenarios
+run in a process pool that receives the shared state once per worker.
+
+    python3 scenarios.py scenarios.json [--constraints data/constraints.json] [--workers N]
+
+Each result has the scenario's fill rate, unfilled and uncoverable shift
+counts, and fairness spread (see score_schedule()); "base" is always first.
+The optimal solver (default) makes variants directly comparable; greedy
+with --attempts 8 is about 20x faster for a first screening.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from constraint_rules import HorizonMasks, invalid_restrictions
+from on_call_scheduler_with_sheets import (
+    DEFAULT_HOLIDAYS_FILE, SHIFT_NAMES, SOLVERS, blocked_by_slot, build_schedule, build_slot_table,
+    check_feasibility, horizon_days, load_constraints, score_key, score_schedule, shift_caps, uncoverable_count,
+)
+
+DELTA_KEYS = ("name", "add", "remove", "restrict", "unrestrict")
+
+
+class ScenarioBase:
+    """Slot table and restriction bitsets of the base constraints, built once"""
+
+    def __init__(self, month, year, developers, months=1, holidays_file=DEFAULT_HOLIDAYS_FILE):
+        self.month = month
+        self.year = year
+        self.developers = developers
+        self.slots = build_slot_table(horizon_days(month, year, months), holidays_file)
+        self.horizon = HorizonMasks(self.slots["days"], SHIFT_NAMES)
+        self.masks = {dev: self.horizon.restriction_mask(restrictions) for dev, restrictions in developers.items()}
+
+    def apply(self, scenario):
+        """
+        Developers and restriction bitsets with a scenario's deltas applied
+
+        Deltas apply in DELTA_KEYS order (add, remove, restrict, unrestrict),
+        and each name is checked against the team as changed so far: a
+        developer added by the scenario can be restricted, a removed one
+        cannot. Only developers the scenario touches are recompiled.
+
+        Raises:
+            ValueError: If the scenario is malformed, names an unknown
+                developer (or adds an existing one), removes a developer it
+                also (un)restricts, leaves nobody on the team, or has an
+                invalid restriction
+        """
+        if not isinstance(scenario, dict):
+            raise ValueError("A scenario must be an object")
+        unknown = set(scenario) - set(DELTA_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown scenario key(s): {', '.join(sorted(unknown))}")
+        for key in ("add", "restrict", "unrestrict"):
+            changes = scenario.get(key, {})
+            if not isinstance(changes, dict) or not all(isinstance(r, list) for r in changes.values()):
+                raise ValueError(f"'{key}' must map developer names to lists of restrictions")
+        if not isinstance(scenario.get("remove", []), list):
+            raise ValueError("'remove' must be a list of developer names")
+        new = scenario.get("add", {})
+        problems = invalid_restrictions({**new, **scenario.get("restrict", {})}, SHIFT_NAMES)
+        if problems:
+            raise ValueError(problems[0][2])
+
+        developers = dict(self.developers)
+        masks = dict(self.masks)
+        for dev, restrictions in new.items():
+            if dev in developers:
+                raise ValueError(f"Cannot add '{dev}': already on the team")
+            developers[dev] = list(restrictions)
+            masks[dev] = self.horizon.restriction_mask(restrictions)
+        removed = set()
+        for dev in scenario.get("remove", []):
+            if dev not in developers:
+                raise ValueError(f"Unknown developer '{dev}' in 'remove'")
+            del developers[dev], masks[dev]
+            removed.add(dev)
+        if not developers:
+            raise ValueError("No developers left to schedule")
+        for key in ("restrict", "unrestrict"):
+            for dev in scenario.get(key, {}):
+                if dev in removed:
+                    raise ValueError(f"Cannot {key} '{dev}': removed by the same scenario")
+                if dev not in developers:
+                    raise ValueError(f"Unknown developer '{dev}' in '{key}'")
+
+        for dev, restrictions in scenario.get("restrict", {}).items():
+            developers[dev] = developers[dev] + list(restrictions)
+            masks[dev] |= self.horizon.restriction_mask(restrictions)
+        for dev, restrictions in scenario.get("unrestrict", {}).items():
+            developers[dev] = [r for r in developers[dev] if r not in restrictions]
+            masks[dev] = self.horizon.restriction_mask(developers[dev])
+        return developers, masks
+
+    def evaluate(self, scenario, solver="optimal", seed=0, attempts=1):
+        """
+        Schedule one scenario and score it
+
+        Args:
+            scenario: Dict of deltas (see the module docstring)
+            solver: "greedy" or "optimal"
+            seed: Seed of the first attempt
+            attempts: Seeded attempts to keep the best of (useful with greedy)
+
+        Returns:
+            Dict with name, developers (team size), fill_rate, unfilled,
+            uncoverable (shifts no schedule can cover), spread and seed, or
+            name and error if the scenario is invalid
+        """
+        name = scenario.get("name", "unnamed") if isinstance(scenario, dict) else "unnamed"
+        try:
+            developers, masks = self.apply(scenario)
+        except ValueError as e:
+            return {"name": name, "error": str(e)}
+
+        best = None
+        for attempt_seed in range(seed, seed + attempts):
+            schedule = build_schedule(self.month, self.year, developers, seed=attempt_seed, solver=solver,
+                                      slots=self.slots, restriction_masks=masks)
+            score = score_schedule(schedule)
+            if best is None or score_key(score) < score_key(best[0]):
+                best = score, attempt_seed
+
+        developers_list = list(developers)
+        blocked = blocked_by_slot([masks[dev] for dev in developers_list], len(self.slots["type"]))
+        caps = shift_caps(self.slots, len(developers_list)) if developers_list else (0, 0, None)
+        uncovered = {}
+        for group in check_feasibility(self.slots, blocked, len(developers_list), caps):
+            uncovered[group["cause"]] = uncovered.get(group["cause"], 0) + len(group["uncovered"])
+
+        score, best_seed = best
+        return {
+            "name": name,
+            "developers": len(developers),
+            "fill_rate": round(score["fill_rate"], 4),
+            "unfilled": score["unfilled"],
+            "uncoverable": uncoverable_count(uncovered),
+            "spread": score["spread"],
+            "seed": best_seed,
+        }
+
+
+# Shared state of a pool worker, set once by init_worker()
+_base = None
+
+
+def init_worker(base):
+    global _base
+    _base = base
+
+
+def evaluate_in_worker(job):
+    scenario, options = job
+    return _base.evaluate(scenario, **options)
+
+
+def evaluate_scenarios(base, scenarios, workers=None, **options):
+    """
+    Evaluate scenarios in parallel against one ScenarioBase
+
+    Args:
+        base: ScenarioBase of the constraints the deltas apply to
+        scenarios: List of scenario dicts
+        workers: Process count (defaults to all cores; 1 runs in-process)
+        **options: Passed to ScenarioBase.evaluate() (solver, seed, attempts)
+
+    Returns:
+        One result per scenario, in order
+    """
+    workers = min(workers or os.cpu_count() or 1, len(scenarios))
+    if workers <= 1:
+        return [base.evaluate(scenario, **options) for scenario in scenarios]
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(base,)) as pool:
+        return list(pool.map(evaluate_in_worker, [(scenario, options) for scenario in scenarios]))
+
+
+def print_results(results):
+    """Print scenario results as a table"""
+    width = max(len(result["name"]) for result in results)
+    print(f"{'Scenario':<{width}}  Devs  Filled   Unfilled  Uncoverable  Spread (special/total)")
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']:<{width}}  ✗ {result['error']}")
+            continue
+        spread = result["spread"]
+        print(f"{result['name']:<{width}}  {result['developers']:>4}  {result['fill_rate']:>6.1%}  "
+              f"{result['unfilled']:>8}  {result['uncoverable']:>11}  {spread['special']}/{spread['total']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate what-if variants of the collected constraints")
+    parser.add_argument('scenarios', help='JSON file with a list of scenarios')
+    parser.add_argument('--constraints', default='data/constraints.json',
+                        help='Base constraints JSON (default: data/constraints.json)')
+    parser.add_argument('--holidays', default=DEFAULT_HOLIDAYS_FILE,
+                        help=f'Holiday overrides JSON, used if present (default: {DEFAULT_HOLIDAYS_FILE})')
+    parser.add_argument('--solver', choices=SOLVERS, default='optimal',
+                        help='Solver per scenario (default: optimal, deterministic)')
+    parser.add_argument('--attempts', type=int, default=1,
+                        help='Seeded attempts per scenario, best kept (default: 1)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the first attempt (default: 0)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes (default: all cores)')
+    parser.add_argument('--json', default=None, metavar='PATH',
+                        help='Also write the results as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.scenarios) as f:
+        scenarios = json.load(f)
+    month, year, developers = load_constraints(args.constraints)
+    base = ScenarioBase(month, year, developers, holidays_file=args.holidays)
+    results = evaluate_scenarios(base, [{"name": "base"}] + scenarios, workers=args.workers,
+                                 solver=args.solver, seed=args.seed, attempts=args.attempts)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
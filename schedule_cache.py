@@ -0,0 +1,248 @@
+"""
+Content-addressed on-disk cache of generated schedules
+
+An entry is keyed by a hash of everything that decides the schedule: the
+normalized constraints, month/year, the effective holiday set, solver
+settings, rest rules, carried-over history counts, seed and the scheduler
+code itself. It holds the assignments plus the exported files, and
+remembers which Sheets configs it was uploaded with, so rerunning on
+unchanged inputs copies the files back and skips generation and the upload.
+
+    from schedule_cache import ScheduleCache, schedule_key
+    cache = ScheduleCache("data/schedule-cache")
+    key = schedule_key(month, year, developers, holidays_file, settings)
+    entry = cache.get(key)  # None on a miss
+
+Entries live in <directory>/<key>/ (meta.json and the files). When the
+directory grows past max_bytes, the least recently used entries are removed.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+
+from holiday_calendar import holiday_slots
+from on_call_scheduler_with_sheets import SHIFT_NAMES, build_slot_table, count_shifts, horizon_days
+
+DEFAULT_CACHE_DIR = "data/schedule-cache"
+DEFAULT_CACHE_MB = 64
+
+# Bump when the entry layout changes; old entries then simply stop matching
+CACHE_FORMAT = 1
+
+# Sources whose code decides the schedule, its carried-over history or its exported
+# and uploaded files (relative to this file)
+SCHEDULER_SOURCES = ("on_call_scheduler_with_sheets.py", "constraint_rules.py", "holiday_calendar.py",
+                     "shift_history.py", "sheets_api.py")
+
+META_FILE = "meta.json"
+
+
+@lru_cache(maxsize=1)
+def scheduler_fingerprint():
+    """Hash of the scheduler sources, so upgrading the scheduler invalidates old entries"""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in SCHEDULER_SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def schedule_key(month, year, developers, holidays_file, settings, carry_over=None, months=1):
+    """
+    Cache key of one schedule run
+
+    Restrictions are deduplicated and sorted (their order never matters);
+    developer order is kept because it seeds the tie-breaking shuffle.
+
+    Args:
+        month, year, developers, months: As for build_schedule()
+        holidays_file: Holiday overrides file; the resulting holiday set is
+            hashed, not the file
+        settings: JSON-serializable solver settings (solver, seed, attempts,
+            improve, rest rules, ...)
+        carry_over: Carried-over counts from shift_history, if any
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    days = horizon_days(month, year, months)
+    years = sorted({day.year for day in days})
+    inputs = {
+        "format": CACHE_FORMAT,
+        "scheduler": scheduler_fingerprint(),
+        "month": month,
+        "year": year,
+        "months": months,
+        "developers": [[dev, sorted(set(restrictions))] for dev, restrictions in developers.items()],
+        "holidays": {str(y): format(holiday_slots(y, holidays_file), "x") for y in years},
+        "settings": settings,
+        "carry_over": carry_over or {},
+    }
+    encoded = json.dumps(inputs, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def seed_from_key(key):
+    """Seed derived from a cache key, for runs without --seed: same inputs, same schedule"""
+    return int(key[:8], 16) & 0x7fffffff
+
+
+def upload_target(config_file):
+    """Hash of a Sheets config file (None if missing); an upload is reused only for the same config"""
+    try:
+        with open(config_file, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def cached_schedule(entry, developers, holidays_file, carry_over=None):
+    """Rebuild the schedule dict of a cache entry, as build_schedule() would return it for the exporters"""
+    slots = build_slot_table(horizon_days(entry["month"], entry["year"], entry.get("months", 1)), holidays_file,
+                             entry.get("shifts", SHIFT_NAMES))
+    assignments = entry["assignments"]
+    schedule = {
+        "month": entry["month"],
+        "year": entry["year"],
+        "seed": entry["seed"],
+        "solver": entry["solver"],
+        "carry_over": carry_over,
+        "slots": slots,
+        "assignments": assignments,
+        "developer_shift_count": count_shifts(slots, assignments, developers),
+        "stats": {},
+    }
+    if entry.get("tier_assignments"):
+        schedule["tier_assignments"] = entry["tier_assignments"]
+        schedule["tier_shift_count"] = [count_shifts(slots, tier, developers) for tier in entry["tier_assignments"]]
+    return schedule
+
+
+def write_json_atomic(path, document):
+    directory = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(document, f)
+    os.replace(tmp, path)
+
+
+class ScheduleCache:
+    """Directory of schedule entries with least-recently-used eviction by total size"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Entry metadata for key, or None if missing or incomplete
+
+        A hit marks the entry as recently used.
+        """
+        meta_path = os.path.join(self.entry_dir(key), META_FILE)
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not all(os.path.exists(os.path.join(self.entry_dir(key), name)) for name in entry["files"]):
+            return None
+        os.utime(meta_path)
+        return entry
+
+    def restore(self, entry, output_dir):
+        """
+        Copy an entry's files into output_dir
+
+        Returns:
+            Set of the file names restored
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        for name in entry["files"]:
+            shutil.copyfile(os.path.join(self.entry_dir(entry["key"]), name), os.path.join(output_dir, name))
+        return set(entry["files"])
+
+    def put(self, key, schedule, files=()):
+        """
+        Store a schedule and its exported files (adding to an existing entry)
+
+        Returns:
+            The entry metadata
+        """
+        entry_dir = self.entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        entry = self.get(key) or {
+            "key": key,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "month": schedule["month"],
+            "year": schedule["year"],
+            "months": len({(day.year, day.month) for day in schedule["slots"]["days"]}),
+            "seed": schedule["seed"],
+            "solver": schedule["solver"],
+            "shifts": list(schedule["slots"]["shifts"]),
+            "assignments": schedule["assignments"],
+            "tier_assignments": schedule.get("tier_assignments"),
+            "files": [],
+            "uploaded": [],
+        }
+        for path in files:
+            name = os.path.basename(path)
+            fd, tmp = tempfile.mkstemp(dir=entry_dir, suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, os.path.join(entry_dir, name))
+            if name not in entry["files"]:
+                entry["files"].append(name)
+        write_json_atomic(os.path.join(entry_dir, META_FILE), entry)
+        self.evict(keep=key)
+        return entry
+
+    def mark_uploaded(self, key, target):
+        """Record that the entry was uploaded with the Sheets config hashed as target"""
+        entry = self.get(key)
+        if entry is not None and target not in entry["uploaded"]:
+            entry["uploaded"].append(target)
+            write_json_atomic(os.path.join(self.entry_dir(key), META_FILE), entry)
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used entries until the cache fits in max_bytes
+
+        The entry `keep` (the one just written) is never removed.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        total = 0
+        for item in os.scandir(self.directory):
+            if not item.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(item.path) if f.is_file())
+            try:
+                used = os.stat(os.path.join(item.path, META_FILE)).st_mtime
+            except FileNotFoundError:
+                used = 0  # Left over from an interrupted write
+            entries.append((used, item.name, size))
+            total += size
+
+        removed = 0
+        for used, name, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,282 @@
+"""
+Long-running scheduler service with a local HTTP API
+
+Keeps the scheduler and its exporters imported, and the Google credentials
+and spreadsheet lookup cached between runs, so a generation triggered by
+constraints-app/scheduler.js skips interpreter startup, imports and the
+OAuth handshake. Requests are queued and run one at a time (they share the
+output directory and history database).
+
+    python3 scheduler_service.py                    # 127.0.0.1:8790
+
+    POST /generate   {"args": ["--seed", "42"]}     -> {"code", "output", "seconds"}
+    POST /check      {"month", "year", "developers"} -> feasibility_report() + {"seconds"}
+    POST /scenarios  {"scenarios": [...], "base"?, "solver"?, "attempts"?}
+                                                    -> {"results", "seconds"}
+    GET  /health                                    -> {"status", "queued", "runs", "uptime_seconds"}
+
+`args` are on_call_scheduler_with_sheets.py command line arguments; the
+response carries the exit code and everything the run printed. /check takes
+a document shaped like data/constraints.json (an empty body checks that
+file) and answers right away, without queueing behind generations.
+/scenarios evaluates what-if deltas (see scenarios.py) against "base", a
+document of the same shape, or data/constraints.json; it runs in-process
+(no pool forked from this threaded server), which is fast enough for a few
+dozen scenarios.
+"""
+
+import argparse
+import io
+import json
+import queue
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from concurrent.futures import Future
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import on_call_scheduler_with_sheets as scheduler
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8790
+DEFAULT_MAX_QUEUE = 16
+DEFAULT_CONSTRAINTS = "data/constraints.json"
+
+
+def warm_imports():
+    """Import the optional backends up front so the first run doesn't pay for them"""
+    loaded = []
+    for module in ("sheets_api", "shift_history", "openpyxl", "oauth2client.service_account"):
+        try:
+            __import__(module)
+            loaded.append(module)
+        except ImportError:
+            pass
+    return loaded
+
+
+def run_generation(argv):
+    """
+    Run the scheduler's main() in this process, capturing its output
+
+    Returns:
+        Dict with code (exit status), output (stdout and stderr) and seconds
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    tracing = tracemalloc.is_tracing()
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            code = scheduler.main(argv)
+        except SystemExit as e:
+            # argparse errors and --help
+            code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+    # --metrics starts tracemalloc; don't slow down every later run
+    if not tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return {"code": code or 0, "output": output.getvalue(), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def parse_constraints(document):
+    """
+    Month, year and developers of a constraints document
+
+    Args:
+        document: Dict shaped like data/constraints.json (month, year and
+            developers -> {"restrictions": [...]}); missing month/year default
+            to next month
+
+    Raises:
+        ValueError: If the document is malformed
+    """
+    default_month, default_year = scheduler.next_month_and_year()
+    month, year = document.get("month", default_month), document.get("year", default_year)
+    if not isinstance(month, int) or not 1 <= month <= 12 or not isinstance(year, int):
+        raise ValueError("'month' must be 1-12 and 'year' an integer")
+    developers = {}
+    for name, entry in document.get("developers", {}).items():
+        restrictions = entry.get("restrictions", []) if isinstance(entry, dict) else entry
+        if not isinstance(restrictions, list) or not all(isinstance(r, str) for r in restrictions):
+            raise ValueError(f"Restrictions of '{name}' must be a list of strings")
+        developers[name] = restrictions
+    return month, year, developers
+
+
+def read_constraints_file():
+    with open(DEFAULT_CONSTRAINTS) as f:
+        return json.load(f)
+
+
+def check_constraints(document):
+    """Run the feasibility pre-check on a constraints document; returns feasibility_report() plus seconds"""
+    start = time.perf_counter()
+    report = scheduler.feasibility_report(*parse_constraints(document))
+    report["seconds"] = round(time.perf_counter() - start, 4)
+    return report
+
+
+def run_scenarios(body):
+    """
+    Evaluate what-if scenarios (see scenarios.py)
+
+    Returns:
+        Dict with results (base first, then one per scenario) and seconds
+
+    Raises:
+        ValueError: If the request or its base document is malformed
+    """
+    import scenarios
+
+    start = time.perf_counter()
+    variants = body.get("scenarios")
+    if not isinstance(variants, list) or not all(isinstance(v, dict) for v in variants):
+        raise ValueError("'scenarios' must be a list of objects")
+    solver = body.get("solver", "optimal")
+    if solver not in scheduler.SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}'")
+    attempts = body.get("attempts", 1)
+    if not isinstance(attempts, int) or not 1 <= attempts <= 64:
+        raise ValueError("'attempts' must be 1-64")
+    month, year, developers = parse_constraints(body.get("base") or read_constraints_file())
+    # Like load_constraints(): invalid restrictions are left out (POST /check lists them)
+    bad = {(dev, r) for dev, r, _ in scheduler.invalid_restrictions(developers, scheduler.SHIFT_NAMES)}
+    developers = {dev: [r for r in restrictions if (dev, r) not in bad] for dev, restrictions in developers.items()}
+    base = scenarios.ScenarioBase(month, year, developers)
+    results = scenarios.evaluate_scenarios(base, [{"name": "base"}] + variants, workers=1,
+                                           solver=solver, attempts=attempts)
+    return {"results": results, "seconds": round(time.perf_counter() - start, 3)}
+
+
+class GenerationQueue:
+    """Runs generation jobs one at a time on a worker thread"""
+
+    def __init__(self, max_queue=DEFAULT_MAX_QUEUE):
+        self.jobs = queue.Queue(max_queue)
+        self.runs = 0
+        threading.Thread(target=self.work, daemon=True).start()
+
+    def submit(self, argv):
+        """Queue a run; returns a Future of run_generation()'s result (raises queue.Full)"""
+        future = Future()
+        self.jobs.put_nowait((argv, future))
+        return future
+
+    def work(self):
+        while True:
+            argv, future = self.jobs.get()
+            result = run_generation(argv)
+            self.runs += 1
+            future.set_result(result)
+            print(f"✓ Run {self.runs}: args {argv} exited {result['code']} in {result['seconds']}s", flush=True)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+        service = self.server
+        self.send_json(200, {
+            "status": "ok",
+            "queued": service.generations.jobs.qsize(),
+            "runs": service.generations.runs,
+            "uptime_seconds": round(time.monotonic() - service.started, 1),
+        })
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def do_POST(self):
+        if self.path in ("/check", "/scenarios"):
+            self.answer_now(check_constraints if self.path == "/check" else run_scenarios)
+            return
+        if self.path != "/generate":
+            self.send_json(404, {"error": f"Not found: {self.path}"})
+            return
+        try:
+            body = self.read_json()
+            argv = body.get("args", [])
+            if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+                raise ValueError("'args' must be a list of strings")
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        try:
+            future = self.server.generations.submit(argv)
+        except queue.Full:
+            self.send_json(503, {"error": "Too many queued generations, try again later"})
+            return
+        self.send_json(200, future.result())
+
+    def answer_now(self, handler):
+        """Answer a read-only request on this thread, without queueing behind generations"""
+        try:
+            body = self.read_json()
+            if handler is check_constraints and not body:
+                body = read_constraints_file()
+            result = handler(body)
+        except (OSError, ValueError, AttributeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            # Never leave the client without an answer
+            traceback.print_exc()
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_json(200, result)
+
+
+class SchedulerService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, max_queue=DEFAULT_MAX_QUEUE):
+        super().__init__(address, ServiceHandler)
+        self.generations = GenerationQueue(max_queue)
+        self.started = time.monotonic()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve on-call schedule generation over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to bind (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help=f'Generations that may wait before requests are refused (default: {DEFAULT_MAX_QUEUE})')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    loaded = warm_imports()
+    service = SchedulerService((args.host, args.port), args.max_queue)
+    print(f"✓ Scheduler service listening on http://{args.host}:{args.port}", flush=True)
+    print(f"  Preloaded: {', '.join(loaded) or 'nothing'}", flush=True)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
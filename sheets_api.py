@@ -0,0 +1,538 @@
+"""
+Minimal Google Sheets REST client used by the schedule upload
+
+Talks to the Sheets v4 (and, to find a spreadsheet by name, Drive v3) REST
+APIs directly with urllib, so an upload is a few small requests:
+
+    1. the values of column A of the year's worksheet, the index of its
+       month blocks
+    2. for a month that is already there, the values and background colors
+       of just that block
+    3. one batchUpdate: the whole block for a new month, or only the cells
+       whose value or color changed in the existing one
+
+429 and 5xx responses are retried with jittered exponential backoff.
+Clients can share a TokenBucket to stay under the per-minute quota when
+several uploads run at once. The API base URLs can be pointed at a local
+fake (see fake_sheets_server.py).
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from run_metrics import NO_METRICS
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4"
+DRIVE_API_URL = "https://www.googleapis.com/drive/v3"
+SCOPES = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5   # seconds
+BACKOFF_CAP = 32.0   # seconds
+
+# Sheets API quota: requests per minute per user
+SHEETS_REQUESTS_PER_MINUTE = 60
+RATE_LIMIT_BURST = 10
+
+
+class SheetsAPIError(Exception):
+    """A Sheets/Drive request failed (after retries, for retryable errors)"""
+
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+# Credentials and spreadsheet ids already resolved in this process, so a
+# long-running caller (scheduler_service.py) authorizes once per key file
+_token_providers = {}
+_spreadsheet_ids = {}
+
+
+def clear_caches():
+    """Forget cached credentials and spreadsheet ids (e.g. after a failed upload)"""
+    _token_providers.clear()
+    _spreadsheet_ids.clear()
+
+
+def service_account_token_provider(credentials_file):
+    """
+    Return a callable giving a valid access token for a service account key file
+
+    oauth2client caches the token and only refreshes it once it has expired;
+    the credentials object is reused until the key file changes.
+    """
+    key = (os.path.abspath(credentials_file), os.stat(credentials_file).st_mtime_ns)
+    if key not in _token_providers:
+        from oauth2client.service_account import ServiceAccountCredentials
+        creds = ServiceAccountCredentials.from_json_keyfile_name(credentials_file, SCOPES)
+        _token_providers[key] = lambda: creds.get_access_token().access_token
+    return _token_providers[key]
+
+
+def backoff_delay(attempt, retry_after=None, rng=random):
+    """Seconds to wait before retry number `attempt` (0-based): Retry-After if given, else full jitter"""
+    if retry_after is not None:
+        return retry_after
+    return rng.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by concurrent clients
+
+    Holds up to `burst` tokens and refills so that no 60-second window ever
+    sees more than `per_minute` requests (burst + 60 s of refill). A caller
+    that finds the bucket empty reserves the next token and sleeps until it
+    is due, outside the lock, so waiting callers are served in order.
+    """
+
+    def __init__(self, per_minute=SHEETS_REQUESTS_PER_MINUTE, burst=RATE_LIMIT_BURST,
+                 clock=time.monotonic, sleep=time.sleep):
+        if not 0 < burst < per_minute:
+            raise ValueError(f"burst must be between 0 and per_minute ({per_minute}), got {burst}")
+        self.rate = (per_minute - burst) / 60      # tokens per second
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, waiting until it is available; returns the seconds waited"""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class SheetsClient:
+    """One spreadsheet, accessed through the Sheets REST API"""
+
+    def __init__(self, spreadsheet_id, token_provider, base_url=SHEETS_API_URL,
+                 metrics=NO_METRICS, max_retries=MAX_RETRIES, sleep=time.sleep, rate_limiter=None):
+        self.spreadsheet_id = spreadsheet_id
+        self.token_provider = token_provider
+        self.base_url = base_url.rstrip("/")
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.rate_limiter = rate_limiter
+        self.title = spreadsheet_id
+
+    @property
+    def url(self):
+        return f"https://docs.google.com/spreadsheets/d/{self.spreadsheet_id}"
+
+    def request(self, name, method, url, body=None):
+        """Send one JSON request, retrying 429/5xx and connection errors; returns the decoded response"""
+        data = json.dumps(body).encode() if body is not None else None
+        for attempt in range(self.max_retries + 1):
+            req = urllib.request.Request(url, data=data, method=method, headers={
+                "Authorization": f"Bearer {self.token_provider()}",
+                "Content-Type": "application/json",
+            })
+            retry_after = None
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire()
+                if waited:
+                    self.metrics.count("rate_limit_wait_ms", round(waited * 1000))
+            try:
+                with self.metrics.api_call(name):
+                    with urllib.request.urlopen(req, timeout=60) as response:
+                        payload = response.read()
+                return json.loads(payload) if payload else {}
+            except urllib.error.HTTPError as e:
+                message = e.read().decode(errors="replace")
+                if e.code not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise SheetsAPIError(e.code, message) from None
+                if e.headers.get("Retry-After", "").isdigit():
+                    retry_after = int(e.headers["Retry-After"])
+            except urllib.error.URLError as e:
+                if attempt == self.max_retries:
+                    raise SheetsAPIError(None, str(e.reason)) from None
+            self.metrics.count("api_retries")
+            self.sleep(backoff_delay(attempt, retry_after))
+
+    def spreadsheet_url(self, suffix="", **params):
+        url = f"{self.base_url}/spreadsheets/{self.spreadsheet_id}{suffix}"
+        return f"{url}?{urllib.parse.urlencode(params)}" if params else url
+
+    def sheet_ids(self):
+        """Map worksheet title -> sheetId (metadata only, no cell data)"""
+        response = self.request("get_sheets", "GET",
+                                self.spreadsheet_url(fields="properties.title,sheets.properties(sheetId,title)"))
+        self.title = response.get("properties", {}).get("title", self.spreadsheet_id)
+        return {sheet["properties"]["title"]: sheet["properties"]["sheetId"] for sheet in response.get("sheets", [])}
+
+    def read_grid(self, title, cell_range="A:D", cell_fields="userEnteredValue,userEnteredFormat.backgroundColor"):
+        """
+        Some CellData fields (by default values and background colors) of an A1 range of a worksheet
+
+        Returns:
+            (sheet_id, rows): rows is a list of lists of CellData dicts from
+            the first row of the range, trailing empty rows and cells omitted
+        """
+        fields = f"properties.title,sheets(properties(sheetId,title),data.rowData.values({cell_fields}))"
+        response = self.request("get_grid", "GET", self.spreadsheet_url(
+            ranges=f"'{title}'!{cell_range}", includeGridData="true", fields=fields))
+        self.title = response.get("properties", {}).get("title", self.spreadsheet_id)
+        sheet = response["sheets"][0]
+        data = sheet.get("data", [{}])[0]
+        return sheet["properties"]["sheetId"], [row.get("values", []) for row in data.get("rowData", [])]
+
+    def batch_update(self, requests):
+        """Apply a list of batchUpdate requests in one call"""
+        return self.request("batch_update", "POST", self.spreadsheet_url(":batchUpdate"), {"requests": requests})
+
+
+def find_spreadsheet_id(name, token_provider, drive_url=DRIVE_API_URL, metrics=NO_METRICS, rate_limiter=None):
+    """Look up a spreadsheet id by its exact name through the Drive API (cached per process)"""
+    if (name, drive_url) in _spreadsheet_ids:
+        return _spreadsheet_ids[(name, drive_url)]
+    query = f"name = '{name}' and mimeType = 'application/vnd.google-apps.spreadsheet' and trashed = false"
+    url = f"{drive_url.rstrip('/')}/files?" + urllib.parse.urlencode({"q": query, "fields": "files(id,name)"})
+    client = SheetsClient(None, token_provider, metrics=metrics, rate_limiter=rate_limiter)
+    files = client.request("open", "GET", url).get("files", [])
+    if not files:
+        raise SheetsAPIError(404, f"Spreadsheet '{name}' not found (is it shared with the service account?)")
+    _spreadsheet_ids[(name, drive_url)] = files[0]["id"]
+    return files[0]["id"]
+
+
+# ============================================================================
+# REQUEST BUILDERS
+# ============================================================================
+
+def cell_value(value):
+    """CellData.userEnteredValue for a Python value (None -> empty cell)"""
+    if value is None or value == "":
+        return {}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
+
+def grid_range(sheet_id, start_row, end_row, start_col, end_col):
+    """GridRange from zero-based, end-exclusive row/column indexes"""
+    return {
+        "sheetId": sheet_id,
+        "startRowIndex": start_row,
+        "endRowIndex": end_row,
+        "startColumnIndex": start_col,
+        "endColumnIndex": end_col,
+    }
+
+
+def color_runs(values):
+    """Split a column of values into (start, end, value) runs of equal adjacent values (end exclusive)"""
+    runs = []
+    for idx, value in enumerate(values):
+        if runs and runs[-1][2] == value and runs[-1][1] == idx:
+            runs[-1] = (runs[-1][0], idx + 1, value)
+        else:
+            runs.append((idx, idx + 1, value))
+    return runs
+
+
+def column_letter(column):
+    """A1-notation letters of a 1-based column number (1 -> A, 27 -> AA)"""
+    letters = ""
+    while column:
+        column, remainder = divmod(column - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def block_width(rows):
+    """Columns of a month block: the day, one per shift column of the rows, the day of week"""
+    return 2 + (len(rows[0]['shifts']) if rows else 2)
+
+
+def schedule_block_requests(sheet_id, month_row, rows, month_name, colors):
+    """
+    batchUpdate requests that write one month block with all its formatting
+
+    Layout (1-based month_row): month name in column A, then one row per day
+    with A=day, then the developer of each shift column (B=night shift,
+    C=day shift for Day/Night schedules), then the day of week. Developer
+    cells are centered and colored; runs of the same developer down a column
+    are colored with a single range request.
+
+    Args:
+        sheet_id: Target worksheet id
+        month_row: 1-based row of the month name
+        rows: Rows from schedule_rows()
+        month_name: Month name (e.g., "Feb")
+        colors: Dict of developer name -> {"red", "green", "blue"} (0-1)
+    """
+    header = month_row - 1          # zero-based
+    first = header + 1              # first day row, zero-based
+    last = first + len(rows)        # exclusive
+
+    values = [{"values": [cell_value(month_name)]}]
+    for row in rows:
+        values.append({"values": [cell_value(row['day_of_month'])]
+                       + [cell_value(name) for name in row['shifts'].values()]
+                       + [cell_value(row['day_of_week'])]})
+
+    requests = [
+        {"updateCells": {
+            "rows": values,
+            "fields": "userEnteredValue",
+            "start": {"sheetId": sheet_id, "rowIndex": header, "columnIndex": 0},
+        }},
+        # Bold and larger font for month name
+        {"repeatCell": {
+            "range": grid_range(sheet_id, header, header + 1, 0, 1),
+            "cell": {"userEnteredFormat": {"textFormat": {"bold": True, "fontSize": 12}}},
+            "fields": "userEnteredFormat.textFormat",
+        }},
+    ]
+    if rows:
+        requests.append({"repeatCell": {
+            "range": grid_range(sheet_id, first, last, 1, block_width(rows) - 1),
+            "cell": {"userEnteredFormat": {"horizontalAlignment": "CENTER"}},
+            "fields": "userEnteredFormat.horizontalAlignment",
+        }})
+    requests.extend(color_requests(sheet_id, first, rows, colors))
+    return requests
+
+
+def color_requests(sheet_id, first_row, rows, colors):
+    """Background color requests for the developer columns (B onwards), one per run of equal cells"""
+    requests = []
+    labels = list(rows[0]['shifts']) if rows else []
+    for column, label in enumerate(labels, start=1):
+        for start, end, developer in color_runs([row['shifts'][label] for row in rows]):
+            if developer in colors:
+                requests.append({"repeatCell": {
+                    "range": grid_range(sheet_id, first_row + start, first_row + end, column, column + 1),
+                    "cell": {"userEnteredFormat": {"backgroundColor": colors[developer]}},
+                    "fields": "userEnteredFormat.backgroundColor",
+                }})
+    return requests
+
+
+def add_sheet_request(sheet_id, title, rows=500, cols=10):
+    """addSheet request with a caller-chosen id, so later requests in the same batch can target it"""
+    return {"addSheet": {"properties": {
+        "sheetId": sheet_id,
+        "title": title,
+        "gridProperties": {"rowCount": rows, "columnCount": cols},
+    }}}
+
+
+def next_append_row(used_rows):
+    """1-based row for a new month block: row 1 on an empty sheet, else two blank rows after the last used row"""
+    return used_rows + 3 if used_rows else 1
+
+
+# ============================================================================
+# MONTH BLOCK INDEX AND DIFFS
+# ============================================================================
+
+def grid_value(cell):
+    """The userEnteredValue of a CellData dict (None if empty)"""
+    return cell.get("userEnteredValue") or None
+
+
+def color_key(color):
+    """Compare colors at the 8-bit precision Sheets stores; white and unset are the same"""
+    if not color:
+        return None
+    key = tuple(round(color.get(channel, 0) * 255) for channel in ("red", "green", "blue"))
+    return None if key == (255, 255, 255) else key
+
+
+def grid_cell(rows, row, column):
+    """CellData at zero-based (row, column) of a read_grid() result ({} if empty)"""
+    if row < len(rows) and column < len(rows[row]):
+        return rows[row][column]
+    return {}
+
+
+def month_blocks(grid, month_names, year):
+    """
+    Index of the month blocks in a worksheet, built from column A
+
+    A block is a month name followed by rows numbered with the days. Column
+    A does not hold the year: the worksheet is the year's (see
+    upsert_schedule()), so its blocks are keyed with that year. If a month
+    appears more than once (e.g. from older append-only uploads) the last
+    block wins.
+
+    Returns:
+        Dict of (year, month name) -> (zero-based header row, number of day rows)
+    """
+    blocks = {}
+    current = None
+    for idx in range(len(grid)):
+        value = grid_value(grid_cell(grid, idx, 0)) or {}
+        if value.get("stringValue") in month_names:
+            current = (year, value["stringValue"])
+            blocks[current] = (idx, 0)
+        elif current and "numberValue" in value:
+            header, days = blocks[current]
+            blocks[current] = (header, days + 1)
+        else:
+            current = None
+    return blocks
+
+
+def used_rows(grid):
+    """Number of rows up to the last non-empty cell in column A"""
+    for idx in range(len(grid) - 1, -1, -1):
+        if grid_value(grid_cell(grid, idx, 0)):
+            return idx + 1
+    return 0
+
+
+def desired_cells(row, colors):
+    """CellData for the columns of one schedule row, with developer colors on the shift columns"""
+    cells = [cell_value(row['day_of_month'])]
+    for name in row['shifts'].values():
+        cell = cell_value(name)
+        if name in colors:
+            cell["userEnteredFormat"] = {"backgroundColor": colors[name]}
+        cells.append(cell)
+    cells.append(cell_value(row['day_of_week']))
+    return cells
+
+
+def block_diff_requests(sheet_id, first_row, grid, rows, colors):
+    """
+    updateCells requests for only the cells of a month block that differ from the sheet
+
+    Changed cells are grouped per column into runs of adjacent rows, so a
+    one-shift correction is one small request.
+
+    Args:
+        sheet_id: Target worksheet id
+        first_row: Zero-based row of the block's first day
+        grid: read_grid() rows of the block's days, from first_row on
+        rows: Rows from schedule_rows()
+        colors: Dict of developer name -> {"red", "green", "blue"}
+
+    Returns:
+        (requests, number of changed cells)
+    """
+    wanted = [desired_cells(row, colors) for row in rows]
+    requests = []
+    changed = 0
+    width = block_width(rows)
+    for column in range(width):
+        colored = 0 < column < width - 1
+        fields = "userEnteredValue,userEnteredFormat.backgroundColor" if colored else "userEnteredValue"
+        dirty = []
+        for idx, cells in enumerate(wanted):
+            current = grid_cell(grid, idx, column)
+            target = cells[column]
+            if grid_value(current) != grid_value(target) or (colored and (
+                    color_key(current.get("userEnteredFormat", {}).get("backgroundColor"))
+                    != color_key(target.get("userEnteredFormat", {}).get("backgroundColor")))):
+                dirty.append(idx)
+        changed += len(dirty)
+        # idx - n stays constant along a run of consecutive dirty rows
+        for start, end, _ in color_runs([idx - n for n, idx in enumerate(dirty)]):
+            requests.append({"updateCells": {
+                "rows": [{"values": [wanted[idx][column]]} for idx in dirty[start:end]],
+                "fields": fields,
+                "start": {"sheetId": sheet_id, "rowIndex": first_row + dirty[start], "columnIndex": column},
+            }})
+    return requests, changed
+
+
+def upsert_schedule(client, worksheet_name, rows, year, month_name, colors, month_names):
+    """
+    Write a month block to a worksheet: update it in place if the month is there, else append it
+
+    Blocks are found from column A's values alone; only an existing block's
+    own cells are then read back, and it only receives the cells whose
+    value or background color changed (nothing is sent if the sheet already
+    matches). The worksheet is created (in the same batch) if missing; a
+    retried creation that finds its own worksheet already there counts as
+    done, so retrying the non-idempotent addSheet batch is safe.
+
+    Args:
+        client: SheetsClient
+        worksheet_name: Worksheet title, which must contain the year (e.g.,
+            "On call schedule 2026"): month names alone would let one
+            year's block overwrite another's
+        rows: Rows from schedule_rows()
+        year: Year of the month
+        month_name: Month name (e.g., "Feb")
+        colors: Dict of developer name -> {"red", "green", "blue"} (0-1)
+        month_names: All month names, used to recognize blocks in column A
+
+    Returns:
+        Dict with action ("created", "appended", "updated" or "unchanged"),
+        month_row (1-based), requests (count) and cells_changed
+
+    Raises:
+        ValueError: If worksheet_name does not contain the year
+    """
+    if str(year) not in worksheet_name:
+        raise ValueError(f"Worksheet '{worksheet_name}' must have the year ({year}) in its name")
+    width = block_width(rows)
+    try:
+        sheet_id, column = client.read_grid(worksheet_name, "A:A", "userEnteredValue")
+    except SheetsAPIError as e:
+        # A range on a missing worksheet is a 400; anything else is a real error
+        sheet_ids = client.sheet_ids()
+        if e.status != 400 or worksheet_name in sheet_ids:
+            raise
+        # A random id can't collide with another upload adding its worksheet at the same time
+        sheet_id = random.randrange(1, 2 ** 31)
+        while sheet_id in sheet_ids.values():
+            sheet_id = random.randrange(1, 2 ** 31)
+        requests = [add_sheet_request(sheet_id, worksheet_name, cols=max(10, width))]
+        requests.extend(schedule_block_requests(sheet_id, 1, rows, month_name, colors))
+        try:
+            client.batch_update(requests)
+        except SheetsAPIError as e:
+            # A batch is applied atomically, so "already exists" can mean a retry whose first
+            # attempt went through (its response lost to a 5xx): done if the worksheet has our id
+            if e.status != 400:
+                raise
+            existing = client.sheet_ids().get(worksheet_name)
+            if existing is None:
+                raise
+            if existing != sheet_id:
+                # Another upload created it meanwhile: write into that one
+                return upsert_schedule(client, worksheet_name, rows, year, month_name, colors, month_names)
+        return {"action": "created", "month_row": 1, "requests": len(requests),
+                "cells_changed": len(rows) * width + 1}
+
+    block = month_blocks(column, month_names, year).get((year, month_name))
+    if block and block[1] == len(rows):
+        header, days = block
+        # 1-based rows of the block's days: header + 2 to header + 1 + days
+        _, grid = client.read_grid(worksheet_name, f"A{header + 2}:{column_letter(width)}{header + 1 + days}")
+        requests, changed = block_diff_requests(sheet_id, header + 1, grid, rows, colors)
+        if requests:
+            client.batch_update(requests)
+        return {"action": "updated" if requests else "unchanged", "month_row": header + 1,
+                "requests": len(requests), "cells_changed": changed}
+
+    month_row = next_append_row(used_rows(column))
+    requests = schedule_block_requests(sheet_id, month_row, rows, month_name, colors)
+    client.batch_update(requests)
+    return {"action": "appended", "month_row": month_row, "requests": len(requests),
+            "cells_changed": len(rows) * width + 1}
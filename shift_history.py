@@ -0,0 +1,144 @@
+"""
+Local history of published on-call assignments (SQLite)
+
+Keeps every assigned shift so the scheduler can carry fairness across
+months without reading the Google Sheet back. Shifts are keyed by period
+(year * 12 + month - 1), so a rolling window of months is a single range
+scan on the primary key.
+
+    from shift_history import open_history, record_schedule, carry_over_counts
+    history = open_history()
+    carry = carry_over_counts(history, developers, month, year, months=12)
+    schedule = build_schedule(month, year, developers, carry_over=carry)
+    record_schedule(history, schedule)
+"""
+
+import calendar
+import os
+import sqlite3
+from datetime import date
+
+from on_call_scheduler_with_sheets import MONTH_NAMES, SHIFT_NAMES, SHIFT_TYPES, schedule_columns
+
+DEFAULT_HISTORY_DB = "data/history.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    period INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    shift TEXT NOT NULL,
+    developer TEXT NOT NULL,
+    shift_type TEXT NOT NULL,
+    PRIMARY KEY (period, day, shift)
+) WITHOUT ROWID;
+-- Older databases have a per-developer index nothing queries; it only slows inserts
+DROP INDEX IF EXISTS assignments_by_developer;
+"""
+
+
+def period_of(month, year):
+    """Months since year 0 (e.g. Jan 2026 -> 24312); consecutive months are consecutive periods"""
+    return year * 12 + month - 1
+
+
+def open_history(path=DEFAULT_HISTORY_DB):
+    """Open (and create if needed) the history database"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def record_schedule(conn, schedule):
+    """
+    Store a schedule's assignments, replacing anything recorded for the same months
+
+    Rerunning a month therefore updates its history instead of double counting it.
+    Only the primary tier is recorded; backups do not count towards fairness.
+    """
+    slots = schedule["slots"]
+    days = slots["days"]
+    periods = sorted({period_of(day.month, day.year) for day in days})
+    rows = []
+    for slot, developer in enumerate(schedule["assignments"]):
+        if developer:
+            day = days[slots["day"][slot]]
+            rows.append((period_of(day.month, day.year), day.day, slots["shift"][slot],
+                         developer, SHIFT_TYPES[slots["type"][slot]]))
+    with conn:
+        conn.executemany("DELETE FROM assignments WHERE period = ?", [(p,) for p in periods])
+        conn.executemany("INSERT INTO assignments VALUES (?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def window_totals(conn, month, year, months=12):
+    """
+    Shift counts per developer and type over the `months` months before month/year
+
+    Returns:
+        Dict of developer -> {"special", "night", "day"}
+    """
+    end = period_of(month, year)
+    totals = {}
+    cursor = conn.execute(
+        "SELECT developer, shift_type, COUNT(*) FROM assignments "
+        "WHERE period >= ? AND period < ? GROUP BY developer, shift_type",
+        (end - months, end),
+    )
+    for developer, shift_type, count in cursor:
+        totals.setdefault(developer, {name: 0 for name in SHIFT_TYPES})[shift_type] = count
+    return totals
+
+
+def carry_over_counts(conn, developers, month, year, months=12):
+    """
+    Rolling-window counts to seed build_schedule(carry_over=...)
+
+    Counts are taken relative to the lowest count per shift type among the
+    given developers, so only the differences between people carry over.
+    Developers without history start at zero.
+    """
+    totals = window_totals(conn, month, year, months)
+    counts = {dev: dict(totals.get(dev, {name: 0 for name in SHIFT_TYPES})) for dev in developers}
+    for name in SHIFT_TYPES:
+        floor = min((c[name] for c in counts.values()), default=0)
+        for c in counts.values():
+            c[name] -= floor
+    return counts
+
+
+def recorded_rows(conn, month, year, shifts=SHIFT_NAMES):
+    """
+    Rows in schedule_rows() format for a recorded month (unassigned shifts are None)
+
+    Recorded shifts that are not in the shift template are left out.
+    """
+    labels = {shifts[shift_index]: label for shift_index, _, label in schedule_columns(shifts)}
+    rows = [
+        {"day_of_month": day, "shifts": dict.fromkeys(labels.values()),
+         "day_of_week": date(year, month, day).strftime("%A")}
+        for day in range(1, calendar.monthrange(year, month)[1] + 1)
+    ]
+    cursor = conn.execute("SELECT day, shift, developer FROM assignments WHERE period = ?",
+                          (period_of(month, year),))
+    for day, shift, developer in cursor:
+        if shift in labels:
+            rows[day - 1]["shifts"][labels[shift]] = developer
+    return rows
+
+
+def year_rows(conn, year, shifts=SHIFT_NAMES):
+    """
+    Yield (month_name, rows) for every recorded month of a year, one month at a time
+
+    Suitable as the `months` argument of write_excel_workbook().
+    """
+    periods = [period for (period,) in conn.execute(
+        "SELECT DISTINCT period FROM assignments WHERE period >= ? AND period < ? ORDER BY period",
+        (period_of(1, year), period_of(1, year + 1)),
+    )]
+    for period in periods:
+        month = period % 12 + 1
+        yield MONTH_NAMES[month-1], recorded_rows(conn, month, year, shifts)
@@ -0,0 +1,39 @@
+"""Helpers shared by the solver tests"""
+
+import random
+
+import on_call_scheduler_with_sheets as scheduler
+from constraint_rules import HorizonMasks
+
+SHIFTS_3X8 = ("Morning", "Evening", "Night")
+
+
+def random_team(seed, size, shifts=scheduler.SHIFT_NAMES, month=3, restrictions=6):
+    """size developers with a few random single-shift restrictions each"""
+    rng = random.Random(seed)
+    return {f"dev{k}": [f"{rng.randint(1, 28):02d}/{month:02d} {rng.choice(shifts)}" for _ in range(restrictions)]
+            for k in range(size)}
+
+
+def violations(schedule, developers, rules=scheduler.DEFAULT_REST_RULES):
+    """Restriction, rest-rule and two-tiers-of-one-slot breaches of every tier of a schedule"""
+    slots = schedule["slots"]
+    horizon = HorizonMasks(slots["days"], slots["shifts"])
+    masks = {dev: horizon.restriction_mask(restrictions) for dev, restrictions in developers.items()}
+    checker = scheduler.RestChecker(rules, slots)
+    tiers = scheduler.schedule_tiers(schedule)
+    found = []
+    for slot in range(len(slots["type"])):
+        names = [tier[slot] for tier in tiers if tier[slot] is not None]
+        if len(set(names)) != len(names):
+            found.append(("two tiers", slot))
+        for name in names:
+            if masks[name] >> slot & 1:
+                found.append(("restriction", slot))
+    for name in developers:
+        # Rest rules count the shifts of every tier
+        held = [name if any(tier[slot] == name for tier in tiers) else None for slot in range(len(slots["type"]))]
+        for slot, holder in enumerate(held):
+            if holder is not None and not checker.allows(held, slot, name):
+                found.append(("rest", slot))
+    return found
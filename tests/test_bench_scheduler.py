@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from bench_scheduler import generate_constraints
+from constraint_rules import invalid_restrictions
+from on_call_scheduler_with_sheets import SHIFT_NAMES, build_slot_table, horizon_days, load_data_from_json
+
+
+def test_generated_document_loads(tmp_path):
+    path = tmp_path / "constraints.json"
+    path.write_text(json.dumps(generate_constraints(12, 9, months=2, seed=3)))
+    month, year, developers = load_data_from_json(str(path))
+    assert (month, year) == (9, 2026)
+    assert len(developers) == 12
+    assert invalid_restrictions(developers, SHIFT_NAMES) == []
+
+
+@pytest.mark.parametrize("density", [0.05, 0.2, 0.4])
+def test_density_is_the_blocked_fraction(density):
+    document = generate_constraints(200, 10, density=density, seed=1)
+    slots = len(build_slot_table(horizon_days(10, 2026), None)["type"])
+    blocked = sum(len(dev["restrictions"]) for dev in document["developers"].values()) / (200 * slots)
+    assert abs(blocked - density) < 0.05
+
+
+def test_same_seed_same_document():
+    assert generate_constraints(30, 2, seed=7) == generate_constraints(30, 2, seed=7)
+    assert generate_constraints(30, 2, seed=7) != generate_constraints(30, 2, seed=8)
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import pytest
+
+from constraint_rules import HorizonMasks, invalid_restrictions, parse_restriction
+
+SHIFTS = ("Day", "Night")
+
+
+def horizon(first, days, shifts=SHIFTS):
+    return HorizonMasks([first + timedelta(days=k) for k in range(days)], shifts)
+
+
+def slots_of(mask):
+    return [slot for slot in range(mask.bit_length()) if mask >> slot & 1]
+
+
+@pytest.mark.parametrize("text, rule", [
+    ("14/03 Night", ("dates", (3, 14), (3, 14), "night")),
+    ("14/03", ("dates", (3, 14), (3, 14), None)),
+    ("10/03-20/03 day", ("dates", (3, 10), (3, 20), "day")),
+    ("28/12-03/01", ("dates", (12, 28), (1, 3), None)),
+    ("10-20 Day", ("days", 10, 20, "day")),
+    ("every Tuesday Night", ("weekly", 1, "night")),
+    ("every fridays", ("weekly", 4, None)),
+])
+def test_parse_restriction(text, rule):
+    assert parse_restriction(text) == rule
+
+
+@pytest.mark.parametrize("text", ["31/02", "14/13 Day", "20-10", "every Funday", "next week"])
+def test_parse_restriction_rejects(text):
+    with pytest.raises(ValueError):
+        parse_restriction(text)
+
+
+def test_invalid_restrictions_checks_shift_names():
+    problems = invalid_restrictions({"Alex": ["01/03 Evening", "02/03 Day", "bogus"]}, SHIFTS)
+    assert [(dev, text) for dev, text, _ in problems] == [("Alex", "01/03 Evening"), ("Alex", "bogus")]
+
+
+def test_single_shift_and_whole_day():
+    masks = horizon(date(2026, 3, 1), 31)
+    assert slots_of(masks.restriction_mask(["14/03 Night"])) == [13 * 2 + 1]
+    assert slots_of(masks.restriction_mask(["14/03"])) == [26, 27]
+
+
+def test_date_range_wraps_over_new_year():
+    masks = horizon(date(2025, 12, 1), 62)
+    days = {slot // 2 for slot in slots_of(masks.restriction_mask(["30/12-02/01 Day"]))}
+    assert days == {29, 30, 31, 32}
+
+
+def test_day_range_repeats_every_month():
+    masks = horizon(date(2026, 1, 1), 59)  # January and February
+    days = sorted({slot // 2 for slot in slots_of(masks.restriction_mask(["30-31"]))})
+    assert days == [29, 30]  # February has no 30th or 31st
+
+
+def test_weekly_rule():
+    masks = horizon(date(2026, 3, 1), 31)  # 1 March 2026 is a Sunday
+    slots = slots_of(masks.restriction_mask(["every Tuesday Night"]))
+    assert [date(2026, 3, 1 + slot // 2).weekday() for slot in slots] == [1] * 5
+    assert all(slot % 2 == 1 for slot in slots)
+
+
+def test_custom_shift_template():
+    masks = horizon(date(2026, 3, 1), 2, ("Morning", "Evening", "Night"))
+    assert slots_of(masks.restriction_mask(["02/03 Evening"])) == [4]
+    assert slots_of(masks.restriction_mask(["01/03"])) == [0, 1, 2]
+
+
+def test_shift_names_match_the_template_case_insensitively():
+    shifts = ("Day", "OnCall")
+    masks = horizon(date(2026, 3, 1), 2, shifts)
+    assert slots_of(masks.restriction_mask(["02/03 OnCall"])) == [3]
+    assert slots_of(masks.restriction_mask(["02/03 oncall"])) == [3]
+    assert invalid_restrictions({"Alex": ["01/03 ONCALL", "01/03 Oncall", "01/03 Night"]}, shifts) == [
+        ("Alex", "01/03 Night", "Unknown shift 'Night' in restriction '01/03 Night' (expected one of: Day, OnCall)")]
+
+
+def test_leap_day_outside_leap_year_matches_nothing():
+    masks = horizon(date(2026, 2, 1), 28)
+    assert masks.restriction_mask(["29/02"]) == 0
@@ -0,0 +1,35 @@
+import csv
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import SHIFTS_3X8, random_team
+
+
+def read(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_streamed_rows_match_the_template(tmp_path):
+    schedule = scheduler.build_schedule(3, 2026, random_team(0, 6), seed=1, holidays_file=None)
+    path = tmp_path / "schedule.csv"
+    scheduler.write_schedule_csv(scheduler.iter_schedule_rows(schedule), "Mar", str(path))
+    lines = read(path)
+    assert lines[0] == scheduler.SCHEDULE_COLUMNS
+    assert lines[1] == ["Mar", "", "", ""]
+    assert len(lines) == 2 + 31
+    first = scheduler.schedule_rows(schedule)[0]
+    assert lines[2] == ["1"] + list(first["shifts"].values()) + [first["day_of_week"]]
+
+
+def test_custom_template_headers(tmp_path):
+    schedule = scheduler.build_schedule(3, 2026, random_team(0, 6, SHIFTS_3X8), seed=1, holidays_file=None,
+                                        shifts=SHIFTS_3X8)
+    path = tmp_path / "schedule.csv"
+    scheduler.write_schedule_csv(scheduler.iter_schedule_rows(schedule), "Mar", str(path))
+    assert read(path)[0] == ["Day of Month", "Morning Shift", "Evening Shift", "Night Shift", "Day of Week"]
+
+
+def test_empty_month(tmp_path):
+    path = tmp_path / "schedule.csv"
+    scheduler.write_schedule_csv(iter(()), "Mar", str(path))
+    assert read(path) == [scheduler.SCHEDULE_COLUMNS, ["Mar", "", "", ""]]
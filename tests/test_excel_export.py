@@ -0,0 +1,36 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+@pytest.fixture(scope="module")
+def schedule():
+    return scheduler.build_schedule(2, 2026, random_team(0, 6, month=2), seed=1, months=2, holidays_file=None)
+
+
+def test_one_worksheet_per_month(schedule, tmp_path):
+    path = tmp_path / "schedule.xlsx"
+    assert scheduler.write_excel_workbook(scheduler.month_rows(schedule), str(path)) == 2
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Feb", "Mar"]
+    rows = list(workbook["Feb"].iter_rows(values_only=True))
+    assert rows[0][0] == "Feb"
+    assert rows[1][0] == "Day of Month" and rows[1][-1] == "Day of Week"
+    assert rows[2][0] == 1 and rows[-1][0] == 28
+    assert len(rows) == 2 + 28
+
+
+def test_stacked_layout(schedule, tmp_path):
+    path = tmp_path / "schedule.xlsx"
+    scheduler.write_excel_workbook(scheduler.month_rows(schedule), str(path), layout="stacked")
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Schedule"]
+    assert workbook["Schedule"].max_row == (2 + 28) + 2 + (2 + 31)
+
+
+def test_unknown_layout(tmp_path):
+    with pytest.raises(ValueError):
+        scheduler.write_excel_workbook([], str(tmp_path / "schedule.xlsx"), layout="columns")
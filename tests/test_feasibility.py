@@ -0,0 +1,22 @@
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team
+
+
+def test_roomy_team_is_feasible():
+    report = scheduler.feasibility_report(3, 2026, random_team(0, 9), holidays_file=None)
+    assert report["feasible"]
+    assert report["problems"] == []
+
+
+def test_shift_nobody_can_take():
+    developers = {"A": ["05/03 Day"], "B": ["05/03 Day"], "C": ["05/03 Day"]}
+    report = scheduler.feasibility_report(3, 2026, developers, holidays_file=None)
+    assert not report["feasible"]
+    problem = next(p for p in report["problems"] if p["cause"] == "restrictions")
+    assert problem["uncovered"] == ["05/03 Day"]
+    assert problem["restricted"] == {name: ["05/03 Day"] for name in developers}
+
+
+def test_invalid_restrictions_are_reported():
+    report = scheduler.feasibility_report(3, 2026, {"A": ["31/02 Day"], "B": [], "C": []}, holidays_file=None)
+    assert [entry["developer"] for entry in report["invalid"]] == ["A"]
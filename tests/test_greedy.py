@@ -0,0 +1,36 @@
+import collections
+import random
+
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team, violations
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_keeps_restrictions_and_fills_every_shift(seed):
+    developers = random_team(seed, 8)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, holidays_file=None)
+    assert violations(schedule, developers) == []
+    assert schedule["assignments"].count(None) == 0
+
+
+def test_restricted_everywhere_gets_nothing():
+    developers = {"Busy": ["01/03-31/03"], "A": [], "B": [], "C": []}
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=4, holidays_file=None)
+    assert "Busy" not in schedule["assignments"]
+
+
+def test_reproducible_per_seed():
+    developers = random_team(3, 7)
+    runs = [scheduler.build_schedule(3, 2026, developers, seed=9, holidays_file=None)["assignments"]
+            for _ in range(2)]
+    assert runs[0] == runs[1]
+
+
+def test_pick_developer_is_uniform():
+    rng = random.Random(0)
+    candidates = 1 | 1 << 1 | 1 << 60 | 1 << 200
+    picks = collections.Counter(scheduler.pick_developer(candidates, 201, rng) for _ in range(20000))
+    assert set(picks) == {0, 1, 60, 200}
+    assert min(picks.values()) > 4500
@@ -0,0 +1,48 @@
+import json
+from datetime import date
+
+import pytest
+
+from holiday_calendar import holiday_slots, israeli_holidays, year_slot
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2024, {date(2024, 4, 23): "Passover", date(2024, 5, 14): "Independence Day",
+            date(2024, 6, 12): "Shavuot", date(2024, 10, 3): "Rosh Hashanah", date(2024, 10, 12): "Yom Kippur"}),
+    (2025, {date(2025, 4, 13): "Passover", date(2025, 5, 1): "Independence Day",
+            date(2025, 6, 2): "Shavuot", date(2025, 9, 23): "Rosh Hashanah", date(2025, 10, 2): "Yom Kippur"}),
+    (2026, {date(2026, 4, 2): "Passover", date(2026, 4, 22): "Independence Day",
+            date(2026, 5, 22): "Shavuot", date(2026, 9, 12): "Rosh Hashanah", date(2026, 9, 21): "Yom Kippur"}),
+])
+def test_known_dates(year, expected):
+    holidays = israeli_holidays(year)
+    for day, name in expected.items():
+        assert holidays[day] == name
+
+
+def test_independence_day_moves_off_friday_and_monday():
+    # 5 Iyar fell on a Friday in 2025 (moved to Thursday) and on a Monday in 2024 (moved to Tuesday)
+    assert israeli_holidays(2025)[date(2025, 4, 30)] == "Memorial Day"
+    assert israeli_holidays(2024)[date(2024, 5, 13)] == "Memorial Day"
+
+
+def test_sukkot_spans_eight_days():
+    sukkot = [day for day, name in israeli_holidays(2025).items() if name == "Sukkot"]
+    assert sukkot == [date(2025, 10, day) for day in range(7, 15)]
+
+
+def test_holiday_slots_mark_both_shifts():
+    bits = holiday_slots(2025, None)
+    yom_kippur = date(2025, 10, 2)
+    assert bits >> year_slot(yom_kippur, 0) & 1
+    assert bits >> year_slot(yom_kippur, 1) & 1
+    assert not bits >> year_slot(date(2025, 10, 1), 0) & 1
+
+
+def test_overrides_add_and_remove(tmp_path):
+    path = tmp_path / "holidays.json"
+    path.write_text(json.dumps({"add": ["2025-03-10 Night"], "remove": ["2025-10-02"]}))
+    bits = holiday_slots(2025, str(path))
+    assert bits >> year_slot(date(2025, 3, 10), 1) & 1
+    assert not bits >> year_slot(date(2025, 3, 10), 0) & 1
+    assert not bits >> year_slot(date(2025, 10, 2), 0) & 1
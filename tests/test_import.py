@@ -0,0 +1,16 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_import_has_no_side_effects(tmp_path):
+    # Run from an empty directory: importing must not read or write files, or pull in heavy backends
+    code = ("import sys, on_call_scheduler_with_sheets; "
+            "print(sorted(m for m in ('openpyxl', 'oauth2client', 'pandas') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True,
+                            env={"PYTHONPATH": str(ROOT)}, check=True)
+    assert result.stdout.strip() == "[]"
+    assert result.stderr == ""
+    assert list(tmp_path.iterdir()) == []
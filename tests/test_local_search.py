@@ -0,0 +1,33 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team, violations
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_improve_keeps_schedule_valid(seed):
+    rules = scheduler.RestRules(min_gap=2)
+    developers = random_team(seed, 8)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, holidays_file=None, rest_rules=rules)
+    improved = scheduler.improve_schedule(schedule, developers, iterations=3000, seed=seed)
+    assert violations(improved, developers, rules) == []
+    assert improved["improvement"]["cost_after"] <= improved["improvement"]["cost_before"]
+    assert improved["assignments"].count(None) <= schedule["assignments"].count(None)
+
+
+def test_night_cap_also_keeps_developers_off_special_nights():
+    slots = scheduler.build_schedule(3, 2026, {"A": []}, seed=0, holidays_file=None)["slots"]
+    # Only A may take weekday nights, so A sits at the night cap
+    weekday_nights = [f"{date} Night" for date, shift_type in zip(slots["date"], slots["type"])
+                      if shift_type == scheduler.NIGHT]
+    developers = {"A": [], "B": weekday_nights, "C": weekday_nights}
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=0, holidays_file=None)
+    night_cap = scheduler.shift_caps(slots, len(developers))[1]
+    assert schedule["developer_shift_count"]["A"]["night"] == night_cap
+
+    def special_nights(assignments):
+        return sum(1 for slot, dev in enumerate(assignments) if dev == "A"
+                   and slots["type"][slot] == scheduler.SPECIAL and slots["shift"][slot] == "Night")
+
+    improved = scheduler.improve_schedule(schedule, developers, iterations=50000, seed=0)
+    assert special_nights(improved["assignments"]) <= special_nights(schedule["assignments"])
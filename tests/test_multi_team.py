@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+from multi_team import load_teams
+
+
+def write_teams(tmp_path, document):
+    path = tmp_path / "teams.json"
+    path.write_text(json.dumps(document))
+    return str(path)
+
+
+def test_defaults_are_filled_in(tmp_path):
+    document = load_teams(write_teams(tmp_path, {"teams": [{"name": "Data", "constraints": "data/c.json"}]}))
+    team = document["teams"][0]
+    assert team["worksheet_name"] == "Data on call {year}"
+    assert team["output_dir"].endswith("Data")
+
+
+@pytest.mark.parametrize("document", [
+    {"teams": []},
+    {"teams": [{"name": "Data"}]},
+    {"teams": [{"name": "Data", "constraints": "c.json", "colour": {}}]},
+    {"teams": [{"name": "Data", "constraints": "c.json", "tiers": 2, "solver": "optimal"}]},
+    {"teams": [{"name": "Data", "constraints": "c.json", "rest_rules": {"min_gap": -1}}]},
+    {"teams": [{"name": "Data", "constraints": "a.json"}, {"name": "Data", "constraints": "b.json"}]},
+    {"teams": [{"name": "Data", "constraints": "c.json", "worksheet_name": "Data on call"}]},
+    {"requests_per_minute": 0, "teams": [{"name": "Data", "constraints": "c.json"}]},
+    {"requests_per_minute": 10, "burst": 10, "teams": [{"name": "Data", "constraints": "c.json"}]},
+])
+def test_invalid_teams_file(tmp_path, document):
+    with pytest.raises(ValueError):
+        load_teams(write_teams(tmp_path, document))
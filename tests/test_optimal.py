@@ -0,0 +1,21 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team, violations
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_keeps_restrictions_and_fills_every_shift(seed):
+    developers = random_team(seed, 8)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, solver="optimal", holidays_file=None)
+    assert violations(schedule, developers) == []
+    assert schedule["assignments"].count(None) == 0
+
+
+def test_deterministic_and_balanced():
+    developers = random_team(2, 9)
+    first = scheduler.build_schedule(3, 2026, developers, seed=1, solver="optimal", holidays_file=None)
+    second = scheduler.build_schedule(3, 2026, developers, seed=1, solver="optimal", holidays_file=None)
+    assert first["assignments"] == second["assignments"]
+    totals = [sum(counts.values()) for counts in first["developer_shift_count"].values()]
+    assert max(totals) - min(totals) <= 1
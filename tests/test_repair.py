@@ -0,0 +1,55 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import SHIFTS_3X8, random_team, violations
+
+
+@pytest.mark.parametrize("changed", [True, False])
+@pytest.mark.parametrize("shifts", [scheduler.SHIFT_NAMES, SHIFTS_3X8])
+def test_repair_fixes_new_restrictions(changed, shifts):
+    developers = random_team(5, 8, shifts)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=5, holidays_file=None, shifts=shifts)
+    victim = schedule["assignments"][10]
+    slots = schedule["slots"]
+    updated = dict(developers)
+    updated[victim] = developers[victim] + [f"{slots['date'][10]} {slots['shift'][10]}"]
+    del updated[schedule["assignments"][20]]
+
+    repaired, diff = scheduler.repair_schedule(schedule, updated, changed=[victim] if changed else None)
+    assert violations(repaired, updated) == []
+    assert 10 in {change["slot"] for change in diff}
+    # Everything outside the diff is left alone
+    untouched = set(range(len(slots["type"]))) - {change["slot"] for change in diff}
+    assert all(repaired["assignments"][slot] == schedule["assignments"][slot] for slot in untouched)
+
+
+def test_repair_with_changed_matches_full_recheck():
+    developers = random_team(7, 8, scheduler.SHIFT_NAMES)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=7, holidays_file=None)
+    victim = schedule["assignments"][4]
+    slots = schedule["slots"]
+    updated = dict(developers)
+    updated[victim] = developers[victim] + [f"{slots['date'][4]} {slots['shift'][4]}"]
+
+    assert (scheduler.repair_schedule(schedule, updated, changed=[victim])
+            == scheduler.repair_schedule(schedule, updated))
+
+
+def test_constraints_snapshot_diff(tmp_path):
+    developers = {"Alice": ["Night"], "Bob": [], "Carol": ["2026-03-02 Day"]}
+    csv_file = tmp_path / "shift_schedule.csv"
+    csv_file.write_text("placeholder\n")
+    snapshot = tmp_path / scheduler.CONSTRAINTS_SNAPSHOT
+    args = (3, 2026)
+    rules = scheduler.DEFAULT_REST_RULES
+    scheduler.write_constraints_snapshot(snapshot, csv_file, *args, developers, scheduler.SHIFT_NAMES, rules)
+
+    updated = {"Alice": ["Night"], "Bob": ["Day"], "Carol": ["2026-03-02 Day"], "Dave": []}
+    assert scheduler.changed_developers(snapshot, csv_file, *args, updated, scheduler.SHIFT_NAMES,
+                                        rules) == ["Bob", "Dave"]
+    # Another month or an edited CSV is rechecked in full
+    assert scheduler.changed_developers(snapshot, csv_file, 4, 2026, updated, scheduler.SHIFT_NAMES, rules) is None
+    csv_file.write_text("edited\n")
+    assert scheduler.changed_developers(snapshot, csv_file, *args, updated, scheduler.SHIFT_NAMES, rules) is None
+    assert scheduler.changed_developers(tmp_path / "missing.json", csv_file, *args, updated,
+                                        scheduler.SHIFT_NAMES, rules) is None
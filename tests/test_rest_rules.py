@@ -0,0 +1,36 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team, violations
+
+STRICT = scheduler.RestRules(min_gap=2, max_per_week=4, weekend_every=2)
+
+
+@pytest.mark.parametrize("solver", scheduler.SOLVERS)
+def test_solvers_keep_strict_rest_rules(solver):
+    developers = random_team(1, 10)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=1, solver=solver, holidays_file=None,
+                                        rest_rules=STRICT)
+    assert violations(schedule, developers, STRICT) == []
+
+
+def test_feasibility_follows_rest_rules():
+    solo = {"Solo": []}
+    strict = scheduler.feasibility_report(3, 2026, solo, holidays_file=None)
+    relaxed = scheduler.feasibility_report(3, 2026, solo, holidays_file=None, rest_rules=scheduler.RestRules(0))
+    assert strict["uncovered"] == 31
+    assert relaxed["feasible"]
+
+
+@pytest.mark.parametrize("rules", [scheduler.RestRules(min_gap=2), STRICT, scheduler.RestRules(weekend_every=2),
+                                   scheduler.RestRules(min_gap=3, max_per_week=3)])
+@pytest.mark.parametrize("seed", range(4))
+def test_optimal_scores_at_least_as_well_as_greedy(rules, seed):
+    developers = random_team(seed, 6 + seed)
+    scores = {}
+    for solver in scheduler.SOLVERS:
+        schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, solver=solver, holidays_file=None,
+                                            rest_rules=rules)
+        assert violations(schedule, developers, rules) == []
+        scores[solver] = scheduler.score_key(scheduler.score_schedule(schedule))
+    assert scores["optimal"] <= scores["greedy"]
@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from run_metrics import NO_METRICS, RunMetrics
+
+
+def test_report_records_phases_counters_and_api_calls(tmp_path):
+    metrics = RunMetrics()
+    with metrics.phase("assignment"):
+        metrics.count("slots", 62)
+    with metrics.api_call("batch_update"):
+        pass
+    with pytest.raises(RuntimeError):
+        with metrics.api_call("batch_update"):
+            raise RuntimeError("quota")
+    metrics.write(str(tmp_path / "metrics.json"))
+
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert [phase["name"] for phase in report["phases"]] == ["assignment"]
+    assert report["counters"] == {"slots": 62}
+    assert report["api_calls"]["batch_update"]["count"] == 2
+    assert report["api_calls"]["batch_update"]["errors"] == 1
+
+
+def test_disabled_recorder_records_nothing():
+    with NO_METRICS.phase("assignment"), NO_METRICS.api_call("batch_update"):
+        NO_METRICS.count("slots")
+    assert NO_METRICS.phases == [] and NO_METRICS.counters == {} and NO_METRICS.api_calls == {}
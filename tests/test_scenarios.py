@@ -0,0 +1,58 @@
+import pytest
+
+from scenarios import ScenarioBase, evaluate_scenarios
+
+TEAM = {"Alex": [], "Omer": ["05/03 Day"], "Ivan": [], "Or": [], "Amit": []}
+
+
+@pytest.fixture(scope="module")
+def base():
+    return ScenarioBase(3, 2026, TEAM, holidays_file=None)
+
+
+def test_add_then_restrict_the_new_developer(base):
+    developers, masks = base.apply({"add": {"Hagay": []}, "restrict": {"Hagay": ["01/03 Day"]}})
+    assert developers["Hagay"] == ["01/03 Day"]
+    assert masks["Hagay"] == 1
+
+
+def test_remove_and_restrict_the_same_developer_is_an_error(base):
+    result = base.evaluate({"name": "conflict", "remove": ["Ivan"], "restrict": {"Ivan": ["01/03"]}},
+                           solver="greedy")
+    assert result == {"name": "conflict", "error": "Cannot restrict 'Ivan': removed by the same scenario"}
+
+
+@pytest.mark.parametrize("scenario", [
+    {"remove": ["Nobody"]},
+    {"unrestrict": {"Nobody": []}},
+    {"add": {"Alex": []}},
+    {"restrict": ["Alex"]},
+    {"restrict": {"Alex": ["32/03"]}},
+    {"fire": ["Alex"]},
+    {"remove": list(TEAM)},
+])
+def test_invalid_scenarios_are_errors(base, scenario):
+    with pytest.raises(ValueError):
+        base.apply(scenario)
+
+
+def test_unrestrict_recompiles(base):
+    developers, masks = base.apply({"unrestrict": {"Omer": ["05/03 Day"]}})
+    assert developers["Omer"] == [] and masks["Omer"] == 0
+
+
+def test_base_is_not_modified(base):
+    base.apply({"remove": ["Alex"], "restrict": {"Omer": ["06/03"]}})
+    assert base.developers == TEAM and "Alex" in base.masks
+
+
+def test_batch_keeps_going_after_a_bad_scenario(base):
+    results = evaluate_scenarios(base, [{"name": "bad", "remove": ["Or"], "unrestrict": {"Or": []}},
+                                        {"name": "smaller", "remove": ["Or"]}], workers=1, solver="greedy")
+    assert "error" in results[0]
+    assert results[1]["developers"] == 4
+
+
+def test_empty_team_is_an_error_not_a_crash():
+    result = ScenarioBase(3, 2026, {}, holidays_file=None).evaluate({"name": "base"}, solver="greedy")
+    assert result == {"name": "base", "error": "No developers left to schedule"}
@@ -0,0 +1,43 @@
+import on_call_scheduler_with_sheets as scheduler
+from schedule_cache import ScheduleCache, cached_schedule, schedule_key
+from schedule_checks import random_team
+
+SETTINGS = {"solver": "greedy", "seed": 1}
+
+
+def test_key_ignores_restriction_order_but_not_content():
+    developers = random_team(0, 6)
+    shuffled = {dev: list(reversed(restrictions)) for dev, restrictions in developers.items()}
+    changed = dict(developers, dev0=developers["dev0"] + ["31/03 Night"])
+    key = schedule_key(3, 2026, developers, None, SETTINGS)
+    assert schedule_key(3, 2026, shuffled, None, SETTINGS) == key
+    assert schedule_key(3, 2026, changed, None, SETTINGS) != key
+    assert schedule_key(3, 2026, developers, None, dict(SETTINGS, seed=2)) != key
+
+
+def test_entry_round_trip(tmp_path):
+    developers = random_team(0, 6)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=1, holidays_file=None)
+    exported = tmp_path / "schedule.csv"
+    exported.write_text("csv")
+    cache = ScheduleCache(str(tmp_path / "cache"))
+    key = schedule_key(3, 2026, developers, None, SETTINGS)
+    assert cache.get(key) is None
+
+    cache.put(key, schedule, [str(exported)])
+    entry = cache.get(key)
+    assert cache.restore(entry, str(tmp_path / "out")) == {"schedule.csv"}
+    assert (tmp_path / "out" / "schedule.csv").read_text() == "csv"
+    restored = cached_schedule(entry, developers, None)
+    assert restored["assignments"] == schedule["assignments"]
+    assert restored["developer_shift_count"] == schedule["developer_shift_count"]
+
+
+def test_time_limited_improve_runs_are_not_cached(tmp_path):
+    cache_dir = tmp_path / "cache"
+    common = ["--constraints", str(tmp_path / "missing.json"), "--holidays", str(tmp_path / "none.json"),
+              "--output-dir", str(tmp_path / "out"), "--no-excel", "--no-upload", "--cache", str(cache_dir)]
+    assert scheduler.main(common + ["--improve", "0.01"]) == 0
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
+    assert scheduler.main(common + ["--improve-iterations", "100"]) == 0
+    assert any(cache_dir.iterdir())
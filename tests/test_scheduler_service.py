@@ -0,0 +1,59 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from scheduler_service import SchedulerService
+
+BASE = {"month": 3, "year": 2026, "developers": {name: {"restrictions": []} for name in "ABCDE"}}
+
+
+@pytest.fixture(scope="module")
+def service():
+    server = SchedulerService(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def call(url, body=None):
+    data = None if body is None else json.dumps(body).encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_health(service):
+    status, body = call(f"{service}/health")
+    assert status == 200 and body["status"] == "ok"
+
+
+def test_check_answers_with_a_feasibility_report(service):
+    status, body = call(f"{service}/check", BASE)
+    assert status == 200
+    assert body["feasible"] and body["slots"] == 62
+
+
+def test_malformed_requests_are_rejected(service):
+    assert call(f"{service}/check", {"month": 13})[0] == 400
+    assert call(f"{service}/generate", {"args": "--seed 1"})[0] == 400
+    assert call(f"{service}/scenarios", {"scenarios": "Ivan leaves", "base": BASE})[0] == 400
+
+
+def test_scenario_errors_are_reported_per_scenario(service):
+    status, body = call(f"{service}/scenarios", {"scenarios": [{"name": "typo", "remove": ["Nobody"]}],
+                                                 "base": BASE, "solver": "greedy"})
+    assert status == 200
+    assert [result["name"] for result in body["results"]] == ["base", "typo"]
+    assert "error" in body["results"][1] and "error" not in body["results"][0]
+
+
+def test_generate_runs_in_process(service):
+    status, body = call(f"{service}/generate", {"args": ["--help"]})
+    assert status == 200
+    assert body["code"] == 0 and "--seed" in body["output"]
@@ -0,0 +1,26 @@
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import random_team
+
+
+def test_best_attempt_is_reproducible():
+    developers = random_team(4, 8)
+    best = scheduler.search_schedule(3, 2026, developers, attempts=6, seed=100, workers=1, holidays_file=None)
+    assert 100 <= best["seed"] < 106
+    assert best["attempts"] == 6
+    rebuilt = scheduler.build_schedule(3, 2026, developers, seed=best["seed"], holidays_file=None)
+    assert rebuilt["assignments"] == best["assignments"]
+
+
+def test_best_attempt_scores_lowest():
+    developers = random_team(4, 8)
+    best = scheduler.search_schedule(3, 2026, developers, attempts=6, seed=100, workers=1, holidays_file=None)
+    for seed in range(100, 106):
+        other = scheduler.build_schedule(3, 2026, developers, seed=seed, holidays_file=None)
+        assert scheduler.score_key(best["score"]) <= scheduler.score_key(scheduler.score_schedule(other))
+
+
+def test_workers_do_not_change_the_result():
+    developers = random_team(6, 8)
+    serial = scheduler.search_schedule(3, 2026, developers, attempts=4, seed=7, workers=1, holidays_file=None)
+    parallel = scheduler.search_schedule(3, 2026, developers, attempts=4, seed=7, workers=2, holidays_file=None)
+    assert serial["assignments"] == parallel["assignments"]
@@ -0,0 +1,153 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from fake_sheets_server import start_fake_server
+from sheets_api import SheetsClient, upsert_schedule
+
+TEAM = {"Omer": [], "Shlomi": [], "Amit": [], "Ohad": [], "Ivan": []}
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = start_fake_server()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def worksheet(request):
+    """A fresh worksheet per test on the shared fake spreadsheet"""
+    return f"On call {request.node.name} 2026"
+
+
+def client_for(server):
+    return SheetsClient(server.spreadsheet_id, lambda: "fake", base_url=server.sheets_url, sleep=lambda _: None)
+
+
+def month(month_number, seed=1, **options):
+    schedule = scheduler.build_schedule(month_number, 2026, TEAM, seed=seed, holidays_file=None, **options)
+    return scheduler.schedule_rows(schedule), scheduler.MONTH_NAMES[month_number - 1]
+
+
+def upsert(server, worksheet, rows, month_name):
+    return upsert_schedule(client_for(server), worksheet, rows, 2026, month_name, scheduler.DEVELOPER_COLORS,
+                           scheduler.MONTH_NAMES)
+
+
+def test_create_writes_the_whole_block(server, worksheet):
+    rows, name = month(3)
+    result = upsert(server, worksheet, rows, name)
+    assert result["action"] == "created" and result["month_row"] == 1
+    cells = server.cells(worksheet)
+    assert cells[(0, 0)]["value"] == "Mar"
+    first = rows[0]
+    assert [cells[(1, column)]["value"] for column in range(4)] == \
+        [1, first["shifts"]["Night Shift"], first["shifts"]["Day Shift"], "Sunday"]
+    assert cells[(1, 1)]["format"]["backgroundColor"] == scheduler.DEVELOPER_COLORS[first["shifts"]["Night Shift"]]
+
+
+def test_unchanged_month_sends_nothing(server, worksheet):
+    rows, name = month(3)
+    upsert(server, worksheet, rows, name)
+    requests = server.request_count
+    result = upsert(server, worksheet, rows, name)
+    assert result == {"action": "unchanged", "month_row": 1, "requests": 0, "cells_changed": 0}
+    assert server.request_count == requests + 2  # the column A index and the block, no write
+
+
+def test_reads_column_a_then_only_the_block(server, worksheet):
+    march, _ = month(3)
+    upsert(server, worksheet, march, "Mar")
+    upsert(server, worksheet, month(4)[0], "Apr")
+    client = client_for(server)
+    ranges = []
+    original = client.read_grid
+
+    def read_grid(title, cell_range, *args):
+        ranges.append(cell_range)
+        return original(title, cell_range, *args)
+
+    client.read_grid = read_grid
+    upsert_schedule(client, worksheet, march, 2026, "Mar", scheduler.DEVELOPER_COLORS, scheduler.MONTH_NAMES)
+    assert ranges == ["A:A", "A2:D32"]
+
+
+def test_worksheet_needs_the_year(server):
+    rows, name = month(3)
+    with pytest.raises(ValueError):
+        upsert_schedule(client_for(server), "On call", rows, 2026, name, scheduler.DEVELOPER_COLORS,
+                        scheduler.MONTH_NAMES)
+
+
+def test_one_changed_shift_is_one_cell(server, worksheet):
+    rows, name = month(3)
+    upsert(server, worksheet, rows, name)
+    label = "Day Shift"
+    current = rows[4]["shifts"][label]
+    rows[4]["shifts"][label] = next(dev for dev in TEAM if dev != current)
+    result = upsert(server, worksheet, rows, name)
+    assert result["action"] == "updated"
+    assert result["cells_changed"] == 1 and result["requests"] == 1
+    cell = server.cells(worksheet)[(5, 2)]
+    assert cell["value"] == rows[4]["shifts"][label]
+    assert cell["format"]["backgroundColor"] == scheduler.DEVELOPER_COLORS[rows[4]["shifts"][label]]
+
+
+def test_new_month_is_appended_below(server, worksheet):
+    march, _ = month(3)
+    upsert(server, worksheet, march, "Mar")
+    april, _ = month(4)
+    result = upsert(server, worksheet, april, "Apr")
+    assert result["action"] == "appended"
+    assert result["month_row"] == 1 + len(march) + 3
+    assert server.cells(worksheet)[(result["month_row"] - 1, 0)]["value"] == "Apr"
+
+
+def test_wider_blocks_for_tiers(server, worksheet):
+    rows, name = month(3, shifts=("Morning", "Evening", "Night"), tiers=2)
+    upsert(server, worksheet, rows, name)
+    cells = server.cells(worksheet)
+    assert cells[(1, 7)]["value"] == "Sunday"
+    assert cells[(1, 6)]["value"] == rows[0]["shifts"]["Night Shift (Backup)"]
+
+
+def test_retries_rate_limited_requests(worksheet):
+    server = start_fake_server(fail_every=2)
+    try:
+        rows, name = month(3)
+        assert upsert(server, worksheet, rows, name)["action"] == "created"
+        assert upsert(server, worksheet, rows, name)["action"] == "unchanged"
+        assert server.failures > 0
+        assert server.cells(worksheet)[(0, 0)]["value"] == "Mar"
+    finally:
+        server.shutdown()
+
+
+def test_alignment_survives_unrequested_formats(server, worksheet):
+    march, _ = month(3)
+    upsert(server, worksheet, march, "Mar")
+    # Bold text well past the block: masked out of every read, it must not shift rows or cells
+    sheet_id = client_for(server).sheet_ids()[worksheet]
+    server.spreadsheet.batch_update([{"repeatCell": {
+        "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 60,
+                  "startColumnIndex": 0, "endColumnIndex": 6},
+        "cell": {"userEnteredFormat": {"textFormat": {"bold": True}}},
+        "fields": "userEnteredFormat.textFormat"}}])
+    label = "Night Shift"
+    march[6]["shifts"][label] = next(dev for dev in TEAM if dev != march[6]["shifts"][label])
+    result = upsert(server, worksheet, march, "Mar")
+    assert result["cells_changed"] == 1
+    assert server.cells(worksheet)[(7, 1)]["value"] == march[6]["shifts"][label]
+    assert upsert(server, worksheet, month(4)[0], "Apr")["month_row"] == 1 + len(march) + 3
+
+
+def test_retried_creation_whose_first_attempt_went_through(worksheet):
+    # The third request (the create batch) is applied, then answered with a 503
+    server = start_fake_server(fail_every=3, fail_status=503, lose_responses=True)
+    try:
+        rows, name = month(3)
+        assert upsert(server, worksheet, rows, name)["action"] == "created"
+        assert server.failures == 1
+        assert server.cells(worksheet)[(0, 0)]["value"] == "Mar"
+    finally:
+        server.shutdown()
@@ -0,0 +1,36 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from shift_history import carry_over_counts, open_history, record_schedule, recorded_rows, window_totals, year_rows
+from schedule_checks import random_team
+
+
+@pytest.fixture
+def history(tmp_path):
+    conn = open_history(str(tmp_path / "history.sqlite3"))
+    yield conn
+    conn.close()
+
+
+def test_rerecording_a_month_replaces_it(history):
+    developers = random_team(0, 6)
+    for seed in (1, 2):
+        schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, holidays_file=None)
+        record_schedule(history, schedule)
+    totals = window_totals(history, 4, 2026, months=1)
+    assert totals == {dev: counts for dev, counts in schedule["developer_shift_count"].items() if any(counts.values())}
+
+
+def test_carry_over_is_relative_to_the_least_loaded(history):
+    developers = random_team(0, 6)
+    record_schedule(history, scheduler.build_schedule(3, 2026, developers, seed=1, holidays_file=None))
+    carry = carry_over_counts(history, list(developers) + ["Newcomer"], 4, 2026)
+    assert carry["Newcomer"] == {name: 0 for name in scheduler.SHIFT_TYPES}
+    assert all(count >= 0 for counts in carry.values() for count in counts.values())
+
+
+def test_recorded_rows_match_the_schedule(history):
+    schedule = scheduler.build_schedule(3, 2026, random_team(0, 6), seed=1, holidays_file=None)
+    record_schedule(history, schedule)
+    assert recorded_rows(history, 3, 2026) == scheduler.schedule_rows(schedule)
+    assert [name for name, _ in year_rows(history, 2026)] == ["Mar"]
@@ -0,0 +1,38 @@
+import pytest
+
+import on_call_scheduler_with_sheets as scheduler
+from schedule_checks import SHIFTS_3X8, random_team, violations
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_tiers_on_a_custom_template(seed):
+    developers = random_team(seed, 9, SHIFTS_3X8)
+    schedule = scheduler.build_schedule(3, 2026, developers, seed=seed, holidays_file=None,
+                                        shifts=SHIFTS_3X8, tiers=2)
+    assert len(schedule["tier_assignments"]) == 2
+    assert schedule["tier_assignments"][0] == schedule["assignments"]
+    assert len(schedule["assignments"]) == 31 * 3
+    assert violations(schedule, developers) == []
+    assert sum(tier.count(None) for tier in schedule["tier_assignments"]) == 0
+
+
+def test_tiers_need_greedy():
+    with pytest.raises(ValueError):
+        scheduler.build_schedule(3, 2026, {"A": [], "B": []}, solver="optimal", tiers=2, holidays_file=None)
+
+
+def test_tier_columns_and_rows():
+    schedule = scheduler.build_schedule(3, 2026, random_team(0, 9, SHIFTS_3X8), seed=0, holidays_file=None,
+                                        shifts=SHIFTS_3X8, tiers=2)
+    row = scheduler.schedule_rows(schedule)[0]
+    assert list(row["shifts"]) == ["Morning Shift (Primary)", "Morning Shift (Backup)",
+                                   "Evening Shift (Primary)", "Evening Shift (Backup)",
+                                   "Night Shift (Primary)", "Night Shift (Backup)"]
+
+
+def test_local_search_and_repair_reject_tiers():
+    schedule = scheduler.build_schedule(3, 2026, random_team(0, 9), seed=0, holidays_file=None, tiers=2)
+    with pytest.raises(ValueError):
+        scheduler.improve_schedule(schedule, random_team(0, 9), iterations=10)
+    with pytest.raises(ValueError):
+        scheduler.repair_schedule(schedule, random_team(0, 9))